@@ -0,0 +1,96 @@
+import json
+import shutil
+import tempfile
+
+import click
+
+from benchmarks.generator import MonorepoGenerator, MonorepoSpec
+from benchmarks.suite import BenchmarkSuite, compare_with_baseline, results_document
+from monorepo_builder.console import write_to_console
+
+
+@click.command()
+@click.option("--folder", default=None, help="Generate the monorepo in this folder.")
+@click.option("--libraries", type=click.IntRange(min=1), default=20, show_default=True)
+@click.option("--projects", type=click.IntRange(min=0), default=80, show_default=True)
+@click.option("--files", type=click.IntRange(min=1), default=50, show_default=True)
+@click.option("--depth", type=click.IntRange(min=0), default=3, show_default=True)
+@click.option("--fan-out", type=click.IntRange(min=0), default=3, show_default=True)
+@click.option(
+    "--installer-size-kb", type=click.IntRange(min=1), default=64, show_default=True
+)
+@click.option("--repeat", type=click.IntRange(min=1), default=5, show_default=True)
+@click.option(
+    "--benchmark", "names", multiple=True, help="Only run the named benchmarks."
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False), help="Write the results as JSON."
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Compare with results written by an earlier run.",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.25,
+    show_default=True,
+    help="Slowdown over the baseline that counts as a regression.",
+)
+def run_benchmarks(
+    folder,
+    libraries,
+    projects,
+    files,
+    depth,
+    fan_out,
+    installer_size_kb,
+    repeat,
+    names,
+    output,
+    baseline,
+    tolerance,
+):
+    spec = MonorepoSpec(
+        library_count=libraries,
+        standard_count=projects,
+        files_per_project=files,
+        folder_depth=depth,
+        dependency_fan_out=fan_out,
+        installer_size=installer_size_kb * 1024,
+    )
+    root = folder or tempfile.mkdtemp(prefix="monorepo-benchmark-")
+    try:
+        write_to_console(f"Generating the monorepo in {root}", color="blue")
+        monorepo = MonorepoGenerator(spec).generate(root)
+        results = BenchmarkSuite(monorepo, repeat).run(names or None)
+    finally:
+        if folder is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    for result in results:
+        write_to_console(
+            f"{result.name:<40} best {result.best * 1000:9.2f} ms"
+            f"  mean {result.mean * 1000:9.2f} ms"
+        )
+    if output:
+        with open(output, "w") as output_file:
+            json.dump(results_document(spec, results), output_file, indent=2)
+        write_to_console(f"Results written to {output}")
+    if baseline:
+        with open(baseline) as baseline_file:
+            comparisons = compare_with_baseline(
+                results, json.load(baseline_file), tolerance
+            )
+        for comparison in comparisons:
+            write_to_console(
+                f"{comparison.name:<40} {comparison.ratio:6.2f}x baseline",
+                color="red" if comparison.regressed else None,
+            )
+        if any(comparison.regressed for comparison in comparisons):
+            raise click.ClickException("Slower than the baseline")
+
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -0,0 +1,152 @@
+import json
+import os
+import random
+import stat
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+BUILD_SCRIPT = "#!/bin/sh\nexit 0\n"
+
+
+@dataclass
+class MonorepoSpec:
+    library_count: int = 20
+    standard_count: int = 80
+    files_per_project: int = 50
+    folder_depth: int = 3
+    dependency_fan_out: int = 3
+    file_size: int = 512
+    installer_size: int = 64 * 1024
+    seed: int = 0
+
+
+@dataclass
+class SyntheticMonorepo:
+    root: str
+    spec: MonorepoSpec
+    library_paths: List[str] = field(default_factory=list)
+    standard_paths: List[str] = field(default_factory=list)
+    dependencies: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def installer_folder(self) -> str:
+        return os.path.join(self.root, "installers")
+
+    @property
+    def project_paths(self) -> List[str]:
+        return self.library_paths + self.standard_paths
+
+
+def library_name(index: int) -> str:
+    return f"lib-{index:04d}"
+
+
+def installer_name(library: str) -> str:
+    return f"{library.replace('-', '_')}-1.0-py3-none-any.whl"
+
+
+class MonorepoGenerator:
+    def __init__(self, spec: MonorepoSpec):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+
+    def generate(self, root: str) -> SyntheticMonorepo:
+        monorepo = SyntheticMonorepo(root, self.spec)
+        for index in range(self.spec.library_count):
+            name = library_name(index)
+            # Libraries only use libraries generated before them, so the graph never
+            # has a cycle.
+            dependencies = self._pick_libraries(index)
+            path = os.path.join(root, "libraries", name)
+            self._write_python_project(path, dependencies)
+            monorepo.library_paths.append(path)
+            monorepo.dependencies[name] = dependencies
+        for index in range(self.spec.standard_count):
+            dependencies = self._pick_libraries(self.spec.library_count)
+            if index % 2 == 0:
+                name = f"service-{index:04d}"
+                path = os.path.join(root, "platform", name)
+                self._write_python_project(path, dependencies)
+            else:
+                name = f"app-{index:04d}"
+                path = os.path.join(root, "web", name)
+                self._write_node_project(path, name, dependencies)
+            monorepo.standard_paths.append(path)
+            monorepo.dependencies[name] = dependencies
+        self._write_installers(monorepo)
+        return monorepo
+
+    def _pick_libraries(self, available: int) -> List[str]:
+        count = min(available, self.spec.dependency_fan_out)
+        return [
+            library_name(index)
+            for index in sorted(self.random.sample(range(available), count))
+        ]
+
+    def _write_python_project(self, path: str, dependencies: List[str]):
+        self._write_source_files(path, ".py")
+        self._write_file(
+            os.path.join(path, "requirements.txt"),
+            "".join(f"{dependency}\n" for dependency in dependencies),
+        )
+        self._write_build_script(path)
+
+    def _write_node_project(self, path: str, name: str, dependencies: List[str]):
+        self._write_source_files(path, ".js")
+        package = {
+            "name": name,
+            "version": "1.0.0",
+            "dependencies": {
+                dependency: f"file:../../installers/{installer_name(dependency)}"
+                for dependency in dependencies
+            },
+        }
+        self._write_file(
+            os.path.join(path, "package.json"), json.dumps(package, indent=2)
+        )
+        self._write_build_script(path)
+
+    def _write_source_files(self, path: str, extension: str):
+        for index in range(self.spec.files_per_project):
+            self._write_file(
+                os.path.join(
+                    path, self._source_folder(index), f"module_{index}{extension}"
+                ),
+                self._content(),
+            )
+
+    def _source_folder(self, index: int) -> str:
+        # Spread the files over a tree of three folders per level, down to the depth.
+        parts = [
+            f"package_{(index // 3 ** level) % 3}"
+            for level in range(self.spec.folder_depth)
+        ]
+        return os.path.join("src", *parts)
+
+    def _write_build_script(self, path: str):
+        filename = os.path.join(path, "build.sh")
+        self._write_file(filename, BUILD_SCRIPT)
+        os.chmod(filename, os.stat(filename).st_mode | stat.S_IXUSR)
+
+    def _write_installers(self, monorepo: SyntheticMonorepo):
+        os.makedirs(monorepo.installer_folder, exist_ok=True)
+        for index in range(self.spec.library_count):
+            with open(
+                os.path.join(
+                    monorepo.installer_folder, installer_name(library_name(index))
+                ),
+                "wb",
+            ) as installer:
+                size = self.spec.installer_size
+                installer.write(
+                    self.random.getrandbits(size * 8).to_bytes(size, "little")
+                )
+
+    def _content(self) -> str:
+        line = f"value = {self.random.random()!r}\n"
+        return line * max(1, self.spec.file_size // len(line))
+
+    def _write_file(self, filename: str, content: str):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w") as file:
+            file.write(content)
@@ -0,0 +1,230 @@
+import contextlib
+import dataclasses
+import io
+import os
+import platform
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from benchmarks.generator import MonorepoSpec, SyntheticMonorepo, installer_name
+from monorepo_builder.build_executor import ProjectBuildRequests
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.configuration import (
+    Configuration,
+    ConfigurationManager,
+    ProvisioningMode,
+)
+from monorepo_builder.file_list import FileList
+from monorepo_builder.project_list import ProjectListManager, Projects
+from monorepo_builder.projects import Project
+from monorepo_builder.provisioning import FolderProvisioner
+from monorepo_builder.runner import BuildRunner
+from monorepo_builder.state_store import StateStore, StateStoreManager
+
+STATE_STORE_FILENAME = ".monorepo-state.db"
+SAVE_STATE_FILENAME = ".benchmark-state.db"
+
+
+def no_setup():
+    pass
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], None]
+    setup: Callable[[], None] = field(default=no_setup)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    timings: List[float]
+
+    @property
+    def best(self) -> float:
+        return min(self.timings)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.timings) / len(self.timings)
+
+    def to_dict(self) -> Dict:
+        return {"best": self.best, "mean": self.mean, "timings": self.timings}
+
+
+@dataclass
+class BenchmarkComparison:
+    name: str
+    baseline: float
+    current: float
+    tolerance: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    @property
+    def regressed(self) -> bool:
+        return self.ratio > 1 + self.tolerance
+
+
+class BenchmarkSuite:
+    def __init__(self, monorepo: SyntheticMonorepo, repeat: int = 5):
+        self.monorepo = monorepo
+        self.repeat = repeat
+        self.configuration = Configuration(
+            monorepo_root_folder=monorepo.root,
+            installer_folder=monorepo.installer_folder,
+            state_store_filename=os.path.join(monorepo.root, STATE_STORE_FILENAME),
+        )
+        self.scanned_projects: List[Project] = []
+
+    def run(self, names: Optional[Iterable[str]] = None) -> List[BenchmarkResult]:
+        with self.configured():
+            self.prepare()
+            return [
+                self.measure(benchmark)
+                for benchmark in self.benchmarks()
+                if names is None or benchmark.name in names
+            ]
+
+    @contextlib.contextmanager
+    def configured(self):
+        previous_configuration = ConfigurationManager.configuration
+        StateStoreManager.close()
+        ConfigurationManager.configuration = self.configuration
+        try:
+            yield
+        finally:
+            StateStoreManager.close()
+            ConfigurationManager.configuration = previous_configuration
+
+    def prepare(self):
+        # The saved state matches the scan except for the first library, so identifying
+        # the builds finds one changed library and follows it to its dependents.
+        self.scanned_projects = list(Projects.projects_factory())
+        saved_projects = [
+            Project(project_path=project.project_path, file_list=project.file_list)
+            for project in self.scanned_projects
+        ]
+        changed_path = self.monorepo.library_paths[0]
+        for project in saved_projects:
+            if project.project_path == changed_path:
+                project.file_list = FileList(changed_path)
+        StateStoreManager.get().save_projects(saved_projects)
+
+    def benchmarks(self) -> List[Benchmark]:
+        benchmarks = [
+            Benchmark("scan projects", Projects.projects_factory),
+            Benchmark(
+                "identify projects needing build", self.identify_projects_needing_build
+            ),
+            Benchmark("schedule builds", self.schedule_builds),
+            Benchmark("save state", self.save_state, self.remove_saved_state),
+            Benchmark(
+                "load state",
+                ProjectListManager().load_list_from_last_successful_run,
+            ),
+        ]
+        for mode in ProvisioningMode:
+            benchmarks.append(
+                Benchmark(
+                    f"provision installers ({mode.name})",
+                    lambda mode=mode: self.provision_installers(mode),
+                    self.remove_provisioned_installers,
+                )
+            )
+        return benchmarks
+
+    def measure(self, benchmark: Benchmark) -> BenchmarkResult:
+        timings = []
+        for _ in range(self.repeat):
+            benchmark.setup()
+            started_at = time.perf_counter()
+            benchmark.run()
+            timings.append(time.perf_counter() - started_at)
+        return BenchmarkResult(benchmark.name, timings)
+
+    def fresh_projects(self, needs_build: bool) -> Projects:
+        projects = Projects()
+        projects.extend(
+            Project(
+                project_path=project.project_path,
+                file_list=project.file_list,
+                needs_build=needs_build,
+            )
+            for project in self.scanned_projects
+        )
+        return projects
+
+    def identify_projects_needing_build(self):
+        projects = self.fresh_projects(needs_build=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            BuildRunner().identify_projects_needing_build(projects)
+
+    def schedule_builds(self):
+        projects = self.fresh_projects(needs_build=True)
+        BuildGraph.build_graph_factory(
+            ProjectBuildRequests.all_projects(projects), projects.dependency_index
+        )
+
+    def save_state(self):
+        state_store = StateStore(os.path.join(self.monorepo.root, SAVE_STATE_FILENAME))
+        try:
+            state_store.save_projects(self.scanned_projects)
+        finally:
+            state_store.close()
+
+    def remove_saved_state(self):
+        for suffix in ["", "-wal", "-shm"]:
+            filename = os.path.join(self.monorepo.root, SAVE_STATE_FILENAME + suffix)
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def provision_installers(self, mode: ProvisioningMode):
+        provisioner = FolderProvisioner(mode)
+        for project_path in self.monorepo.standard_paths:
+            provisioner.provision(
+                self.monorepo.installer_folder,
+                self.installers_folder(project_path),
+                [
+                    installer_name(library)
+                    for library in self.monorepo.dependencies[
+                        os.path.basename(project_path)
+                    ]
+                ],
+            )
+
+    def remove_provisioned_installers(self):
+        for project_path in self.monorepo.standard_paths:
+            shutil.rmtree(self.installers_folder(project_path), ignore_errors=True)
+
+    def installers_folder(self, project_path: str) -> str:
+        return os.path.join(project_path, "installers")
+
+
+def results_document(spec: MonorepoSpec, results: List[BenchmarkResult]) -> Dict:
+    return {
+        "spec": dataclasses.asdict(spec),
+        "python": platform.python_version(),
+        "benchmarks": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare_with_baseline(
+    results: List[BenchmarkResult], baseline: Dict, tolerance: float
+) -> List[BenchmarkComparison]:
+    baseline_benchmarks = baseline.get("benchmarks", {})
+    return [
+        BenchmarkComparison(
+            result.name,
+            baseline_benchmarks[result.name]["best"],
+            result.best,
+            tolerance,
+        )
+        for result in results
+        if result.name in baseline_benchmarks
+    ]
@@ -0,0 +1,84 @@
+import os
+import subprocess
+from typing import Dict, List, Optional
+
+from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.project_list import ProjectListFactory, Projects
+from monorepo_builder.projects import Project, ProjectType
+
+PROJECT_KEY = ""
+
+
+class ProjectPathTrie:
+    def __init__(self):
+        self.root: Dict = {}
+
+    @staticmethod
+    def project_path_trie_factory(projects: Projects, root_folder: str):
+        trie = ProjectPathTrie()
+        for project in projects:
+            trie.add(os.path.relpath(project.project_path, root_folder), project)
+        return trie
+
+    def add(self, relative_path: str, project: Project):
+        node = self.root
+        for part in relative_path.split(os.sep):
+            node = node.setdefault(part, {})
+        node[PROJECT_KEY] = project
+
+    def find(self, relative_path: str) -> Optional[Project]:
+        # Git paths always use "/", and "" never appears as a path component, so it
+        # marks the nodes that are project roots.
+        project = None
+        node = self.root
+        for part in relative_path.split("/"):
+            node = node.get(part)
+            if node is None:
+                break
+            project = node.get(PROJECT_KEY, project)
+        return project
+
+
+class AffectedProjectsFinder:
+    def find(self, since: str) -> List[Project]:
+        root_folder = ConfigurationManager.get().monorepo_root_folder
+        projects = Projects()
+        project_list_factory = ProjectListFactory()
+        for folder in Projects.root_folders():
+            projects.extend(
+                Project(project_path=str(project_folder))
+                for project_folder in project_list_factory.find_project_folders(folder)
+            )
+        trie = ProjectPathTrie.project_path_trie_factory(projects, root_folder)
+        changed_project_names = set()
+        for changed_file in self.changed_files(since):
+            project = trie.find(changed_file)
+            if project is not None:
+                changed_project_names.add(project.name)
+        affected_project_names = set(changed_project_names)
+        if any(
+            projects.index.get_by_name(name).project_type == ProjectType.Library
+            for name in changed_project_names
+        ):
+            affected_project_names |= projects.dependency_index.transitive_dependents(
+                changed_project_names
+            )
+        return sorted(
+            (project for project in projects if project.name in affected_project_names),
+            key=lambda project: project.project_path,
+        )
+
+    def changed_files(self, since: str) -> List[str]:
+        result = subprocess.run(
+            ["git", "diff", "--name-only", "-z", "--relative", f"{since}...HEAD"],
+            cwd=ConfigurationManager.get().monorepo_root_folder,
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            raise GitDiffException(since, os.fsdecode(result.stderr).strip())
+        return [path for path in os.fsdecode(result.stdout).split("\0") if path]
+
+
+class GitDiffException(Exception):
+    def __init__(self, since: str, reason: str):
+        super().__init__(f"Unable to list the files changed since {since}: {reason}")
@@ -0,0 +1,355 @@
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from monorepo_builder.build_graph import BuildGraphCycleException
+from monorepo_builder.configuration import (
+    ConfigurationManager,
+    Configuration,
+    RemoteCacheType,
+)
+from monorepo_builder.console import write_to_console
+from monorepo_builder.project_list import Projects
+from monorepo_builder.s3_transfer import S3ClientManager
+
+ARTIFACT_EXTENSION = ".tar"
+STATISTICS_FILENAME = "statistics.json"
+REMOTE_CACHE_TIMEOUT_SECONDS = 60
+REMOTE_CACHE_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ArtifactCacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    remote_hits: int = 0
+    uploaded: int = 0
+
+    def add(self, other: "ArtifactCacheStatistics"):
+        self.hits += other.hits
+        self.misses += other.misses
+        self.stored += other.stored
+        self.evicted += other.evicted
+        self.remote_hits += other.remote_hits
+        self.uploaded += other.uploaded
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class RemoteArtifactStore(ABC):
+    @abstractmethod
+    def download(self, key: str, filename: str) -> bool:
+        pass
+
+    @abstractmethod
+    def upload(self, key: str, filename: str):
+        pass
+
+
+class HttpArtifactStore(RemoteArtifactStore):
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    def download(self, key: str, filename: str) -> bool:
+        try:
+            with urllib.request.urlopen(
+                self._artifact_url(key), timeout=REMOTE_CACHE_TIMEOUT_SECONDS
+            ) as response, open(filename, "wb") as file:
+                shutil.copyfileobj(response, file, REMOTE_CACHE_CHUNK_SIZE)
+        except urllib.error.HTTPError as error:
+            if error.code == 404:
+                return False
+            raise RemoteCacheException(self._artifact_url(key), str(error))
+        except OSError as error:
+            raise RemoteCacheException(self._artifact_url(key), str(error))
+        return True
+
+    def upload(self, key: str, filename: str):
+        try:
+            with open(filename, "rb") as file:
+                request = urllib.request.Request(
+                    self._artifact_url(key),
+                    data=file,
+                    method="PUT",
+                    headers={
+                        "Content-Length": str(os.fstat(file.fileno()).st_size),
+                        "Content-Type": "application/x-tar",
+                    },
+                )
+                urllib.request.urlopen(
+                    request, timeout=REMOTE_CACHE_TIMEOUT_SECONDS
+                ).close()
+        except OSError as error:
+            raise RemoteCacheException(self._artifact_url(key), str(error))
+
+    def _artifact_url(self, key: str) -> str:
+        return f"{self.url}/{key}{ARTIFACT_EXTENSION}"
+
+
+class S3ArtifactStore(RemoteArtifactStore):
+    def __init__(self, bucket: str, prefix: str):
+        self.bucket = bucket
+        self.prefix = prefix
+        self._s3_client = None
+
+    def download(self, key: str, filename: str) -> bool:
+        try:
+            self._get_s3_client().download_file(
+                self.bucket, self._object_key(key), filename
+            )
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise RemoteCacheException(self._object_url(key), str(error))
+        except BotoCoreError as error:
+            raise RemoteCacheException(self._object_url(key), str(error))
+        return True
+
+    def upload(self, key: str, filename: str):
+        try:
+            self._get_s3_client().upload_file(
+                filename, self.bucket, self._object_key(key)
+            )
+        except (ClientError, BotoCoreError) as error:
+            raise RemoteCacheException(self._object_url(key), str(error))
+
+    def _get_s3_client(self):
+        if not self._s3_client:
+            self._s3_client = S3ClientManager.get()
+        return self._s3_client
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}{ARTIFACT_EXTENSION}"
+
+    def _object_url(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+
+class ArtifactCache:
+    def __init__(
+        self,
+        folder: str,
+        max_size: int,
+        remote: Optional[RemoteArtifactStore] = None,
+        upload: bool = True,
+    ):
+        self.folder = Path(folder)
+        self.max_size = max_size
+        self.remote = remote
+        self.upload = upload
+        self.statistics = ArtifactCacheStatistics()
+        self._lock = threading.Lock()
+
+    def restore(self, key: str, destination: str) -> bool:
+        artifact = self._artifact_path(key)
+        try:
+            # The access time is kept in the mtime so eviction does not depend on
+            # how the file system is mounted.
+            os.utime(artifact)
+        except FileNotFoundError:
+            if not self._download(key):
+                with self._lock:
+                    self.statistics.misses += 1
+                return False
+        if os.path.isdir(destination):
+            shutil.rmtree(destination)
+        os.makedirs(destination)
+        with tarfile.open(artifact) as archive:
+            if hasattr(tarfile, "data_filter"):
+                archive.extractall(destination, filter="data")
+            else:
+                archive.extractall(destination)
+        with self._lock:
+            self.statistics.hits += 1
+        return True
+
+    def store(self, key: str, source: str):
+        if not os.path.isdir(source):
+            return
+        self.folder.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temporary_name = tempfile.mkstemp(
+            dir=self.folder, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                with tarfile.open(fileobj=file, mode="w") as archive:
+                    for name in sorted(os.listdir(source)):
+                        archive.add(os.path.join(source, name), arcname=name)
+            os.replace(temporary_name, self._artifact_path(key))
+        except BaseException:
+            os.unlink(temporary_name)
+            raise
+        self._upload(key)
+        with self._lock:
+            self.statistics.stored += 1
+            self._evict()
+
+    def size(self) -> int:
+        return sum(artifact.stat().st_size for artifact in self._artifacts())
+
+    def artifact_count(self) -> int:
+        return len(self._artifacts())
+
+    def clear(self):
+        for artifact in self._artifacts():
+            artifact.unlink()
+
+    def load_statistics(self) -> ArtifactCacheStatistics:
+        file = self.folder / STATISTICS_FILENAME
+        if not file.exists():
+            return ArtifactCacheStatistics()
+        with open(file, "r") as statistics_file:
+            return ArtifactCacheStatistics(**json.load(statistics_file))
+
+    def save_statistics(self):
+        if not self.folder.exists():
+            return
+        statistics = self.load_statistics()
+        statistics.add(self.statistics)
+        with open(self.folder / STATISTICS_FILENAME, "w") as statistics_file:
+            json.dump(statistics.__dict__, statistics_file)
+
+    def _download(self, key: str) -> bool:
+        if self.remote is None:
+            return False
+        self.folder.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temporary_name = tempfile.mkstemp(
+            dir=self.folder, suffix=".tmp"
+        )
+        os.close(file_descriptor)
+        try:
+            found = self.remote.download(key, temporary_name)
+        except RemoteCacheException as exception:
+            # A cache that cannot be reached only costs the time of a build.
+            write_to_console(str(exception), color="yellow")
+            found = False
+        if not found:
+            os.unlink(temporary_name)
+            return False
+        os.replace(temporary_name, self._artifact_path(key))
+        with self._lock:
+            self.statistics.remote_hits += 1
+            self._evict()
+        return True
+
+    def _upload(self, key: str):
+        if self.remote is None or not self.upload:
+            return
+        try:
+            self.remote.upload(key, str(self._artifact_path(key)))
+        except RemoteCacheException as exception:
+            write_to_console(str(exception), color="yellow")
+            return
+        with self._lock:
+            self.statistics.uploaded += 1
+
+    def _evict(self):
+        artifacts = []
+        total_size = 0
+        for artifact in self._artifacts():
+            try:
+                stat_result = artifact.stat()
+            except FileNotFoundError:
+                continue
+            artifacts.append((stat_result.st_mtime_ns, stat_result.st_size, artifact))
+            total_size += stat_result.st_size
+        for _, size, artifact in sorted(artifacts):
+            if total_size <= self.max_size:
+                break
+            artifact.unlink()
+            total_size -= size
+            self.statistics.evicted += 1
+
+    def _artifacts(self) -> List[Path]:
+        if not self.folder.exists():
+            return []
+        return list(self.folder.glob(f"*{ARTIFACT_EXTENSION}"))
+
+    def _artifact_path(self, key: str) -> Path:
+        return self.folder / f"{key}{ARTIFACT_EXTENSION}"
+
+
+class ArtifactCacheManager:
+    artifact_cache: Optional[ArtifactCache] = None
+
+    @classmethod
+    def get(cls) -> Optional[ArtifactCache]:
+        configuration = ConfigurationManager.get()
+        if not configuration.artifact_cache_folder:
+            return None
+        if not cls.artifact_cache:
+            cls.artifact_cache = ArtifactCache(
+                configuration.artifact_cache_folder,
+                configuration.artifact_cache_max_size_mb * 1024 * 1024,
+                cls._remote_artifact_store(configuration),
+                configuration.remote_cache_upload,
+            )
+        return cls.artifact_cache
+
+    @staticmethod
+    def _remote_artifact_store(
+        configuration: Configuration,
+    ) -> Optional[RemoteArtifactStore]:
+        if configuration.remote_cache_type == RemoteCacheType.http:
+            return HttpArtifactStore(configuration.remote_cache_url)
+        if configuration.remote_cache_type == RemoteCacheType.s3:
+            return S3ArtifactStore(
+                configuration.remote_cache_s3_bucket
+                or configuration.installer_s3_bucket,
+                configuration.remote_cache_s3_prefix,
+            )
+        return None
+
+    @classmethod
+    def save(cls):
+        if cls.artifact_cache:
+            cls.artifact_cache.save_statistics()
+
+
+def artifact_keys(projects: Projects) -> Dict[str, str]:
+    # A project's key covers its own files and the keys of the libraries it uses, so
+    # any change further down the dependency chain gives it a new key.
+    dependency_index = projects.dependency_index
+    keys: Dict[str, str] = {}
+
+    def key_for(name: str, visiting: Set[str]) -> str:
+        if name in keys:
+            return keys[name]
+        if name in visiting:
+            raise BuildGraphCycleException(sorted(visiting))
+        visiting.add(name)
+        project = projects.index.get_by_name(name)
+        digest = hashlib.sha1()
+        digest.update(name.encode() + b"\0" + project.file_list.digest)
+        for dependency_name in sorted(dependency_index.dependencies_of(name)):
+            if projects.index.get_by_name(dependency_name) is not None:
+                digest.update(key_for(dependency_name, visiting).encode())
+        visiting.discard(name)
+        keys[name] = digest.hexdigest()
+        return keys[name]
+
+    for project in projects:
+        key_for(project.name, set())
+    return keys
+
+
+class RemoteCacheException(Exception):
+    def __init__(self, location: str, reason: str):
+        super().__init__(f"Unable to use the remote cache at {location}: {reason}")
@@ -1,20 +1,31 @@
 import os
-import shutil
-import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import List, Optional
-
-import boto3
+from typing import List, Optional, Dict, Iterable, Set, Tuple
 
+from monorepo_builder.artifact_cache import ArtifactCacheManager
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.build_logs import BuildLogManager, ProjectLog
 from monorepo_builder.configuration import (
     ConfigurationManager,
+    FailureMode,
     InstallerLocationType,
-    Configuration,
 )
 from monorepo_builder.console import write_to_console
+from monorepo_builder.dependencies import normalize_package_name, parse_installer_name
 from monorepo_builder.project_list import Projects
+from monorepo_builder.provisioning import (
+    FolderProvisioner,
+    prune_provisioned,
+    publish_file,
+)
+from monorepo_builder.s3_transfer import S3ClientManager
+from monorepo_builder.tracing import TraceManager
+from monorepo_builder.version import ProjectVersions
 from monorepo_builder.projects import Project, ProjectType
 
 
@@ -23,6 +34,8 @@ class BuildRequestStatus(Enum):
     Running = 2
     Complete = 3
     NotNeeded = 4
+    Skipped = 5
+    Cancelled = 6
 
 
 @dataclass
@@ -32,6 +45,15 @@ class ProjectBuildRequest:
         default=BuildRequestStatus.NotStarted, init=False
     )
     run_successful: Optional[bool] = field(default=None, init=False)
+    artifact_key: Optional[str] = field(default=None, init=False)
+    library_versions: Optional[Dict[str, Optional[str]]] = field(
+        default=None, init=False
+    )
+    started_at: Optional[float] = field(default=None, init=False)
+    ended_at: Optional[float] = field(default=None, init=False)
+    exit_code: Optional[int] = field(default=None, init=False)
+    cache_hit: bool = field(default=False, init=False)
+    estimated_duration: Optional[float] = field(default=None, init=False)
 
 
 class ProjectBuildRequests(list, List[ProjectBuildRequest]):
@@ -60,6 +82,12 @@ class ProjectBuildRequests(list, List[ProjectBuildRequest]):
         )
         return build_requests
 
+    @staticmethod
+    def all_projects(projects: Projects) -> "ProjectBuildRequests":
+        build_requests = ProjectBuildRequests.library_projects(projects)
+        build_requests.extend(ProjectBuildRequests.standard_projects(projects))
+        return build_requests
+
     @property
     def success(self) -> bool:
         return len(self) == 0 or all([request.run_successful for request in self])
@@ -67,21 +95,199 @@ class ProjectBuildRequests(list, List[ProjectBuildRequest]):
     @property
     def failed(self) -> "ProjectBuildRequests":
         return ProjectBuildRequests(
-            [request for request in self if request.run_successful is False]
+            [
+                request
+                for request in self
+                if request.run_successful is False
+                and request.build_status != BuildRequestStatus.Cancelled
+            ]
+        )
+
+    @property
+    def cancelled(self) -> "ProjectBuildRequests":
+        return ProjectBuildRequests(
+            [
+                request
+                for request in self
+                if request.build_status == BuildRequestStatus.Cancelled
+            ]
+        )
+
+    @property
+    def skipped(self) -> "ProjectBuildRequests":
+        return ProjectBuildRequests(
+            [
+                request
+                for request in self
+                if request.build_status == BuildRequestStatus.Skipped
+            ]
         )
 
 
 class BuildExecutor:
+    def __init__(self):
+        self.stop_reason: Optional[str] = None
+        self.cancel_reason: Optional[str] = None
+        self._project_logs: Dict[str, ProjectLog] = {}
+        self._lock = threading.Lock()
+
     def execute_builds(
-        self, project_build_requests: ProjectBuildRequests
+        self,
+        project_build_requests: ProjectBuildRequests,
+        build_graph: BuildGraph,
     ) -> ProjectBuildRequests:
-        for project_build_request in project_build_requests:
+        BuildLogManager.start()
+        try:
+            return self._schedule_builds(project_build_requests, build_graph)
+        finally:
+            BuildLogManager.stop()
+
+    def _schedule_builds(
+        self,
+        project_build_requests: ProjectBuildRequests,
+        build_graph: BuildGraph,
+    ) -> ProjectBuildRequests:
+        configuration = ConfigurationManager.get()
+        max_workers = max(1, configuration.build_jobs)
+        run_timeout = configuration.run_timeout_seconds
+        deadline = time.monotonic() + run_timeout if run_timeout else None
+        requests_by_name = {
+            request.project.name: request for request in project_build_requests
+        }
+        # Ready projects start in order of their critical path, so long library
+        # chains begin first and small leaf projects fill the free slots.
+        priorities = build_graph.critical_path_lengths(
+            {
+                request.project.name: request.estimated_duration or 0.0
+                for request in project_build_requests
+            }
+        )
+        waiting = sorted(
+            project_build_requests,
+            key=lambda request: -priorities.get(request.project.name, 0.0),
+        )
+        running: Dict[Future, ProjectBuildRequest] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while waiting or running:
+                if self._timed_out(deadline):
+                    self.stop(f"the run timed out after {run_timeout}s", True)
+                if self.stop_reason is not None:
+                    for request in waiting:
+                        self.skip_build(request, self.stop_reason)
+                    waiting.clear()
+                skipped_any = False
+                for request in list(waiting):
+                    dependencies = [
+                        requests_by_name[name]
+                        for name in build_graph.dependencies_for(request.project.name)
+                        if name in requests_by_name
+                    ]
+                    if any(
+                        self._did_not_succeed(dependency) for dependency in dependencies
+                    ):
+                        waiting.remove(request)
+                        self.skip_build(request)
+                        skipped_any = True
+                    elif len(running) < max_workers and all(
+                        dependency.run_successful for dependency in dependencies
+                    ):
+                        waiting.remove(request)
+                        request.build_status = BuildRequestStatus.Running
+                        running[pool.submit(self.build_and_publish, request)] = request
+                if not running:
+                    if skipped_any:
+                        continue
+                    break
+                try:
+                    done, _ = wait(
+                        running,
+                        timeout=self._time_left(deadline),
+                        return_when=FIRST_COMPLETED,
+                    )
+                except KeyboardInterrupt:
+                    # Builds run in their own process group, so the interrupt does
+                    # not reach them.
+                    self.stop("the run was interrupted", True)
+                    raise
+                for future in done:
+                    request = running.pop(future)
+                    future.result()
+                    if request.run_successful is False:
+                        self._handle_failure(request, configuration.failure_mode)
+        return project_build_requests
+
+    def _timed_out(self, deadline: Optional[float]) -> bool:
+        return (
+            deadline is not None
+            and self.stop_reason is None
+            and time.monotonic() >= deadline
+        )
+
+    def _time_left(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None or self.stop_reason is not None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def _handle_failure(
+        self, project_build_request: ProjectBuildRequest, failure_mode: FailureMode
+    ):
+        if failure_mode == FailureMode.keep_going or self.stop_reason is not None:
+            return
+        self.stop(
+            f"{project_build_request.project.name} failed",
+            failure_mode == FailureMode.cancel,
+        )
+
+    def stop(self, reason: str, cancel_running: bool):
+        # Nothing new starts after a stop, and cancelling also ends the builds that
+        # are running.
+        self.stop_reason = reason
+        if not cancel_running:
+            return
+        with self._lock:
+            self.cancel_reason = reason
+            project_logs = list(self._project_logs.values())
+        for project_log in project_logs:
+            project_log.terminate(reason)
+
+    def _did_not_succeed(self, project_build_request: ProjectBuildRequest) -> bool:
+        return (
+            project_build_request.build_status == BuildRequestStatus.Skipped
+            or project_build_request.run_successful is False
+        )
+
+    def build_and_publish(self, project_build_request: ProjectBuildRequest):
+        project_build_request.started_at = time.time()
+        with TraceManager.span("build", track=project_build_request.project.name):
             self.run_build(project_build_request)
-            if project_build_request.project.project_type == ProjectType.Library:
+        if (
+            project_build_request.project.project_type == ProjectType.Library
+            and project_build_request.run_successful
+        ):
+            with TraceManager.span(
+                "publish installers", track=project_build_request.project.name
+            ):
                 InstallerManager().copy_installer_to_shared_folder(
                     project_build_request
                 )
-        return project_build_requests
+        project_build_request.ended_at = time.time()
+
+    def skip_build(
+        self,
+        project_build_request: ProjectBuildRequest,
+        reason: str = "a library it uses failed",
+    ):
+        project_build_request.build_status = BuildRequestStatus.Skipped
+        write_to_console(
+            f"{project_build_request.project.name} Skipped, {reason}", color="red"
+        )
+
+    def cancel_build(self, project_build_request: ProjectBuildRequest, reason: str):
+        project_build_request.build_status = BuildRequestStatus.Cancelled
+        project_build_request.run_successful = False
+        write_to_console(
+            f"{project_build_request.project.name} Cancelled, {reason}", color="red"
+        )
 
     def run_build(self, project_build_request: ProjectBuildRequest):
         write_to_console(
@@ -92,48 +298,219 @@ class BuildExecutor:
             write_to_console("Build not needed")
             return
 
-        InstallerManager().copy_installers_to_project(project_build_request.project)
-        result = subprocess.run(
-            ["./build.sh"], cwd=project_build_request.project.project_path
+        track = project_build_request.project.name
+        with TraceManager.span("restore artifact", track=track):
+            restored = self.restore_artifact(project_build_request)
+        if restored:
+            return
+
+        with TraceManager.span("copy installers", track=track):
+            InstallerManager().copy_installers_to_project(
+                project_build_request.project, project_build_request.library_versions
+            )
+        project_log = self._start_project_log(project_build_request)
+        if project_log is None:
+            self.cancel_build(project_build_request, self.cancel_reason)
+            return
+        try:
+            with TraceManager.span("build.sh", track=track):
+                return_code = project_log.run(
+                    ["./build.sh"],
+                    project_build_request.project.project_path,
+                    self._build_timeout(project_build_request.project),
+                )
+        finally:
+            with self._lock:
+                del self._project_logs[project_build_request.project.name]
+        project_build_request.exit_code = return_code
+        if (
+            return_code != 0
+            and project_log.termination_reason is not None
+            and not project_log.timed_out
+        ):
+            self.cancel_build(project_build_request, project_log.termination_reason)
+            return
+        project_build_request.build_status = BuildRequestStatus.Complete
+        project_build_request.run_successful = return_code == 0
+        if project_build_request.run_successful:
+            with TraceManager.span("store artifact", track=track):
+                self.store_artifact(project_build_request)
+        else:
+            self.report_failure(project_build_request, project_log)
+
+    def _start_project_log(
+        self, project_build_request: ProjectBuildRequest
+    ) -> Optional[ProjectLog]:
+        with self._lock:
+            if self.cancel_reason is not None:
+                return None
+            project_log = BuildLogManager.project_log_factory(
+                project_build_request.project.name
+            )
+            self._project_logs[project_build_request.project.name] = project_log
+            return project_log
+
+    def _build_timeout(self, project: Project) -> Optional[float]:
+        configuration = ConfigurationManager.get()
+        timeout = configuration.project_build_timeouts.get(
+            project.name, configuration.build_timeout_seconds
         )
+        return timeout or None
+
+    def report_failure(
+        self, project_build_request: ProjectBuildRequest, project_log: ProjectLog
+    ):
+        tail = project_log.tail()
+        failure = f"failed with exit code {project_build_request.exit_code}"
+        if project_log.termination_reason is not None:
+            failure = project_log.termination_reason
+        write_to_console(
+            f"{project_build_request.project.name} {failure}, last {len(tail)} of"
+            f" {project_log.line_count} lines of {project_log.filename}:",
+            color="red",
+            bold=True,
+        )
+        for line in tail:
+            write_to_console(f"  {line}")
+
+    def restore_artifact(self, project_build_request: ProjectBuildRequest) -> bool:
+        artifact_cache = ArtifactCacheManager.get()
+        if artifact_cache is None or project_build_request.artifact_key is None:
+            return False
+        if not artifact_cache.restore(
+            project_build_request.artifact_key,
+            self._dist_folder(project_build_request.project),
+        ):
+            return False
         project_build_request.build_status = BuildRequestStatus.Complete
-        project_build_request.run_successful = result.returncode == 0
+        project_build_request.run_successful = True
+        project_build_request.cache_hit = True
+        write_to_console(
+            f"{project_build_request.project.name} Restored from the artifact cache"
+        )
+        return True
 
+    def store_artifact(self, project_build_request: ProjectBuildRequest):
+        artifact_cache = ArtifactCacheManager.get()
+        if artifact_cache is None or project_build_request.artifact_key is None:
+            return
+        artifact_cache.store(
+            project_build_request.artifact_key,
+            self._dist_folder(project_build_request.project),
+        )
 
-class InstallerManager:
-    def __init__(self):
-        self._s3_bucket = None
+    def _dist_folder(self, project: Project) -> str:
+        return os.path.join(
+            project.project_path,
+            ConfigurationManager.get().project_distributable_folder,
+        )
 
+
+class InstallerManager:
     def copy_installer_to_shared_folder(
         self, project_build_request: ProjectBuildRequest
     ):
         configuration = ConfigurationManager.get()
         dist_folder = f"{project_build_request.project.project_path}/{configuration.project_distributable_folder}"
-        for installer in Path(dist_folder).iterdir():
-            if configuration.installer_location_type == InstallerLocationType.folder:
-                shutil.copy(str(installer), configuration.installer_folder)
-            if configuration.installer_location_type == InstallerLocationType.s3:
-                self._get_s3_bucket(configuration).upload_file(
-                    str(installer), installer.name
-                )
-
-    def _get_s3_bucket(self, configuration: Configuration):
-        if not self._s3_bucket:
-            self._s3_bucket = boto3.client("s3").Bucket(
-                configuration.installer_s3_bucket
+        installers = list(Path(dist_folder).iterdir())
+        if configuration.installer_location_type == InstallerLocationType.folder:
+            for installer in installers:
+                publish_file(str(installer), configuration.installer_folder)
+        if configuration.installer_location_type == InstallerLocationType.s3:
+            S3ClientManager.get_installer_store().upload(
+                str(installer) for installer in installers
             )
-        return self._s3_bucket
 
-    def copy_installers_to_project(self, project: Project):
+    def copy_installers_to_project(
+        self,
+        project: Project,
+        library_versions: Optional[Dict[str, Optional[str]]] = None,
+    ):
         configuration = ConfigurationManager.get()
         project_installer_folder = os.path.join(
             project.project_path, configuration.installer_folder
         )
         if configuration.installer_location_type == InstallerLocationType.folder:
-            shutil.copytree(configuration.installer_folder, project_installer_folder)
+            names = None
+            if library_versions is not None:
+                names = self.select_installers(
+                    os.listdir(configuration.installer_folder), library_versions
+                )
+            folder_provisioner = FolderProvisioner(configuration.installer_provisioning)
+            folder_provisioner.provision(
+                configuration.installer_folder, project_installer_folder, names
+            )
+            TraceManager.count(
+                "installers",
+                files_placed=folder_provisioner.files_placed,
+                bytes_copied=folder_provisioner.bytes_copied,
+            )
         if configuration.installer_location_type == InstallerLocationType.s3:
-            bucket = self._get_s3_bucket(configuration)
-            for file in bucket.objects:
-                bucket.download_file(
-                    file.key, os.path.join(project_installer_folder, file.key)
+            installer_store = S3ClientManager.get_installer_store()
+            # Keys with a folder in them belong to other users of the bucket, such as
+            # the remote build cache.
+            keys = [key for key in installer_store.objects() if "/" not in key]
+            if library_versions is not None:
+                keys = self.select_installers(keys, library_versions)
+            installer_store.download(keys, project_installer_folder)
+            prune_provisioned(project_installer_folder, set(keys))
+
+    def select_installers(
+        self,
+        installer_names: Iterable[str],
+        library_versions: Dict[str, Optional[str]],
+    ) -> List[str]:
+        library_names = {
+            normalize_package_name(name): name for name in library_versions
+        }
+        packages: Dict[str, Tuple[str, str]] = {}
+        for installer_name in installer_names:
+            package = parse_installer_name(installer_name)
+            if package is not None:
+                packages[installer_name] = package
+        exact_names = {
+            package_name
+            for package_name, _ in packages.values()
+            if package_name in library_names
+        }
+        candidates: Dict[str, List[str]] = {}
+        for installer_name, (package_name, _) in packages.items():
+            if package_name not in library_names:
+                package_name = self._unscoped_package_name(
+                    package_name, set(library_names) - exact_names
                 )
+            if package_name is not None:
+                candidates.setdefault(package_name, []).append(installer_name)
+        for package_name in sorted(set(library_names) - set(candidates)):
+            write_to_console(
+                f"No installer found for library {library_names[package_name]}",
+                color="yellow",
+            )
+        # build.sh decides the version an installer is built with, so when none of a
+        # library's installers carries the expected version they are all provided.
+        selected: List[str] = []
+        for package_name, names in candidates.items():
+            version = library_versions[library_names[package_name]]
+            matching = [name for name in names if packages[name][1] == version]
+            selected.extend(matching or names)
+        return sorted(selected)
+
+    def _unscoped_package_name(
+        self, package_name: str, library_names: Set[str]
+    ) -> Optional[str]:
+        # npm pack names the tarball of "@scope/name" "scope-name-<version>.tgz".
+        scoped_names = [
+            library_name
+            for library_name in library_names
+            if package_name.endswith(f"-{library_name}")
+        ]
+        return max(scoped_names, key=len, default=None)
+
+
+def library_versions_for(
+    projects: Projects, project: Project, project_versions: ProjectVersions
+) -> Dict[str, Optional[str]]:
+    return {
+        name: project_versions.get_version(projects.index.get_by_name(name))
+        for name in projects.dependency_index.transitive_dependencies({project.name})
+    }
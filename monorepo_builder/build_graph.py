@@ -0,0 +1,86 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, TYPE_CHECKING
+
+from monorepo_builder.dependencies import DependencyIndex
+
+if TYPE_CHECKING:
+    from monorepo_builder.build_executor import ProjectBuildRequests
+
+
+@dataclass
+class BuildGraph:
+    dependencies: Dict[str, Set[str]] = field(default_factory=dict)
+
+    @staticmethod
+    def build_graph_factory(
+        project_build_requests: "ProjectBuildRequests",
+        dependency_index: DependencyIndex,
+    ) -> "BuildGraph":
+        requested_names = {request.project.name for request in project_build_requests}
+        build_graph = BuildGraph()
+        for name in requested_names:
+            build_graph.dependencies[name] = (
+                dependency_index.dependencies_of(name) & requested_names
+            )
+        build_graph.verify_no_cycles()
+        return build_graph
+
+    def dependencies_for(self, name: str) -> Set[str]:
+        return self.dependencies.get(name, set())
+
+    def dependents_of(self, name: str) -> Set[str]:
+        return {
+            dependent
+            for dependent, dependencies in self.dependencies.items()
+            if name in dependencies
+        }
+
+    def dependents_by_name(self) -> Dict[str, Set[str]]:
+        dependents: Dict[str, Set[str]] = {name: set() for name in self.dependencies}
+        for name, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                if dependency in dependents:
+                    dependents[dependency].add(name)
+        return dependents
+
+    def critical_path_lengths(self, durations: Dict[str, float]) -> Dict[str, float]:
+        # The longest chain of builds that can only start after a project finishes,
+        # including the project itself.
+        dependents = self.dependents_by_name()
+        remaining = {name: len(names) for name, names in dependents.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        lengths: Dict[str, float] = {}
+        while ready:
+            name = ready.pop()
+            lengths[name] = durations.get(name, 0.0) + max(
+                (lengths[dependent] for dependent in dependents[name]), default=0.0
+            )
+            for dependency in self.dependencies[name]:
+                if dependency in remaining:
+                    remaining[dependency] -= 1
+                    if remaining[dependency] == 0:
+                        ready.append(dependency)
+        return lengths
+
+    def verify_no_cycles(self):
+        remaining = {
+            name: set(dependencies) & self.dependencies.keys()
+            for name, dependencies in self.dependencies.items()
+        }
+        while remaining:
+            ready = [
+                name for name, dependencies in remaining.items() if not dependencies
+            ]
+            if not ready:
+                raise BuildGraphCycleException(sorted(remaining.keys()))
+            for name in ready:
+                del remaining[name]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+
+class BuildGraphCycleException(Exception):
+    def __init__(self, project_names: List[str]):
+        super().__init__(
+            f"Circular library references between {', '.join(project_names)}"
+        )
@@ -0,0 +1,222 @@
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import IO, List, Optional
+
+from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.console import write_to_console
+
+MAX_LINE_LENGTH = 64 * 1024
+TERMINATE_GRACE_SECONDS = 5.0
+OUTPUT_GRACE_SECONDS = 1.0
+LIVE_OUTPUT_QUEUE_SIZE = 10000
+
+
+class LineRateLimiter:
+    def __init__(self, lines_per_second: float):
+        self.lines_per_second = lines_per_second
+        self.tokens = lines_per_second
+        self.updated_at = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(
+            self.lines_per_second,
+            self.tokens + (now - self.updated_at) * self.lines_per_second,
+        )
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LiveOutput:
+    # The builds only queue their lines, and one thread writes them to the console,
+    # so a slow console never holds up a build.
+    def __init__(self):
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue(LIVE_OUTPUT_QUEUE_SIZE)
+        self.lines_dropped = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._write_lines, daemon=True)
+        self._thread.start()
+
+    def post(self, line: str) -> bool:
+        try:
+            self.lines.put_nowait(line)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.lines_dropped += 1
+            return False
+
+    def close(self):
+        self.lines.put(None)
+        self._thread.join()
+        if self.lines_dropped:
+            write_to_console(
+                f"{self.lines_dropped} lines of build output were not shown,"
+                " the console could not keep up",
+                color="yellow",
+            )
+
+    def _write_lines(self):
+        for line in iter(self.lines.get, None):
+            write_to_console(line)
+
+
+class ProjectLog:
+    def __init__(
+        self,
+        project_name: str,
+        filename: str,
+        tail_lines: int,
+        live_output: Optional[LiveOutput] = None,
+        lines_per_second: float = 0,
+    ):
+        self.project_name = project_name
+        self.filename = filename
+        self.live_output = live_output
+        self.rate_limiter = LineRateLimiter(lines_per_second)
+        self.tail_lines: "deque[str]" = deque(maxlen=tail_lines)
+        self.line_count = 0
+        self.lines_not_shown = 0
+        self.termination_reason: Optional[str] = None
+        self.timed_out = False
+        self._process: Optional[subprocess.Popen] = None
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def run(
+        self, arguments: List[str], cwd: str, timeout: Optional[float] = None
+    ) -> int:
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        with open(self.filename, "wb") as log_file:
+            # The build gets its own process group, so everything it starts can be
+            # stopped with it.
+            process = subprocess.Popen(
+                arguments,
+                cwd=cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+            with self._lock:
+                self._process = process
+                terminated = self.termination_reason is not None
+            if terminated:
+                self._stop_process()
+            timer = None
+            if timeout:
+                timer = threading.Timer(timeout, self._time_out, (timeout,))
+                timer.daemon = True
+                timer.start()
+            reader = threading.Thread(
+                target=self._read_output, args=(process.stdout, log_file), daemon=True
+            )
+            reader.start()
+            try:
+                return_code = process.wait()
+                # Processes build.sh left in the background keep the output open, so
+                # they are stopped once its output has had a moment to drain.
+                reader.join(OUTPUT_GRACE_SECONDS)
+                if reader.is_alive():
+                    write_to_console(
+                        f"{self.project_name} build.sh left processes running,"
+                        " stopping them",
+                        color="yellow",
+                    )
+                    self._stop_process()
+                    reader.join()
+                process.stdout.close()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                with self._lock:
+                    self._finished = True
+        if self.lines_not_shown and self.live_output is not None:
+            self.live_output.post(
+                f"[{self.project_name}] {self.lines_not_shown} more lines"
+                f" in {self.filename}"
+            )
+        return return_code
+
+    def _read_output(self, output: IO[bytes], log_file: IO[bytes]):
+        for line in iter(lambda: output.readline(MAX_LINE_LENGTH), b""):
+            log_file.write(line)
+            self.add_line(line.decode("utf-8", "replace").rstrip("\r\n"))
+
+    def terminate(self, reason: str):
+        with self._lock:
+            if self._finished or self.termination_reason is not None:
+                return
+            self.termination_reason = reason
+            if self._process is None:
+                # run() stops the build as soon as it has started.
+                return
+        self._stop_process()
+
+    def _time_out(self, timeout: float):
+        self.timed_out = True
+        self.terminate(f"timed out after {timeout:g}s")
+
+    def _stop_process(self):
+        self._signal(signal.SIGTERM)
+        kill_timer = threading.Timer(
+            TERMINATE_GRACE_SECONDS, self._signal, (signal.SIGKILL,)
+        )
+        kill_timer.daemon = True
+        kill_timer.start()
+
+    def _signal(self, signal_number: int):
+        with self._lock:
+            if self._finished:
+                return
+            try:
+                os.killpg(self._process.pid, signal_number)
+            except ProcessLookupError:
+                pass
+
+    def add_line(self, line: str):
+        self.line_count += 1
+        self.tail_lines.append(line)
+        if self.live_output is None:
+            return
+        if self.rate_limiter.allow():
+            self.live_output.post(f"[{self.project_name}] {line}")
+        else:
+            self.lines_not_shown += 1
+
+    def tail(self) -> List[str]:
+        return list(self.tail_lines)
+
+
+class BuildLogManager:
+    live_output: Optional[LiveOutput] = None
+
+    @classmethod
+    def start(cls):
+        if ConfigurationManager.get().live_output_lines_per_second > 0:
+            cls.live_output = LiveOutput()
+
+    @classmethod
+    def stop(cls):
+        if cls.live_output is not None:
+            cls.live_output.close()
+            cls.live_output = None
+
+    @classmethod
+    def project_log_factory(cls, project_name: str) -> ProjectLog:
+        configuration = ConfigurationManager.get()
+        return ProjectLog(
+            project_name,
+            os.path.join(configuration.build_log_folder, f"{project_name}.log"),
+            configuration.build_log_tail_lines,
+            cls.live_output,
+            configuration.live_output_lines_per_second,
+        )
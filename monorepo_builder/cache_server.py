@@ -0,0 +1,77 @@
+import os
+import re
+import shutil
+import tempfile
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARTIFACT_PATH_PATTERN = re.compile(r"^/([0-9a-f]{40}\.tar)$")
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class CacheRequestHandler(BaseHTTPRequestHandler):
+    def __init__(self, *args, folder: str, **kwargs):
+        self.folder = folder
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        filename = self._artifact_filename()
+        if filename is None:
+            return
+        try:
+            file = open(filename, "rb")
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        with file:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-tar")
+            self.send_header("Content-Length", str(os.fstat(file.fileno()).st_size))
+            self.end_headers()
+            shutil.copyfileobj(file, self.wfile, COPY_CHUNK_SIZE)
+
+    def do_PUT(self):
+        filename = self._artifact_filename()
+        if filename is None:
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        file_descriptor, temporary_name = tempfile.mkstemp(
+            dir=self.folder, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                while length > 0:
+                    chunk = self.rfile.read(min(length, COPY_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    file.write(chunk)
+                    length -= len(chunk)
+            if length > 0:
+                os.unlink(temporary_name)
+                self.send_error(400, "Incomplete upload")
+                return
+            os.replace(temporary_name, filename)
+        except BaseException:
+            if os.path.exists(temporary_name):
+                os.unlink(temporary_name)
+            raise
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _artifact_filename(self):
+        match = ARTIFACT_PATH_PATTERN.match(self.path)
+        if match is None:
+            self.send_error(404)
+            return None
+        return os.path.join(self.folder, match.group(1))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def cache_server_factory(folder: str, host: str, port: int) -> ThreadingHTTPServer:
+    os.makedirs(folder, exist_ok=True)
+    return ThreadingHTTPServer(
+        (host, port), partial(CacheRequestHandler, folder=folder)
+    )
@@ -1,5 +1,6 @@
 import dataclasses
 import json
+import os
 from dataclasses import dataclass, field, Field
 from enum import Enum
 from pathlib import Path
@@ -39,11 +40,40 @@ def get_current_folder():
     return str(Path.cwd())
 
 
+def get_default_scan_workers():
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
 class InstallerLocationType(Enum):
     folder = 1
     s3 = 2
 
 
+class ProvisioningMode(Enum):
+    copy = 1
+    hardlink = 2
+    reflink = 3
+    symlink = 4
+
+
+class RemoteCacheType(Enum):
+    none = 1
+    http = 2
+    s3 = 3
+
+
+class FailureMode(Enum):
+    keep_going = 1
+    finish_running = 2
+    cancel = 3
+
+
+class ChangeDetectionMode(Enum):
+    modified_time = 1
+    content = 2
+    git = 3
+
+
 @dataclass
 class Configuration:
     monorepo_root_folder: str = field(
@@ -83,12 +113,88 @@ class Configuration:
     installer_s3_bucket: str = field(
         default="", metadata={"config": "installerS3Bucket"}
     )
+    s3_transfer_workers: int = field(
+        default=8, metadata={"config": "s3TransferWorkers"}
+    )
+    installer_provisioning: ProvisioningMode = field(
+        default=ProvisioningMode.copy, metadata={"config": "installerProvisioning"}
+    )
     project_distributable_folder: str = field(
         default="dist", metadata={"config": "projectDistributableFolder"}
     )
     version_list_filename: str = field(
         default=".versionlist", metadata={"config": "versionListFilename"}
     )
+    state_store_filename: str = field(
+        default=".monorepo-state.db", metadata={"config": "stateStoreFilename"}
+    )
+    build_jobs: int = field(default=1, metadata={"config": "buildJobs"})
+    shard: str = field(default="", metadata={"config": "shard"})
+    build_log_folder: str = field(
+        default=".build-logs", metadata={"config": "buildLogFolder"}
+    )
+    build_log_tail_lines: int = field(
+        default=50, metadata={"config": "buildLogTailLines"}
+    )
+    live_output_lines_per_second: int = field(
+        default=20, metadata={"config": "liveOutputLinesPerSecond"}
+    )
+    failure_mode: FailureMode = field(
+        default=FailureMode.keep_going, metadata={"config": "failureMode"}
+    )
+    build_timeout_seconds: int = field(
+        default=0, metadata={"config": "buildTimeoutSeconds"}
+    )
+    project_build_timeouts: Dict[str, int] = field(
+        default_factory=dict, metadata={"config": "projectBuildTimeouts"}
+    )
+    run_timeout_seconds: int = field(
+        default=0, metadata={"config": "runTimeoutSeconds"}
+    )
+    scan_workers: int = field(
+        default_factory=get_default_scan_workers, metadata={"config": "scanWorkers"}
+    )
+    change_detection_mode: ChangeDetectionMode = field(
+        default=ChangeDetectionMode.modified_time,
+        metadata={"config": "changeDetection"},
+    )
+    hash_cache_filename: str = field(
+        default=".hashcache", metadata={"config": "hashCacheFilename"}
+    )
+    incremental_scan: bool = field(
+        default=False, metadata={"config": "incrementalScan"}
+    )
+    folder_cache_filename: str = field(
+        default=".foldercache", metadata={"config": "folderCacheFilename"}
+    )
+    trace_filename: str = field(default="", metadata={"config": "traceFilename"})
+    history_filename: str = field(
+        default=".monorepo-history.db", metadata={"config": "historyFilename"}
+    )
+    history_max_runs: int = field(default=1000, metadata={"config": "historyMaxRuns"})
+    history_window: int = field(default=50, metadata={"config": "historyWindow"})
+    daemon_socket_filename: str = field(
+        default=".monorepo-daemon.sock", metadata={"config": "daemonSocketFilename"}
+    )
+    artifact_cache_folder: str = field(
+        default="", metadata={"config": "artifactCacheFolder"}
+    )
+    artifact_cache_max_size_mb: int = field(
+        default=1024, metadata={"config": "artifactCacheMaxSizeMb"}
+    )
+    remote_cache_type: RemoteCacheType = field(
+        default=RemoteCacheType.none, metadata={"config": "remoteCacheType"}
+    )
+    remote_cache_url: str = field(default="", metadata={"config": "remoteCacheUrl"})
+    remote_cache_s3_bucket: str = field(
+        default="", metadata={"config": "remoteCacheS3Bucket"}
+    )
+    remote_cache_s3_prefix: str = field(
+        default="build-cache/", metadata={"config": "remoteCacheS3Prefix"}
+    )
+    remote_cache_upload: bool = field(
+        default=True, metadata={"config": "remoteCacheUpload"}
+    )
 
     @classmethod
     def build_from_settings(cls, configuration_settings: Dict):
@@ -100,9 +206,23 @@ class Configuration:
             "config"
         ].items():
             matching_field = cls._find_matching_field(config_setting_key)
+            if isinstance(matching_field.type, type) and issubclass(
+                matching_field.type, Enum
+            ):
+                config_setting_value = cls._find_matching_enum_value(
+                    matching_field, config_setting_key, config_setting_value
+                )
             changes[matching_field.name] = config_setting_value
         return dataclasses.replace(Configuration(), **changes)
 
+    @classmethod
+    def _find_matching_enum_value(
+        cls, class_field: Field, setting_name: str, setting_value: str
+    ) -> Enum:
+        if setting_value not in class_field.type.__members__:
+            raise InvalidConfigurationValueException(setting_name, setting_value)
+        return class_field.type[setting_value]
+
     @classmethod
     def _find_matching_field(cls, setting_name: str) -> Optional[Field]:
         for class_field in dataclasses.fields(Configuration):
@@ -122,6 +242,13 @@ class InvalidConfigurationSettingException(Exception):
         super().__init__(f"The configuration setting {setting_name} is unrecognized")
 
 
+class InvalidConfigurationValueException(Exception):
+    def __init__(self, setting_name: str, setting_value):
+        super().__init__(
+            f"The value {setting_value} is not valid for configuration setting {setting_name}"
+        )
+
+
 class ConfigurationManager:
     configuration = None
 
@@ -143,3 +270,11 @@ class ConfigurationManager:
         with open(configuration_filename, "r") as configuration_file:
             read_configuration = json.load(configuration_file)
         cls.configuration = Configuration.build_from_settings(read_configuration)
+
+    @classmethod
+    def override(cls, overrides: Dict):
+        changes = {
+            name: value for name, value in overrides.items() if value is not None
+        }
+        if changes:
+            cls.configuration = dataclasses.replace(cls.get(), **changes)
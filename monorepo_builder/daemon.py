@@ -0,0 +1,369 @@
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import os
+import selectors
+import socket
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from monorepo_builder.affected import ProjectPathTrie
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.console import write_to_console
+from monorepo_builder.file_list import FileList, FileListFormatException
+from monorepo_builder.fingerprints import FileHashCacheManager, GitFingerprintsManager
+from monorepo_builder.folder_cache import FolderListingCacheManager
+from monorepo_builder.project_list import ProjectListFactory, Projects
+from monorepo_builder.projects import Project, ProjectFileListBuilder
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READ_SIZE = 64 * 1024
+PROJECT_MARKER_FILENAMES = {"requirements.txt", "package.json"}
+FRAME_LENGTH = struct.Struct("<I")
+DAEMON_TIMEOUT_SECONDS = 60
+RESPONSE_OK = b"K"
+RESPONSE_STALE = b"S"
+
+
+class InotifyWatcher:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise WatcherUnavailableException()
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def add_watch(self, folder: str) -> int:
+        watch_descriptor = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(folder), WATCH_MASK
+        )
+        if watch_descriptor < 0:
+            error_number = ctypes.get_errno()
+            raise OSError(error_number, os.strerror(error_number), folder)
+        return watch_descriptor
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        events: List[Tuple[int, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                watch_descriptor, mask, _, name_length = INOTIFY_EVENT.unpack_from(
+                    data, offset
+                )
+                offset += INOTIFY_EVENT.size
+                name = data[offset : offset + name_length].rstrip(b"\0")
+                offset += name_length
+                events.append((watch_descriptor, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProjectStateDaemon:
+    def __init__(self, watcher: InotifyWatcher):
+        self.watcher = watcher
+        configuration = ConfigurationManager.get()
+        self.root_folder = configuration.monorepo_root_folder
+        self.settings_key = scan_settings_key(configuration)
+        self.watched_folders: Dict[int, str] = {}
+        self.projects: Dict[str, Project] = {}
+        self.trie = ProjectPathTrie()
+        self.dirty_project_paths: Set[str] = set()
+        self.rediscover = True
+        self.stale = False
+
+    def start(self):
+        for folder in Projects.root_folders():
+            if os.path.isdir(folder):
+                self.watch_tree(folder)
+        self.refresh()
+
+    def watch_tree(self, folder: str):
+        configuration = ConfigurationManager.get()
+        builder = ProjectFileListBuilder()
+        folders = [folder]
+        while folders:
+            current_folder = folders.pop()
+            try:
+                self.watched_folders[self.watcher.add_watch(current_folder)] = (
+                    current_folder
+                )
+                entries = builder.scan_folder(current_folder)
+            except FileNotFoundError:
+                continue
+            except OSError as error:
+                if error.errno not in (errno.ENOSPC, errno.EACCES):
+                    raise
+                # A folder without a watch would hide its changes, so every build
+                # scans the projects itself from now on.
+                self.stale = True
+                write_to_console(
+                    f"Cannot watch {current_folder}: {error.strerror},"
+                    " builds will scan the projects themselves",
+                    color="red",
+                )
+                return
+            folders.extend(
+                entry.path
+                for entry in entries
+                if entry.is_dir() and builder.process_file(entry, configuration)
+            )
+
+    def handle_events(self, events: List[Tuple[int, int, str]]):
+        for watch_descriptor, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Folders created while events were dropped have no watch yet, and
+                # adding a watch again to a watched folder changes nothing.
+                for folder in Projects.root_folders():
+                    if os.path.isdir(folder):
+                        self.watch_tree(folder)
+                self.dirty_project_paths.update(self.projects)
+                self.rediscover = True
+                continue
+            folder = self.watched_folders.get(watch_descriptor)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watched_folders[watch_descriptor]
+                continue
+            if name and not self._is_scanned(name, bool(mask & IN_ISDIR)):
+                continue
+            path = os.path.join(folder, name) if name else folder
+            if mask & IN_ISDIR:
+                self.rediscover = True
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch_tree(path)
+            project = self.trie.find(
+                os.path.relpath(path, self.root_folder).replace(os.sep, "/")
+            )
+            if project is None or (
+                name in PROJECT_MARKER_FILENAMES and folder == project.project_path
+            ):
+                self.rediscover = True
+            if project is not None:
+                self.dirty_project_paths.add(project.project_path)
+
+    def _is_scanned(self, name: str, is_dir: bool) -> bool:
+        return ProjectFileListBuilder().process_name(
+            name, is_dir, not is_dir, ConfigurationManager.get()
+        )
+
+    def refresh(self):
+        self.handle_events(self.watcher.read_events())
+        if self.rediscover:
+            self.rediscover = False
+            self._discover_projects()
+        if not self.dirty_project_paths:
+            return
+        GitFingerprintsManager.reset()
+        builder = ProjectFileListBuilder()
+        for project_path in self.dirty_project_paths:
+            if project_path not in self.projects:
+                continue
+            try:
+                self.projects[project_path].file_list = builder.build(
+                    Path(project_path)
+                )
+            except FileNotFoundError:
+                del self.projects[project_path]
+                self.rediscover = True
+        self.dirty_project_paths.clear()
+        FileHashCacheManager.save()
+        FolderListingCacheManager.save()
+
+    def _discover_projects(self):
+        project_list_factory = ProjectListFactory()
+        projects: Dict[str, Project] = {}
+        for folder in Projects.root_folders():
+            for project_folder in project_list_factory.find_project_folders(folder):
+                project_path = str(project_folder)
+                project = self.projects.get(project_path)
+                if project is None:
+                    project = Project(project_path=project_path)
+                    self.dirty_project_paths.add(project_path)
+                projects[project_path] = project
+        self.projects = projects
+        self.trie = ProjectPathTrie.project_path_trie_factory(
+            self.projects.values(), self.root_folder
+        )
+
+    def serve(self, socket_filename: str):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o177)
+        try:
+            server.bind(socket_filename)
+        finally:
+            os.umask(previous_umask)
+        server.listen()
+        selector = selectors.DefaultSelector()
+        selector.register(server, selectors.EVENT_READ)
+        selector.register(self.watcher, selectors.EVENT_READ)
+        try:
+            running = True
+            while running:
+                for key, _ in selector.select():
+                    if key.fileobj is self.watcher:
+                        self.handle_events(self.watcher.read_events())
+                    else:
+                        connection, _ = server.accept()
+                        with connection:
+                            running = self.handle_request(connection)
+        finally:
+            selector.close()
+            server.close()
+            os.unlink(socket_filename)
+
+    def handle_request(self, connection: socket.socket) -> bool:
+        connection.settimeout(DAEMON_TIMEOUT_SECONDS)
+        command, _, argument = read_line(connection).partition(" ")
+        if command == "ping":
+            connection.sendall(RESPONSE_OK)
+            return True
+        if command == "stop":
+            connection.sendall(RESPONSE_OK)
+            return False
+        if command == "projects":
+            if self.stale or argument != self.settings_key:
+                connection.sendall(RESPONSE_STALE)
+                return True
+            self.refresh()
+            connection.sendall(
+                RESPONSE_OK + encode_projects(list(self.projects.values()))
+            )
+        return True
+
+
+class DaemonClient:
+    def get_projects(self) -> Optional[List[Project]]:
+        key = scan_settings_key(ConfigurationManager.get())
+        response = self._request(f"projects {key}")
+        if response is None or response[:1] != RESPONSE_OK:
+            return None
+        try:
+            return decode_projects(response[1:])
+        except (struct.error, zlib.error, FileListFormatException):
+            return None
+
+    def is_running(self) -> bool:
+        return self._request("ping") == RESPONSE_OK
+
+    def stop(self) -> bool:
+        return self._request("stop") == RESPONSE_OK
+
+    def _request(self, command: str) -> Optional[bytes]:
+        socket_filename = ConfigurationManager.get().daemon_socket_filename
+        if not os.path.exists(socket_filename):
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(DAEMON_TIMEOUT_SECONDS)
+                connection.connect(socket_filename)
+                connection.sendall(command.encode() + b"\n")
+                chunks = []
+                for chunk in iter(lambda: connection.recv(INOTIFY_READ_SIZE), b""):
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except OSError:
+            return None
+
+
+def scan_settings_key(configuration: Configuration) -> str:
+    # The daemon can only answer for clients that would have scanned the same way.
+    settings = (
+        configuration.monorepo_root_folder,
+        configuration.library_folder_name,
+        tuple(configuration.standard_folder_list),
+        tuple(configuration.filenames_to_skip),
+        tuple(configuration.extensions_to_skip),
+        configuration.skip_hidden_files,
+        configuration.skip_hidden_folders,
+        configuration.change_detection_mode.name,
+    )
+    return hashlib.sha1(repr(settings).encode()).hexdigest()
+
+
+def read_line(connection: socket.socket) -> str:
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(1024)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode().strip()
+
+
+def encode_projects(projects: List[Project]) -> bytes:
+    frames = [FRAME_LENGTH.pack(len(projects))]
+    for project in projects:
+        project_path = os.fsencode(project.project_path)
+        file_list = project.file_list.to_bytes()
+        frames.extend(
+            [
+                FRAME_LENGTH.pack(len(project_path)),
+                project_path,
+                FRAME_LENGTH.pack(len(file_list)),
+                file_list,
+            ]
+        )
+    return b"".join(frames)
+
+
+def decode_projects(data: bytes) -> List[Project]:
+    (count,) = FRAME_LENGTH.unpack_from(data)
+    offset = FRAME_LENGTH.size
+    projects: List[Project] = []
+    for _ in range(count):
+        frame = []
+        for _ in range(2):
+            (length,) = FRAME_LENGTH.unpack_from(data, offset)
+            offset += FRAME_LENGTH.size
+            frame.append(data[offset : offset + length])
+            offset += length
+        project_path = os.fsdecode(frame[0])
+        projects.append(
+            Project(
+                project_path=project_path,
+                file_list=FileList.from_bytes(project_path, frame[1]),
+            )
+        )
+    return projects
+
+
+class WatcherUnavailableException(Exception):
+    def __init__(self):
+        super().__init__("inotify is not available on this platform")
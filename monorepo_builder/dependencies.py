@@ -0,0 +1,213 @@
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Set, Iterable, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from monorepo_builder.project_list import Projects
+
+REQUIREMENT_NAME_PATTERN = re.compile(r"^([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)")
+EGG_FRAGMENT_PATTERN = re.compile(r"#egg=([A-Za-z0-9._-]+)")
+COMMENT_PATTERN = re.compile(r"(^|\s)#.*$")
+URL_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://")
+ARCHIVE_EXTENSIONS = (".whl", ".tar.gz", ".tgz", ".zip")
+PACKAGE_JSON_DEPENDENCY_SECTIONS = [
+    "dependencies",
+    "devDependencies",
+    "peerDependencies",
+    "optionalDependencies",
+]
+LOCAL_PACKAGE_JSON_PROTOCOLS = ("file:", "link:", "workspace:")
+INSTALLER_NAME_PATTERN = re.compile(r"^(.+?)-(\d[^-]*)(?:-|$)")
+
+
+def normalize_package_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_installer_name(filename: str) -> Optional[Tuple[str, str]]:
+    # Wheels, sdists and npm pack tarballs all start with "<name>-<version>", and a
+    # version is the first part that starts with a digit.
+    for extension in ARCHIVE_EXTENSIONS:
+        if filename.endswith(extension):
+            match = INSTALLER_NAME_PATTERN.match(filename[: -len(extension)])
+            if match is None:
+                return None
+            return normalize_package_name(match.group(1)), match.group(2)
+    return None
+
+
+class DependencyParser:
+    def parse_requirements(
+        self, requirements: str, requirements_folder: Optional[Path] = None
+    ) -> Set[str]:
+        return self._parse_requirements(requirements, requirements_folder, set())
+
+    def _parse_requirements(
+        self,
+        requirements: str,
+        requirements_folder: Optional[Path],
+        files_read: Set[Path],
+    ) -> Set[str]:
+        names: Set[str] = set()
+        for line in requirements.replace("\\\n", " ").splitlines():
+            line = COMMENT_PATTERN.sub("", line).strip()
+            if not line:
+                continue
+            if line.startswith(("--requirement", "-r")):
+                names |= self._parse_included_requirements(
+                    self._option_value(line, ("--requirement", "-r")),
+                    requirements_folder,
+                    files_read,
+                )
+                continue
+            if line.startswith(("--editable", "-e")):
+                line = self._option_value(line, ("--editable", "-e"))
+            elif line.startswith("-"):
+                continue
+            name = self._parse_requirement_line(line)
+            if name:
+                names.add(normalize_package_name(name))
+        return names
+
+    def _option_value(self, line: str, option_names: Tuple[str, ...]) -> str:
+        for option_name in option_names:
+            if line.startswith(option_name):
+                return line[len(option_name) :].lstrip(" =")
+        return line
+
+    def _parse_included_requirements(
+        self,
+        included_filename: str,
+        requirements_folder: Optional[Path],
+        files_read: Set[Path],
+    ) -> Set[str]:
+        if requirements_folder is None or not included_filename:
+            return set()
+        included_file = (requirements_folder / included_filename).resolve()
+        if included_file in files_read or not included_file.is_file():
+            return set()
+        files_read.add(included_file)
+        return self._parse_requirements(
+            included_file.read_text(), included_file.parent, files_read
+        )
+
+    def _parse_requirement_line(self, line: str) -> Optional[str]:
+        egg_match = EGG_FRAGMENT_PATTERN.search(line)
+        if egg_match:
+            return egg_match.group(1)
+        if line.startswith((".", "/")) or URL_PATTERN.match(line):
+            return self._name_from_local_path(line)
+        name_match = REQUIREMENT_NAME_PATTERN.match(line)
+        if name_match:
+            return name_match.group(1)
+        return None
+
+    def parse_package_json(self, package_json: str) -> Set[str]:
+        package = self._load_package_json(package_json)
+        names: Set[str] = set()
+        for section in PACKAGE_JSON_DEPENDENCY_SECTIONS:
+            dependencies = package.get(section)
+            if not isinstance(dependencies, dict):
+                continue
+            for name, specifier in dependencies.items():
+                names.add(normalize_package_name(name))
+                if isinstance(specifier, str) and specifier.startswith(
+                    LOCAL_PACKAGE_JSON_PROTOCOLS
+                ):
+                    local_name = self._name_from_local_path(specifier.split(":", 1)[1])
+                    if local_name:
+                        names.add(normalize_package_name(local_name))
+        return names
+
+    def parse_package_name(self, package_json: str) -> Optional[str]:
+        name = self._load_package_json(package_json).get("name")
+        if not isinstance(name, str) or not name:
+            return None
+        return normalize_package_name(name)
+
+    def _load_package_json(self, package_json: str) -> Dict:
+        try:
+            package = json.loads(package_json)
+        except ValueError as error:
+            raise DependencyFileParseException("package.json", str(error))
+        if not isinstance(package, dict):
+            raise DependencyFileParseException("package.json", "not an object")
+        return package
+
+    def _name_from_local_path(self, path: str) -> Optional[str]:
+        name = path.split("#", 1)[0].split("[", 1)[0].rstrip("/").split("/")[-1]
+        if name.endswith(ARCHIVE_EXTENSIONS):
+            installer = parse_installer_name(name)
+            if installer is not None:
+                return installer[0]
+            name = next(
+                name[: -len(extension)]
+                for extension in ARCHIVE_EXTENSIONS
+                if name.endswith(extension)
+            )
+        return name or None
+
+
+@dataclass
+class DependencyIndex:
+    library_dependencies: Dict[str, Set[str]] = field(default_factory=dict)
+    library_dependents: Dict[str, Set[str]] = field(default_factory=dict)
+
+    @staticmethod
+    def dependency_index_factory(projects: "Projects") -> "DependencyIndex":
+        library_names: Dict[str, str] = {}
+        for library_project in projects.library_projects:
+            library_names[normalize_package_name(library_project.name)] = (
+                library_project.name
+            )
+            # A library published as "@scope/name" is referenced by that name.
+            package_name = library_project.read_package_name()
+            if package_name:
+                library_names.setdefault(package_name, library_project.name)
+        dependency_index = DependencyIndex()
+        for project in projects:
+            dependency_index.add_project(
+                project.name,
+                {
+                    library_names[dependency_name]
+                    for dependency_name in project.read_dependency_names()
+                    if dependency_name in library_names
+                },
+            )
+        return dependency_index
+
+    def add_project(self, name: str, library_names: Set[str]):
+        library_names = library_names - {name}
+        self.library_dependencies[name] = library_names
+        for library_name in library_names:
+            self.library_dependents.setdefault(library_name, set()).add(name)
+
+    def dependencies_of(self, name: str) -> Set[str]:
+        return self.library_dependencies.get(name, set())
+
+    def dependents_of(self, name: str) -> Set[str]:
+        return self.library_dependents.get(name, set())
+
+    def transitive_dependents(self, names: Iterable[str]) -> Set[str]:
+        return self._walk(names, self.library_dependents)
+
+    def transitive_dependencies(self, names: Iterable[str]) -> Set[str]:
+        return self._walk(names, self.library_dependencies)
+
+    def _walk(self, names: Iterable[str], edges: Dict[str, Set[str]]) -> Set[str]:
+        found: Set[str] = set()
+        queue = deque(names)
+        while queue:
+            for neighbour in edges.get(queue.popleft(), set()):
+                if neighbour not in found:
+                    found.add(neighbour)
+                    queue.append(neighbour)
+        return found
+
+
+class DependencyFileParseException(Exception):
+    def __init__(self, filename: str, reason: str):
+        super().__init__(f"Unable to parse {filename}: {reason}")
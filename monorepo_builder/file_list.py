@@ -0,0 +1,289 @@
+import hashlib
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+FILE_LIST_MAGIC = b"MFL2"
+FILE_LIST_HEADER = struct.Struct("<4sIB20s")
+PATHS_LENGTH = struct.Struct("<I")
+CONTENT_HASH_SIZE = 20
+MODIFIED_TIME_SIZE = 8
+
+
+class File(NamedTuple):
+    file: str
+    last_changed_time: float
+    content_hash: Optional[str] = None
+
+
+class FileList:
+    # Columns instead of one object per file: the relative paths share a single
+    # NUL separated buffer and the stat values live in typed arrays.
+    __slots__ = (
+        "root",
+        "_paths",
+        "modified_times",
+        "sizes",
+        "content_hashes",
+        "_digest",
+    )
+
+    def __init__(
+        self,
+        root: str = "",
+        paths: Sequence[str] = (),
+        modified_times: Iterable[float] = (),
+        sizes: Iterable[int] = (),
+        content_hashes: Optional[Sequence[str]] = None,
+    ):
+        self.root = root
+        self._paths = "\0".join(paths).encode("utf-8", "surrogateescape")
+        self.modified_times = _column("d", modified_times)
+        self.sizes = _column("q", sizes)
+        self.content_hashes = b""
+        self._digest: Optional[bytes] = None
+        if content_hashes is not None:
+            self.content_hashes = bytes.fromhex("".join(content_hashes))
+        if len(self.sizes) != len(self.modified_times):
+            raise FileListFormatException("the size and mtime columns differ in length")
+
+    @classmethod
+    def from_files(cls, root: str, files: Iterable[File]) -> "FileList":
+        # Same order as a scan, which lists each folder sorted by name.
+        entries = sorted(
+            ((os.path.relpath(file.file, root), file) for file in files),
+            key=lambda entry: entry[0].split(os.sep),
+        )
+        content_hashes = None
+        if entries and all(file.content_hash is not None for _, file in entries):
+            content_hashes = [file.content_hash for _, file in entries]
+        return cls(
+            root,
+            [path for path, _ in entries],
+            [file.last_changed_time for _, file in entries],
+            [0] * len(entries),
+            content_hashes,
+        )
+
+    @classmethod
+    def from_bytes(cls, root: str, data: bytes) -> "FileList":
+        file_list = cls(root)
+        if data[:4] != FILE_LIST_MAGIC:
+            raise FileListFormatException("unknown file list format")
+        _, count, has_hashes, file_list._digest = FILE_LIST_HEADER.unpack_from(data)
+        body = zlib.decompress(data[FILE_LIST_HEADER.size :])
+        (paths_length,) = PATHS_LENGTH.unpack_from(body)
+        offset = PATHS_LENGTH.size
+        file_list._paths = body[offset : offset + paths_length]
+        offset += paths_length
+        file_list.modified_times = _read_column("d", body, offset, count)
+        offset += count * MODIFIED_TIME_SIZE
+        file_list.sizes = _read_column("q", body, offset, count)
+        offset += count * file_list.sizes.itemsize
+        if has_hashes:
+            file_list.content_hashes = body[offset : offset + count * CONTENT_HASH_SIZE]
+        return file_list
+
+    def to_bytes(self) -> bytes:
+        body = b"".join(
+            [
+                PATHS_LENGTH.pack(len(self._paths)),
+                self._paths,
+                _write_column(self.modified_times),
+                _write_column(self.sizes),
+                self.content_hashes,
+            ]
+        )
+        header = FILE_LIST_HEADER.pack(
+            FILE_LIST_MAGIC, len(self), bool(self.content_hashes), self.digest
+        )
+        return header + zlib.compress(body, 1)
+
+    def __len__(self) -> int:
+        return len(self.modified_times)
+
+    def __iter__(self) -> Iterator[File]:
+        content_hashes: Iterable[Optional[str]] = [None] * len(self)
+        if self.content_hashes:
+            content_hashes = self.hashes()
+        for path, last_changed_time, content_hash in zip(
+            self.paths(), self.modified_times, content_hashes
+        ):
+            yield File(os.path.join(self.root, path), last_changed_time, content_hash)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FileList):
+            return NotImplemented
+        return (
+            self.root == other.root
+            and self._paths == other._paths
+            and self.modified_times == other.modified_times
+            and self.sizes == other.sizes
+            and self.content_hashes == other.content_hashes
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"FileList(root={self.root!r}, files={len(self)})"
+
+    def paths(self) -> List[str]:
+        if not self._paths:
+            return []
+        return self._paths.decode("utf-8", "surrogateescape").split("\0")
+
+    def hashes(self) -> List[str]:
+        return [
+            self.content_hashes[index : index + CONTENT_HASH_SIZE].hex()
+            for index in range(0, len(self.content_hashes), CONTENT_HASH_SIZE)
+        ]
+
+    @property
+    def digest(self) -> bytes:
+        if self._digest is None:
+            self._digest = self.folder_digests()[""]
+        return self._digest
+
+    def same_files_as(self, previous: "FileList") -> bool:
+        return self.digest == previous.digest
+
+    def folder_digests(self) -> Dict[str, bytes]:
+        # A Merkle tree over the folders: each folder hashes its files'
+        # fingerprints and its subfolders' digests in name order, and the
+        # project digest is the digest of the root folder "".
+        mode, fingerprints, width = self._fingerprint_column()
+        digests: Dict[str, bytes] = {}
+        folders: List[Tuple[bytes, List[bytes]]] = [(b"", [mode])]
+        names = self._paths.split(b"\0") if self._paths else []
+        separator = os.sep.encode()
+        offset = 0
+        for path in names:
+            folder, _, name = path.rpartition(separator)
+            if folder != folders[-1][0]:
+                while not _is_within(folder, folders[-1][0], separator):
+                    _close_folder(folders, digests, separator)
+                parent = folders[-1][0]
+                for subfolder_name in folder[len(parent) :].split(separator):
+                    if subfolder_name:
+                        parent = (
+                            parent + separator + subfolder_name
+                            if parent
+                            else subfolder_name
+                        )
+                        folders.append((parent, [mode]))
+            folders[-1][1].append(
+                b"f%s\0%s" % (name, fingerprints[offset : offset + width])
+            )
+            offset += width
+        while folders:
+            _close_folder(folders, digests, separator)
+        return {
+            folder.decode("utf-8", "surrogateescape"): digest
+            for folder, digest in digests.items()
+        }
+
+    def changes_since(self, previous: "FileList") -> "FileListChanges":
+        current_digests = self.folder_digests()
+        previous_digests = previous.folder_digests()
+        changed_folders = {
+            folder
+            for folder in current_digests.keys() | previous_digests.keys()
+            if current_digests.get(folder) != previous_digests.get(folder)
+        }
+        current_files = self._fingerprints_in(changed_folders)
+        previous_files = previous._fingerprints_in(changed_folders)
+        changes = FileListChanges()
+        for path, fingerprint in current_files.items():
+            if path not in previous_files:
+                changes.added.append(path)
+            elif previous_files[path] != fingerprint:
+                changes.modified.append(path)
+        for path in previous_files:
+            if path not in current_files:
+                changes.removed.append(path)
+        return changes
+
+    def _fingerprint_column(self):
+        if self.content_hashes:
+            return b"content", self.content_hashes, CONTENT_HASH_SIZE
+        return b"mtime", _write_column(self.modified_times), MODIFIED_TIME_SIZE
+
+    def _fingerprints_in(self, folders: Set[str]) -> Dict[str, bytes]:
+        _, fingerprints, width = self._fingerprint_column()
+        return {
+            path: fingerprints[index * width : (index + 1) * width]
+            for index, path in enumerate(self.paths())
+            if path.rpartition(os.sep)[0] in folders
+        }
+
+
+@dataclass
+class FileListChanges:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+
+    @property
+    def folders(self) -> List[str]:
+        return sorted(
+            {
+                path.rpartition(os.sep)[0]
+                for path in self.added + self.removed + self.modified
+            }
+        )
+
+
+def _is_within(folder: bytes, parent: bytes, separator: bytes) -> bool:
+    return not parent or folder == parent or folder.startswith(parent + separator)
+
+
+def _close_folder(
+    folders: List[Tuple[bytes, List[bytes]]],
+    digests: Dict[bytes, bytes],
+    separator: bytes,
+):
+    folder, entries = folders.pop()
+    digests[folder] = hashlib.sha1(b"".join(entries)).digest()
+    if folders:
+        name = folder.rpartition(separator)[2]
+        folders[-1][1].append(b"d%s\0%s" % (name, digests[folder]))
+
+
+def _column(typecode: str, values: Iterable) -> array:
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values)
+
+
+def _read_column(typecode: str, data: bytes, offset: int, count: int) -> array:
+    column = array(typecode)
+    column.frombytes(data[offset : offset + count * column.itemsize])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _write_column(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+class FileListFormatException(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"Invalid file list: {reason}")
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import pickle
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple, Set, Optional, List
+
+from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.console import write_to_console
+
+HASH_CHUNK_SIZE = 1024 * 1024
+RACY_WINDOW_NS = 2_000_000_000
+GIT_FILE_MODES = {"100644", "100755"}
+
+
+def hash_file_contents(filename: str) -> str:
+    # Hashed the way git hashes blobs, so the ids match the ones in git's index.
+    with open(filename, "rb") as file:
+        digest = hashlib.sha1(b"blob %d\0" % os.fstat(file.fileno()).st_size)
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileHashCache:
+    def __init__(self, entries: Optional[Dict[str, Tuple[int, int, int, str]]] = None):
+        self.entries = entries or {}
+        self.files_seen: Set[str] = set()
+
+    def get_hash(self, filename: str, stat_result: os.stat_result) -> str:
+        key = (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        self.files_seen.add(filename)
+        entry = self.entries.get(filename)
+        if entry is not None and entry[:3] == key:
+            return entry[3]
+        content_hash = hash_file_contents(filename)
+        self.entries[filename] = key + (content_hash,)
+        return content_hash
+
+    def entries_to_save(self, saved_at_ns: int) -> Dict[str, Tuple[int, int, int, str]]:
+        # A file changed within the timestamp granularity of this save could change
+        # again without its mtime moving, so those entries are hashed again next run.
+        return {
+            filename: entry
+            for filename, entry in self.entries.items()
+            if filename in self.files_seen and entry[2] < saved_at_ns - RACY_WINDOW_NS
+        }
+
+
+class FileHashCacheManager:
+    hash_cache: Optional[FileHashCache] = None
+    _load_lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> FileHashCache:
+        with cls._load_lock:
+            if not cls.hash_cache:
+                cls.hash_cache = cls._load()
+        return cls.hash_cache
+
+    @classmethod
+    def _load(cls) -> FileHashCache:
+        file = Path(ConfigurationManager.get().hash_cache_filename)
+        if not file.exists():
+            return FileHashCache()
+        with open(file, "rb") as hash_cache_file:
+            return FileHashCache(pickle.load(hash_cache_file))
+
+    @classmethod
+    def save(cls):
+        if not cls.hash_cache:
+            return
+        entries = cls.hash_cache.entries_to_save(time.time_ns())
+        with open(ConfigurationManager.get().hash_cache_filename, "wb") as file:
+            pickle.dump(entries, file)
+
+
+class GitFingerprints:
+    def __init__(self, blob_ids: Dict[str, str], hash_cache: FileHashCache):
+        self.blob_ids = blob_ids
+        self.hash_cache = hash_cache
+
+    def get_hash(self, filename: str, stat_result: os.stat_result) -> str:
+        blob_id = self.blob_ids.get(filename)
+        if blob_id is not None:
+            return blob_id
+        return self.hash_cache.get_hash(filename, stat_result)
+
+
+class GitFingerprintsManager:
+    git_fingerprints: Optional[GitFingerprints] = None
+    _load_lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> GitFingerprints:
+        with cls._load_lock:
+            if not cls.git_fingerprints:
+                cls.git_fingerprints = cls._load()
+        return cls.git_fingerprints
+
+    @classmethod
+    def reset(cls):
+        with cls._load_lock:
+            cls.git_fingerprints = None
+
+    @classmethod
+    def _load(cls) -> GitFingerprints:
+        root_folder = ConfigurationManager.get().monorepo_root_folder
+        try:
+            prefix = cls._run_git(root_folder, "rev-parse", "--show-prefix").strip()
+            index = cls._run_git(root_folder, "ls-files", "--stage", "-z")
+            status = cls._run_git(
+                root_folder,
+                "status",
+                "--porcelain",
+                "-z",
+                "--untracked-files=no",
+                "--",
+                ".",
+            )
+        except (OSError, subprocess.CalledProcessError):
+            write_to_console(
+                "Unable to read the git index, hashing every file", color="yellow"
+            )
+            return GitFingerprints({}, FileHashCacheManager.get())
+        blob_ids = cls.parse_index(index)
+        for path in cls.parse_status(status, prefix):
+            blob_ids.pop(path, None)
+        return GitFingerprints(
+            {f"{root_folder}/{path}": blob_id for path, blob_id in blob_ids.items()},
+            FileHashCacheManager.get(),
+        )
+
+    @staticmethod
+    def _run_git(folder: str, *arguments: str) -> str:
+        result = subprocess.run(
+            ["git", *arguments], cwd=folder, capture_output=True, check=True
+        )
+        return os.fsdecode(result.stdout)
+
+    @staticmethod
+    def parse_index(output: str) -> Dict[str, str]:
+        # Only regular files at stage 0; symlinks, submodules and merge conflicts
+        # are left to be hashed from the working tree.
+        blob_ids: Dict[str, str] = {}
+        for record in output.split("\0"):
+            if not record:
+                continue
+            information, _, path = record.partition("\t")
+            mode, blob_id, stage = information.split(" ")
+            if mode in GIT_FILE_MODES and stage == "0":
+                blob_ids[path] = blob_id
+        return blob_ids
+
+    @staticmethod
+    def parse_status(output: str, prefix: str) -> List[str]:
+        # Only files whose working tree differs from the index need hashing. The
+        # paths are relative to the top of the repository, and renames and copies
+        # are followed by a record holding the original path.
+        paths: List[str] = []
+        records = iter(output.split("\0"))
+        for record in records:
+            if not record:
+                continue
+            if record[0] in "RC":
+                next(records, None)
+            if record[1] != " ":
+                paths.append(record[3:][len(prefix) :])
+        return paths
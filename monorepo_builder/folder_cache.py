@@ -0,0 +1,81 @@
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.fingerprints import RACY_WINDOW_NS
+
+FolderListing = Tuple[Tuple[str, bool], ...]
+
+
+class FolderListingCache:
+    def __init__(self, entries: Optional[Dict[str, Tuple[int, FolderListing]]] = None):
+        self.entries = entries or {}
+        self.folders_seen: Set[str] = set()
+
+    def get_listing(
+        self, folder: str, modified_time_ns: int
+    ) -> Optional[FolderListing]:
+        self.folders_seen.add(folder)
+        entry = self.entries.get(folder)
+        if entry is not None and entry[0] == modified_time_ns:
+            return entry[1]
+        return None
+
+    def set_listing(self, folder: str, modified_time_ns: int, listing: FolderListing):
+        self.entries[folder] = (modified_time_ns, listing)
+
+    def entries_to_save(self, saved_at_ns: int) -> Dict[str, Tuple[int, FolderListing]]:
+        # A folder changed within the timestamp granularity of this save could change
+        # again without its mtime moving, so those folders are read again next run.
+        return {
+            folder: entry
+            for folder, entry in self.entries.items()
+            if folder in self.folders_seen and entry[0] < saved_at_ns - RACY_WINDOW_NS
+        }
+
+
+class FolderListingCacheManager:
+    folder_cache: Optional[FolderListingCache] = None
+    _load_lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> FolderListingCache:
+        with cls._load_lock:
+            if not cls.folder_cache:
+                cls.folder_cache = cls._load()
+        return cls.folder_cache
+
+    @classmethod
+    def _load(cls) -> FolderListingCache:
+        configuration = ConfigurationManager.get()
+        file = Path(configuration.folder_cache_filename)
+        if not file.exists():
+            return FolderListingCache()
+        with open(file, "rb") as folder_cache_file:
+            filter_key, entries = pickle.load(folder_cache_file)
+        # The listings are stored already filtered, so they are only reusable with
+        # the same skip settings.
+        if filter_key != cls._filter_key(configuration):
+            return FolderListingCache()
+        return FolderListingCache(entries)
+
+    @classmethod
+    def save(cls):
+        if not cls.folder_cache:
+            return
+        configuration = ConfigurationManager.get()
+        entries = cls.folder_cache.entries_to_save(time.time_ns())
+        with open(configuration.folder_cache_filename, "wb") as file:
+            pickle.dump((cls._filter_key(configuration), entries), file)
+
+    @staticmethod
+    def _filter_key(configuration: Configuration) -> Tuple:
+        return (
+            tuple(configuration.filenames_to_skip),
+            tuple(configuration.extensions_to_skip),
+            configuration.skip_hidden_files,
+            configuration.skip_hidden_folders,
+        )
@@ -0,0 +1,279 @@
+import math
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from monorepo_builder.build_executor import BuildRequestStatus, ProjectBuildRequest
+from monorepo_builder.configuration import ConfigurationManager
+
+HISTORY_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " version TEXT NOT NULL,"
+    " started_at REAL NOT NULL,"
+    " ended_at REAL NOT NULL,"
+    " success INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS builds ("
+    " run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,"
+    " project_name TEXT NOT NULL,"
+    " status TEXT NOT NULL,"
+    " started_at REAL,"
+    " ended_at REAL,"
+    " exit_code INTEGER,"
+    " cache_hit INTEGER NOT NULL,"
+    " reason TEXT)",
+    "CREATE INDEX IF NOT EXISTS builds_by_project" " ON builds (project_name, run_id)",
+]
+BUILT = "built"
+FAILED = "failed"
+RESTORED = "restored"
+SKIPPED = "skipped"
+CANCELLED = "cancelled"
+
+
+@dataclass
+class BuildRecord:
+    project_name: str
+    status: str
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    exit_code: Optional[int] = None
+    cache_hit: bool = False
+    reason: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.ended_at is None:
+            return None
+        return self.ended_at - self.started_at
+
+    @staticmethod
+    def from_build_request(
+        build_request: ProjectBuildRequest,
+    ) -> "Optional[BuildRecord]":
+        if build_request.cache_hit:
+            status = RESTORED
+        elif build_request.build_status == BuildRequestStatus.Cancelled:
+            status = CANCELLED
+        elif build_request.run_successful:
+            status = BUILT
+        elif build_request.run_successful is False:
+            status = FAILED
+        elif build_request.build_status == BuildRequestStatus.Skipped:
+            status = SKIPPED
+        else:
+            return None
+        return BuildRecord(
+            project_name=build_request.project.name,
+            status=status,
+            started_at=build_request.started_at,
+            ended_at=build_request.ended_at,
+            exit_code=build_request.exit_code,
+            cache_hit=build_request.cache_hit,
+            reason=build_request.project.build_reason,
+        )
+
+
+@dataclass
+class ProjectBuildStatistics:
+    project_name: str
+    builds: int = 0
+    failures: int = 0
+    cache_hits: int = 0
+    skips: int = 0
+    durations: List[float] = field(default_factory=list, repr=False)
+    last_started_at: Optional[float] = None
+
+    @property
+    def p50(self) -> Optional[float]:
+        return percentile(self.durations, 0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return percentile(self.durations, 0.95)
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.builds if self.builds else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        attempts = self.builds + self.cache_hits
+        return self.cache_hits / attempts if attempts else 0.0
+
+    def add(self, record: BuildRecord):
+        if self.last_started_at is None:
+            self.last_started_at = record.started_at
+        # A cancelled build was cut short, so its duration says nothing about the
+        # project.
+        if record.status in (SKIPPED, CANCELLED):
+            self.skips += 1
+        elif record.status == RESTORED:
+            self.cache_hits += 1
+        else:
+            self.builds += 1
+            if record.status == FAILED:
+                self.failures += 1
+            if record.duration is not None:
+                self.durations.append(record.duration)
+
+    def to_dict(self) -> Dict:
+        return {
+            "project": self.project_name,
+            "builds": self.builds,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "skips": self.skips,
+            "p50": self.p50,
+            "p95": self.p95,
+            "failure_rate": self.failure_rate,
+            "cache_hit_rate": self.cache_hit_rate,
+            "last_started_at": self.last_started_at,
+        }
+
+
+def percentile(values: Iterable[float], fraction: float) -> Optional[float]:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class BuildHistory:
+    def __init__(self, filename: str):
+        self.connection = sqlite3.connect(
+            filename, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self._lock = threading.Lock()
+        for statement in HISTORY_SCHEMA:
+            self.connection.execute(statement)
+
+    def close(self):
+        self.connection.close()
+
+    def add_run(
+        self,
+        version: str,
+        started_at: float,
+        ended_at: float,
+        success: bool,
+        records: Iterable[BuildRecord],
+    ) -> int:
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                run_id = self.connection.execute(
+                    "INSERT INTO runs (version, started_at, ended_at, success)"
+                    " VALUES (?, ?, ?, ?)",
+                    (version, started_at, ended_at, int(success)),
+                ).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO builds (run_id, project_name, status, started_at,"
+                    " ended_at, exit_code, cache_hit, reason)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            run_id,
+                            record.project_name,
+                            record.status,
+                            record.started_at,
+                            record.ended_at,
+                            record.exit_code,
+                            int(record.cache_hit),
+                            record.reason,
+                        )
+                        for record in records
+                    ],
+                )
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        return run_id
+
+    def prune(self, max_runs: int):
+        with self._lock:
+            self.connection.execute(
+                "DELETE FROM runs WHERE id NOT IN"
+                " (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                (max_runs,),
+            )
+
+    def run_count(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def records(
+        self, project_name: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[BuildRecord]:
+        query = (
+            "SELECT project_name, status, started_at, ended_at, exit_code, cache_hit,"
+            " reason FROM builds"
+        )
+        parameters: tuple = ()
+        if project_name is not None:
+            query += " WHERE project_name = ?"
+            parameters = (project_name,)
+        query += " ORDER BY run_id DESC, started_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters += (limit,)
+        with self._lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+        return [
+            BuildRecord(
+                project_name=row[0],
+                status=row[1],
+                started_at=row[2],
+                ended_at=row[3],
+                exit_code=row[4],
+                cache_hit=bool(row[5]),
+                reason=row[6],
+            )
+            for row in rows
+        ]
+
+    def statistics(self, window: int) -> Dict[str, ProjectBuildStatistics]:
+        # Only each project's latest builds count, so the numbers follow the project
+        # as it changes.
+        with self._lock:
+            # Each project's latest builds are read through the builds_by_project
+            # index, so the cost follows the window rather than the whole history.
+            rows = self.connection.execute(
+                "SELECT builds.project_name, builds.status, builds.started_at,"
+                " builds.ended_at FROM (SELECT DISTINCT project_name FROM builds)"
+                " AS projects JOIN builds ON builds.rowid IN"
+                " (SELECT rowid FROM builds AS latest"
+                " WHERE latest.project_name = projects.project_name"
+                " ORDER BY latest.run_id DESC LIMIT ?)"
+                " ORDER BY builds.project_name, builds.run_id DESC",
+                (window,),
+            ).fetchall()
+        statistics: Dict[str, ProjectBuildStatistics] = {}
+        for project_name, status, started_at, ended_at in rows:
+            statistics.setdefault(
+                project_name, ProjectBuildStatistics(project_name)
+            ).add(BuildRecord(project_name, status, started_at, ended_at))
+        return statistics
+
+
+class BuildHistoryManager:
+    build_history: Optional[BuildHistory] = None
+
+    @classmethod
+    def get(cls) -> Optional[BuildHistory]:
+        if cls.build_history is None:
+            history_filename = ConfigurationManager.get().history_filename
+            if not history_filename:
+                return None
+            cls.build_history = BuildHistory(history_filename)
+        return cls.build_history
+
+    @classmethod
+    def close(cls):
+        if cls.build_history is not None:
+            cls.build_history.close()
+            cls.build_history = None
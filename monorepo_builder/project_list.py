@@ -1,78 +1,197 @@
-import pickle
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Dict, Iterable
 
 from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.dependencies import DependencyIndex
+from monorepo_builder.file_list import FileList
 from monorepo_builder.projects import Project, ProjectFileListBuilder, ProjectType
+from monorepo_builder.state_store import StateStoreManager
+from monorepo_builder.tracing import TraceManager
+
+
+class ProjectIndex:
+    def __init__(self, projects: Iterable[Project]):
+        self.projects_by_name: Dict[str, Project] = {}
+        self.projects_by_path: Dict[str, Project] = {}
+        self.library_projects: List[Project] = []
+        self.standard_projects: List[Project] = []
+        for project in projects:
+            self.projects_by_name[project.name] = project
+            self.projects_by_path[project.project_path] = project
+            if project.project_type == ProjectType.Library:
+                self.library_projects.append(project)
+            else:
+                self.standard_projects.append(project)
+
+    def get_by_name(self, name: str) -> Optional[Project]:
+        return self.projects_by_name.get(name)
+
+    def get_by_path(self, project_path: str) -> Optional[Project]:
+        return self.projects_by_path.get(project_path)
 
 
 class Projects(list, List[Project]):
+    @property
+    def index(self) -> ProjectIndex:
+        if getattr(self, "_index", None) is None:
+            self._index = ProjectIndex(self)
+        return self._index
+
     @property
     def library_projects(self) -> List[Project]:
-        return [
-            project for project in self if project.project_type == ProjectType.Library
-        ]
+        return self.index.library_projects
 
     @property
     def standard_projects(self) -> List[Project]:
-        return [
-            project for project in self if project.project_type == ProjectType.Standard
-        ]
+        return self.index.standard_projects
+
+    @property
+    def dependency_index(self) -> DependencyIndex:
+        if getattr(self, "_dependency_index", None) is None:
+            self._dependency_index = DependencyIndex.dependency_index_factory(self)
+        return self._dependency_index
+
+    def append(self, project: Project):
+        super().append(project)
+        self._clear_indexes()
+
+    def extend(self, projects: Iterable[Project]):
+        super().extend(projects)
+        self._clear_indexes()
+
+    def insert(self, position: int, project: Project):
+        super().insert(position, project)
+        self._clear_indexes()
+
+    def remove(self, project: Project):
+        super().remove(project)
+        self._clear_indexes()
+
+    def pop(self, position: int = -1) -> Project:
+        project = super().pop(position)
+        self._clear_indexes()
+        return project
+
+    def clear(self):
+        super().clear()
+        self._clear_indexes()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._clear_indexes()
+
+    def reverse(self):
+        super().reverse()
+        self._clear_indexes()
+
+    def __setitem__(self, position, value):
+        super().__setitem__(position, value)
+        self._clear_indexes()
+
+    def __delitem__(self, position):
+        super().__delitem__(position)
+        self._clear_indexes()
+
+    def __iadd__(self, projects: Iterable[Project]) -> "Projects":
+        result = super().__iadd__(projects)
+        self._clear_indexes()
+        return result
+
+    def __imul__(self, count: int) -> "Projects":
+        result = super().__imul__(count)
+        self._clear_indexes()
+        return result
+
+    def _clear_indexes(self):
+        self._index = None
+        self._dependency_index = None
 
     @staticmethod
     def projects_factory():
         projects = Projects()
-        projects._build_library_project_list()
-        projects._build_standard_project_list()
+        projects.extend(
+            ProjectListFactory().get_projects_in_folders(Projects.root_folders())
+        )
         return projects
 
-    def _build_library_project_list(self,):
-        library_root_folder = f"{ConfigurationManager().get().monorepo_root_folder}/{ConfigurationManager().get().library_folder_name}"
-        self.extend(ProjectListFactory().get_projects_in_folder(library_root_folder))
-
-    def _build_standard_project_list(self,):
-        for standard_folder_name in ConfigurationManager().get().standard_folder_list:
-            standard_folder = f"{ConfigurationManager().get().monorepo_root_folder}/{standard_folder_name}"
-            self.extend(ProjectListFactory().get_projects_in_folder(standard_folder))
+    @staticmethod
+    def root_folders() -> List[str]:
+        configuration = ConfigurationManager.get()
+        root_folders = [
+            f"{configuration.monorepo_root_folder}/{configuration.library_folder_name}"
+        ]
+        for standard_folder_name in configuration.standard_folder_list:
+            root_folders.append(
+                f"{configuration.monorepo_root_folder}/{standard_folder_name}"
+            )
+        return root_folders
 
 
 class ProjectListManager:
     def load_list_from_last_successful_run(self) -> Projects:
-        file = Path(ConfigurationManager.get().project_list_filename)
-        if not file.exists():
-            return Projects()
-        with open(ConfigurationManager.get().project_list_filename, "rb") as file:
-            return pickle.loads(file.read())
+        state_store = StateStoreManager.get()
+        projects = Projects()
+        for name in state_store.project_names():
+            projects.append(state_store.load_project(name))
+        return projects
+
+    def load_project_from_last_successful_run(self, name: str) -> Optional[Project]:
+        return StateStoreManager.get().load_project(name)
 
     def save_project_list(self, projects: Projects):
-        with open(ConfigurationManager.get().project_list_filename, "wb") as file:
-            file.write(pickle.dumps(projects))
+        # Projects another shard built keep the state this machine last saved for them.
+        StateStoreManager.get().save_projects(
+            [project for project in projects if not project.left_to_other_shard],
+            {project.name for project in projects if project.left_to_other_shard},
+        )
 
 
 class ProjectListFactory:
-    def get_projects_in_folder(self, folder: str) -> List[Project]:
-        if not Path(folder).exists():
+    def get_projects_in_folders(self, folders: List[str]) -> List[Project]:
+        scan_workers = ConfigurationManager.get().scan_workers
+        with ThreadPoolExecutor(max_workers=scan_workers) as pool:
+            project_folders = [
+                project_folder
+                for folder_project_folders in pool.map(
+                    self.find_project_folders, folders
+                )
+                for project_folder in folder_project_folders
+            ]
+            projects = [
+                Project(project_path=str(project_folder))
+                for project_folder in project_folders
+            ]
+            for project, file_list in zip(
+                projects, pool.map(self._build_file_list, projects)
+            ):
+                project.file_list = file_list
+            return projects
+
+    def _build_file_list(self, project: Project) -> FileList:
+        with TraceManager.span("scan", track=project.name):
+            file_list = ProjectFileListBuilder().build(project.path)
+        TraceManager.count("scan", files_scanned=len(file_list))
+        return file_list
+
+    def find_project_folders(self, folder: str) -> List[Path]:
+        if not os.path.isdir(folder):
             return []
 
-        project_list: List[Project] = []
-        for project in Path(folder).iterdir():
-            if not project.is_dir():
-                continue
-            if self.is_folder_project(project):
-                project_path = str(project)
-                project_list.append(
-                    Project(
-                        project_path=project_path,
-                        file_list=ProjectFileListBuilder().build(project),
-                    )
-                )
+        project_folders: List[Path] = []
+        with os.scandir(folder) as entries:
+            child_folders = [entry.path for entry in entries if entry.is_dir()]
+        for child_folder in child_folders:
+            if self.is_folder_project(child_folder):
+                project_folders.append(Path(child_folder))
             else:
-                project_list.extend(self.get_projects_in_folder(str(project)))
-        return project_list
+                project_folders.extend(self.find_project_folders(child_folder))
+        return project_folders
 
-    def is_folder_project(self, folder: Path) -> bool:
-        if list(folder.glob("requirements.txt")):
+    def is_folder_project(self, folder: str) -> bool:
+        if os.path.isfile(os.path.join(folder, "requirements.txt")):
             return True
-        if list(folder.glob("package.json")):
+        if os.path.isfile(os.path.join(folder, "package.json")):
             return True
         return False
@@ -1,10 +1,24 @@
 import os
+from array import array
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import List, Optional
-
-from monorepo_builder.configuration import ConfigurationManager, Configuration
+from typing import List, Optional, Set, Tuple, Union
+
+from monorepo_builder.configuration import (
+    ConfigurationManager,
+    Configuration,
+    ChangeDetectionMode,
+)
+from monorepo_builder.dependencies import DependencyParser
+from monorepo_builder.file_list import File, FileList
+from monorepo_builder.fingerprints import (
+    FileHashCache,
+    FileHashCacheManager,
+    GitFingerprints,
+    GitFingerprintsManager,
+)
+from monorepo_builder.folder_cache import FolderListingCache, FolderListingCacheManager
 
 
 class ProjectType(Enum):
@@ -12,48 +26,124 @@ class ProjectType(Enum):
     Standard = (2,)
 
 
-@dataclass(frozen=True)
-class File:
-    file: str
-    last_changed_time: int
-
-    @staticmethod
-    def file_factory(file: Path):
-        return File(str(file), file.stat().st_mtime)
-
-
 class ProjectFileListBuilder:
-    def build(self, path: Path) -> List[File]:
-        files: List[File] = []
+    def build(self, path: Path) -> FileList:
         configuration = ConfigurationManager.get()
-        for file in path.iterdir():
-            if not self.process_file(file, configuration):
+        fingerprints: Optional[Union[FileHashCache, GitFingerprints]] = None
+        if configuration.change_detection_mode == ChangeDetectionMode.content:
+            fingerprints = FileHashCacheManager.get()
+        elif configuration.change_detection_mode == ChangeDetectionMode.git:
+            fingerprints = GitFingerprintsManager.get()
+        root = str(path)
+        prefix_length = len(root) + 1
+        paths: List[str] = []
+        modified_times = array("d")
+        sizes = array("q")
+        content_hashes: List[str] = []
+        folder_cache = None
+        if configuration.incremental_scan:
+            folder_cache = FolderListingCacheManager.get()
+        folders = [iter(self.list_folder(root, configuration, folder_cache))]
+        while folders:
+            entry = next(folders[-1], None)
+            if entry is None:
+                folders.pop()
                 continue
-            if file.is_dir():
-                files.extend(self.build(file))
+            entry_path, is_dir = entry
+            if is_dir:
+                folders.append(
+                    iter(self.list_folder(entry_path, configuration, folder_cache))
+                )
             else:
-                files.append(File.file_factory(file))
-        return files
+                stat_result = os.stat(entry_path)
+                paths.append(entry_path[prefix_length:])
+                modified_times.append(stat_result.st_mtime)
+                sizes.append(stat_result.st_size)
+                if fingerprints is not None:
+                    content_hashes.append(
+                        fingerprints.get_hash(entry_path, stat_result)
+                    )
+        return FileList(
+            root,
+            paths,
+            modified_times,
+            sizes,
+            content_hashes if fingerprints is not None else None,
+        )
+
+    def list_folder(
+        self,
+        folder: str,
+        configuration: Configuration,
+        folder_cache: Optional[FolderListingCache] = None,
+    ) -> List[Tuple[str, bool]]:
+        if folder_cache is None:
+            return [
+                (entry.path, entry.is_dir())
+                for entry in self.read_folder(folder, configuration)
+            ]
+        modified_time_ns = os.stat(folder).st_mtime_ns
+        listing = folder_cache.get_listing(folder, modified_time_ns)
+        if listing is None:
+            listing = tuple(
+                (entry.name, entry.is_dir())
+                for entry in self.read_folder(folder, configuration)
+            )
+            folder_cache.set_listing(folder, modified_time_ns, listing)
+        prefix = folder + os.sep
+        return [(prefix + name, is_dir) for name, is_dir in listing]
+
+    def read_folder(
+        self, folder: str, configuration: Configuration
+    ) -> List[os.DirEntry]:
+        return [
+            entry
+            for entry in self.scan_folder(folder)
+            if self.process_file(entry, configuration)
+        ]
+
+    def scan_folder(self, folder: str) -> List[os.DirEntry]:
+        with os.scandir(folder) as entries:
+            return sorted(entries, key=lambda entry: entry.name)
+
+    def process_file(self, entry: os.DirEntry, configuration: Configuration) -> bool:
+        return self.process_name(
+            entry.name, entry.is_dir(), entry.is_file(), configuration
+        )
 
-    def process_file(self, file_path: Path, configuration: Configuration) -> bool:
-        if file_path.name in configuration.filenames_to_skip:
+    def process_name(
+        self, name: str, is_dir: bool, is_file: bool, configuration: Configuration
+    ) -> bool:
+        if name in configuration.filenames_to_skip:
             return False
-        if configuration.skip_hidden_folders:
-            if file_path.is_dir() and file_path.name.startswith("."):
+        if name.startswith("."):
+            if configuration.skip_hidden_folders and is_dir:
                 return False
-        if configuration.skip_hidden_files:
-            if file_path.is_file() and file_path.name.startswith("."):
+            if configuration.skip_hidden_files and is_file:
                 return False
-        if file_path.suffix in configuration.extensions_to_skip:
+        if file_suffix(name) in configuration.extensions_to_skip:
             return False
         return True
 
 
+def file_suffix(name: str) -> str:
+    index = name.rfind(".")
+    if 0 < index < len(name) - 1:
+        return name[index:]
+    return ""
+
+
 @dataclass
 class Project:
     project_path: str
-    file_list: List[File] = field(default_factory=list)
+    file_list: FileList = field(default_factory=FileList)
     needs_build: bool = field(default=False)
+    build_reason: Optional[str] = field(default=None, compare=False)
+    left_to_other_shard: bool = field(default=False, compare=False)
+    _name: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _project_type: Optional[ProjectType] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def path(self) -> Path:
@@ -61,68 +151,69 @@ class Project:
 
     @property
     def name(self) -> str:
-        path = self.path
-        return path.name.replace("_", "-")
+        if self._name is None:
+            self._name = self.path.name.replace("_", "-")
+        return self._name
 
     @property
     def project_type(self) -> ProjectType:
-        if ConfigurationManager().get().library_folder_name in self.path.parts:
-            return ProjectType.Library
-        return ProjectType.Standard
+        if self._project_type is None:
+            if ConfigurationManager().get().library_folder_name in self.path.parts:
+                self._project_type = ProjectType.Library
+            else:
+                self._project_type = ProjectType.Standard
+        return self._project_type
 
-    def set_needs_build(self):
+    def set_needs_build(self, reason: str = "requested"):
+        if not self.needs_build:
+            self.build_reason = reason
         self.needs_build = True
 
     def set_needs_build_due_to_file_changes(
         self, project_from_last_run: "Optional[Project]"
     ):
         self.needs_build = self._did_files_change_from_last_run(project_from_last_run)
-
-    def set_needs_build_due_to_updated_library_reference(
-        self, updated_library_names: List[str]
-    ):
-        if self.project_references_updated_library(updated_library_names):
-            self.set_needs_build()
+        if not self.needs_build:
+            self.build_reason = None
+        elif project_from_last_run:
+            self.build_reason = "files changed"
+        else:
+            self.build_reason = "not built before"
 
     def _did_files_change_from_last_run(
         self, project_from_last_run: "Optional[Project]"
     ) -> bool:
         if not project_from_last_run:
             return True
-        if len(self.file_list) != len(project_from_last_run.file_list):
-            return True
-        sorted_current_file_list = sorted(self.file_list, key=lambda x: x.file)
-        sorted_last_file_list = sorted(
-            project_from_last_run.file_list, key=lambda x: x.file
+        return not self.file_list.same_files_as(project_from_last_run.file_list)
+
+    def read_dependency_names(self) -> Set[str]:
+        parser = DependencyParser()
+        dependency_names: Set[str] = set()
+        requirements_found = False
+        requirements_file_path = Path(
+            os.path.join(self.project_path, "requirements.txt")
         )
-        for current, previous in zip(sorted_current_file_list, sorted_last_file_list):
-            if current.file != previous.file:
-                return True
-            if current.last_changed_time != previous.last_changed_time:
-                return True
-        return False
-
-    def project_references_updated_library(
-        self, library_project_names: List[str]
-    ) -> bool:
-        ## Should be updated to parse the requirements to match against entire project names.
-        ## For example, a library project name of "thing" will match to a requirements of "something".
-        requirements = self.read_requirements_file()
-        for library_project_name in library_project_names:
-            if library_project_name in requirements:
-                return True
-        return False
-
-    def read_requirements_file(self) -> str:
-        requirement_filenames = [
-            os.path.join(self.project_path, "requirements.txt"),
-            os.path.join(self.project_path, "package.json"),
-        ]
-        for requirement_filename in requirement_filenames:
-            requirement_file_path = Path(requirement_filename)
-            if requirement_file_path.exists():
-                return requirement_file_path.read_text()
-        raise RequirementsFileNotFoundException(self)
+        if requirements_file_path.exists():
+            requirements_found = True
+            dependency_names |= parser.parse_requirements(
+                requirements_file_path.read_text(), requirements_file_path.parent
+            )
+        package_json_file_path = Path(os.path.join(self.project_path, "package.json"))
+        if package_json_file_path.exists():
+            requirements_found = True
+            dependency_names |= parser.parse_package_json(
+                package_json_file_path.read_text()
+            )
+        if not requirements_found:
+            raise RequirementsFileNotFoundException(self)
+        return dependency_names
+
+    def read_package_name(self) -> Optional[str]:
+        package_json_file_path = Path(os.path.join(self.project_path, "package.json"))
+        if not package_json_file_path.exists():
+            return None
+        return DependencyParser().parse_package_name(package_json_file_path.read_text())
 
 
 class RequirementsFileNotFoundException(Exception):
@@ -0,0 +1,178 @@
+import errno
+import os
+import shutil
+import tempfile
+from typing import Iterable, Optional, Set
+
+from monorepo_builder.configuration import ProvisioningMode
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+TEMPORARY_SUFFIX = ".provisioning"
+MANIFEST_FILENAME = ".provisioned"
+FALLBACK_ERRORS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EMLINK,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOSYS,
+    errno.EBADF,
+}
+
+
+def publish_file(source: str, destination_folder: str):
+    # The shared folder is read without a lock, so a file is written under a temporary
+    # name and only appears under its own name once it is complete.
+    file_descriptor, temporary = tempfile.mkstemp(
+        prefix=".", suffix=TEMPORARY_SUFFIX, dir=destination_folder
+    )
+    os.close(file_descriptor)
+    try:
+        shutil.copy(source, temporary)
+        os.replace(
+            temporary, os.path.join(destination_folder, os.path.basename(source))
+        )
+    except BaseException:
+        if os.path.lexists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+def prune_provisioned(folder: str, provided: Set[str]):
+    # Only what an earlier provision placed is removed, so files put in the folder by
+    # anything else are left alone.
+    for name in _read_manifest(folder) - provided:
+        path = os.path.join(folder, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.unlink(path)
+    _write_manifest(folder, provided)
+
+
+def _read_manifest(folder: str) -> Set[str]:
+    try:
+        with open(os.path.join(folder, MANIFEST_FILENAME)) as manifest:
+            return {name for name in manifest.read().splitlines() if name}
+    except FileNotFoundError:
+        return set()
+
+
+def _write_manifest(folder: str, names: Set[str]):
+    temporary = os.path.join(folder, MANIFEST_FILENAME + TEMPORARY_SUFFIX)
+    with open(temporary, "w") as manifest:
+        manifest.write("".join(f"{name}\n" for name in sorted(names)))
+    os.replace(temporary, os.path.join(folder, MANIFEST_FILENAME))
+
+
+class FolderProvisioner:
+    def __init__(self, mode: ProvisioningMode):
+        self.mode = mode
+        self.use_copy = mode == ProvisioningMode.copy
+        self.files_placed = 0
+        self.files_unchanged = 0
+        self.bytes_copied = 0
+
+    def provision(
+        self,
+        source_folder: str,
+        destination_folder: str,
+        names: Optional[Iterable[str]] = None,
+    ):
+        # A destination that is the source folder itself already holds everything, and
+        # pruning it would delete the shared installers.
+        if os.path.realpath(source_folder) == os.path.realpath(destination_folder):
+            return
+        os.makedirs(destination_folder, exist_ok=True)
+        names_to_provide = None if names is None else set(names)
+        provided: Set[str] = set()
+        with os.scandir(source_folder) as entries:
+            for entry in entries:
+                if (
+                    entry.name == MANIFEST_FILENAME
+                    or entry.name.endswith(TEMPORARY_SUFFIX)
+                    or (
+                        names_to_provide is not None
+                        and entry.name not in names_to_provide
+                    )
+                ):
+                    continue
+                provided.add(entry.name)
+                destination = os.path.join(destination_folder, entry.name)
+                if entry.is_dir():
+                    if os.path.lexists(destination) and not os.path.isdir(destination):
+                        os.unlink(destination)
+                    self.provision(entry.path, destination)
+                else:
+                    self.provision_file(entry.path, destination)
+        prune_provisioned(destination_folder, provided)
+
+    def provision_file(self, source: str, destination: str):
+        source_stat = os.stat(source)
+        if self._is_current(source, source_stat, destination):
+            self.files_unchanged += 1
+            return
+        # Each file is placed under a temporary name and renamed over the old one, so
+        # a build never sees a half written installer.
+        temporary = destination + TEMPORARY_SUFFIX
+        if os.path.lexists(temporary):
+            os.unlink(temporary)
+        self._place(source, temporary)
+        if os.path.isdir(destination) and not os.path.islink(destination):
+            shutil.rmtree(destination)
+        os.replace(temporary, destination)
+        self.files_placed += 1
+
+    def _is_current(
+        self, source: str, source_stat: os.stat_result, destination: str
+    ) -> bool:
+        try:
+            destination_stat = os.lstat(destination)
+        except FileNotFoundError:
+            return False
+        if os.path.islink(destination):
+            return os.readlink(destination) == os.path.abspath(source)
+        if (destination_stat.st_dev, destination_stat.st_ino) == (
+            source_stat.st_dev,
+            source_stat.st_ino,
+        ):
+            return True
+        return (
+            destination_stat.st_size == source_stat.st_size
+            and destination_stat.st_mtime_ns == source_stat.st_mtime_ns
+        )
+
+    def _place(self, source: str, destination: str):
+        if not self.use_copy:
+            try:
+                if self.mode == ProvisioningMode.hardlink:
+                    os.link(source, destination)
+                elif self.mode == ProvisioningMode.symlink:
+                    os.symlink(os.path.abspath(source), destination)
+                else:
+                    self._reflink(source, destination)
+                return
+            except OSError as error:
+                if error.errno not in FALLBACK_ERRORS:
+                    raise
+                if os.path.lexists(destination):
+                    os.unlink(destination)
+                # The next file would fail for the same reason, so stop trying.
+                self.use_copy = True
+        shutil.copy2(source, destination)
+        self.bytes_copied += os.path.getsize(destination)
+
+    def _reflink(self, source: str, destination: str):
+        if fcntl is None:
+            raise OSError(errno.EOPNOTSUPP, "reflinks are not supported")
+        with open(source, "rb") as source_file, open(
+            destination, "wb"
+        ) as destination_file:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        shutil.copystat(source, destination)
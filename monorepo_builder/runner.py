@@ -1,57 +1,326 @@
+import json
+import os
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 import click
 
+from monorepo_builder.affected import AffectedProjectsFinder, GitDiffException
+from monorepo_builder.artifact_cache import ArtifactCacheManager, artifact_keys
 from monorepo_builder.build_executor import (
     BuildExecutor,
+    ProjectBuildRequest,
     ProjectBuildRequests,
     InstallerManager,
+    library_versions_for,
+)
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.cache_server import cache_server_factory
+from monorepo_builder.configuration import ConfigurationManager, FailureMode
+from monorepo_builder.daemon import (
+    DaemonClient,
+    InotifyWatcher,
+    ProjectStateDaemon,
+    WatcherUnavailableException,
 )
-from monorepo_builder.configuration import ConfigurationManager
 from monorepo_builder.console import write_to_console
-from monorepo_builder.project_list import ProjectListManager, Projects
+from monorepo_builder.fingerprints import FileHashCacheManager
+from monorepo_builder.folder_cache import FolderListingCacheManager
+from monorepo_builder.history import BuildHistoryManager, BuildRecord
+from monorepo_builder.project_list import (
+    ProjectListFactory,
+    ProjectListManager,
+    Projects,
+)
 from monorepo_builder.projects import Project
-from monorepo_builder.version import ProjectVersionManager
+from monorepo_builder.scheduling import BuildDurationEstimator, simulate_makespan
+from monorepo_builder.sharding import InvalidShardException, Shard, ShardPlanner
+from monorepo_builder.state_store import StateStoreManager
+from monorepo_builder.tracing import TraceManager
+from monorepo_builder.version import ProjectVersionManager, ProjectVersions
 
+CONFIGURATION_FILENAME = "monorepo-builder-config.json"
 
-@click.command()
+
+def validate_shard(context, parameter, value):
+    if value is None:
+        return None
+    try:
+        return str(Shard.parse(value))
+    except InvalidShardException as exception:
+        raise click.BadParameter(str(exception))
+
+
+@click.group(invoke_without_command=True)
+@click.option("--version", envvar="MONOREPO-BUILD-VERSION", show_envvar=True)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of builds to run at the same time.",
+)
+@click.option(
+    "--trace",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write a Chrome trace of the run to this file.",
+)
+@click.option(
+    "--shard",
+    callback=validate_shard,
+    default=None,
+    help="Build only shard INDEX of COUNT, for example 2/4.",
+)
+@click.option(
+    "--failure-mode",
+    type=click.Choice([failure_mode.name for failure_mode in FailureMode]),
+    default=None,
+    help="What happens to the other builds when a build fails.",
+)
 @click.option(
-    "--version",
-    envvar="MONOREPO-BUILD-VERSION",
-    default="1.0.0",
-    show_envvar=True,
-    required=True,
-    prompt=True,
+    "--timeout",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Cancel the builds still running after this many seconds.",
 )
-def run_build(version):
-    Runner.run(version)
+@click.pass_context
+def run_build(context, version, jobs, trace, shard, failure_mode, timeout):
+    if context.invoked_subcommand is not None:
+        return
+    if version is None:
+        version = click.prompt("Version", default="1.0.0")
+    Runner.run(
+        version,
+        build_jobs=jobs,
+        trace_filename=trace,
+        shard=shard,
+        failure_mode=FailureMode[failure_mode] if failure_mode else None,
+        run_timeout_seconds=timeout,
+    )
+
+
+@run_build.command()
+@click.option("--since", required=True, help="Git ref to compare HEAD with.")
+@click.option("--json", "as_json", is_flag=True, help="Print the projects as JSON.")
+def affected(since, as_json):
+    if Path(CONFIGURATION_FILENAME).exists():
+        ConfigurationManager.load(CONFIGURATION_FILENAME)
+    try:
+        projects = AffectedProjectsFinder().find(since)
+    except GitDiffException as exception:
+        raise click.ClickException(str(exception))
+    if as_json:
+        root_folder = ConfigurationManager.get().monorepo_root_folder
+        click.echo(
+            json.dumps(
+                [
+                    {
+                        "name": project.name,
+                        "path": os.path.relpath(project.project_path, root_folder),
+                        "type": project.project_type.name,
+                    }
+                    for project in projects
+                ]
+            )
+        )
+    else:
+        for project in projects:
+            click.echo(project.name)
+
+
+@run_build.command()
+@click.option("--stop", is_flag=True, help="Stop the running daemon.")
+def daemon(stop):
+    if Path(CONFIGURATION_FILENAME).exists():
+        ConfigurationManager.load(CONFIGURATION_FILENAME)
+    client = DaemonClient()
+    if stop:
+        if not client.stop():
+            raise click.ClickException("The daemon is not running")
+        write_to_console("Daemon stopped")
+        return
+    if client.is_running():
+        raise click.ClickException("The daemon is already running")
+    socket_filename = ConfigurationManager.get().daemon_socket_filename
+    if os.path.exists(socket_filename):
+        os.unlink(socket_filename)
+    try:
+        project_state_daemon = ProjectStateDaemon(InotifyWatcher())
+    except WatcherUnavailableException as exception:
+        raise click.ClickException(str(exception))
+    project_state_daemon.start()
+    write_to_console(
+        f"Watching {len(project_state_daemon.projects)} projects on {socket_filename}",
+        color="blue",
+    )
+    project_state_daemon.serve(socket_filename)
+
+
+@run_build.command()
+@click.option("--clear", is_flag=True, help="Remove every stored artifact.")
+def cache(clear):
+    if Path(CONFIGURATION_FILENAME).exists():
+        ConfigurationManager.load(CONFIGURATION_FILENAME)
+    artifact_cache = ArtifactCacheManager.get()
+    if artifact_cache is None:
+        raise click.ClickException("The artifact cache is not configured")
+    if clear:
+        artifact_cache.clear()
+        write_to_console("Artifact cache cleared")
+        return
+    statistics = artifact_cache.load_statistics()
+    click.echo(f"Artifacts: {artifact_cache.artifact_count()}")
+    click.echo(
+        f"Size: {artifact_cache.size() / (1024 * 1024):.1f} MB"
+        f" of {ConfigurationManager.get().artifact_cache_max_size_mb} MB"
+    )
+    click.echo(
+        f"Hits: {statistics.hits}, misses: {statistics.misses}"
+        f" ({statistics.hit_rate:.0%} hit rate)"
+    )
+    click.echo(
+        f"Remote hits: {statistics.remote_hits}, uploaded: {statistics.uploaded}"
+    )
+    click.echo(f"Stored: {statistics.stored}, evicted: {statistics.evicted}")
+
+
+@run_build.command()
+@click.option("--project", "project_name", help="List the builds of one project.")
+@click.option(
+    "--last",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of latest builds per project to use (historyWindow by default).",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the history as JSON.")
+def history(project_name, last, as_json):
+    if Path(CONFIGURATION_FILENAME).exists():
+        ConfigurationManager.load(CONFIGURATION_FILENAME)
+    build_history = BuildHistoryManager.get()
+    if build_history is None:
+        raise click.ClickException("The build history is not configured")
+    window = last or ConfigurationManager.get().history_window
+    if project_name:
+        records = build_history.records(project_name, window)
+        if as_json:
+            click.echo(
+                json.dumps(
+                    [dict(vars(record), duration=record.duration) for record in records]
+                )
+            )
+            return
+        for record in records:
+            started = (
+                datetime.fromtimestamp(record.started_at).strftime("%Y-%m-%d %H:%M:%S")
+                if record.started_at
+                else "-"
+            )
+            click.echo(
+                f"{started}  {record.status:<8} {format_duration(record.duration):>8}"
+                f"  exit {record.exit_code if record.exit_code is not None else '-':<3}"
+                f"  {record.reason or ''}"
+            )
+        return
+    statistics = sorted(
+        build_history.statistics(window).values(),
+        key=lambda project_statistics: project_statistics.project_name,
+    )
+    if as_json:
+        click.echo(json.dumps([entry.to_dict() for entry in statistics]))
+        return
+    click.echo(
+        f"{'Project':<30} {'Builds':>6} {'p50':>8} {'p95':>8} {'Failures':>8}"
+        f" {'Cache hits':>10}"
+    )
+    for entry in statistics:
+        click.echo(
+            f"{entry.project_name:<30} {entry.builds:>6}"
+            f" {format_duration(entry.p50):>8} {format_duration(entry.p95):>8}"
+            f" {entry.failure_rate:>8.0%} {entry.cache_hit_rate:>10.0%}"
+        )
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    return f"{int(seconds // 60)}m{int(seconds % 60):02d}s"
+
+
+@run_build.command()
+@click.option("--folder", required=True, help="Folder the artifacts are kept in.")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8765, show_default=True)
+def cache_server(folder, host, port):
+    server = cache_server_factory(folder, host, port)
+    write_to_console(
+        f"Serving build artifacts from {folder} on"
+        f" http://{host}:{server.server_address[1]}",
+        color="blue",
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 @click.command()
 @click.argument("project-path", type=click.Path())
 def copy_installers(project_path: str):
     project = Project(project_path=project_path)
-    InstallerManager().copy_installers_to_project(project)
+    configuration = ConfigurationManager.get()
+    projects = Projects()
+    projects.extend(
+        Project(project_path=str(project_folder))
+        for project_folder in ProjectListFactory().find_project_folders(
+            f"{configuration.monorepo_root_folder}/{configuration.library_folder_name}"
+        )
+        if project_folder.name != project.path.name
+    )
+    projects.append(project)
+    InstallerManager().copy_installers_to_project(
+        project, library_versions_for(projects, project, ProjectVersions())
+    )
 
 
 class Runner:
     @staticmethod
-    def run(version: str):
+    def run(version: str, **configuration_overrides):
         write_to_console("Starting the build", color="blue")
+        started_at = time.time()
         runner = Runner()
-        runner.setup()
-        projects = runner.gather_projects()
-        build_requests = runner.do_builds(projects)
-        if build_requests.success:
-            runner.finish_builds_on_success(projects, version)
-        else:
-            runner.finish_builds_on_failure(build_requests)
+        setup_started_at_ns = time.perf_counter_ns()
+        runner.setup(configuration_overrides)
+        # Whether the run is traced is only known once the configuration is read.
+        if ConfigurationManager.get().trace_filename:
+            TraceManager.start(setup_started_at_ns).add_span(
+                "setup", setup_started_at_ns, time.perf_counter_ns()
+            )
+        with TraceManager.span("gather projects"):
+            projects = runner.gather_projects()
+        with TraceManager.span("builds"):
+            build_requests = runner.do_builds(projects, version)
+        runner.report_artifact_cache()
+        runner.record_history(build_requests, version, started_at)
+        with TraceManager.span("finish"):
+            if build_requests.success:
+                runner.finish_builds_on_success(projects, version)
+            else:
+                runner.finish_builds_on_failure(build_requests)
+            StateStoreManager.close()
+        runner.save_trace()
         write_to_console("Build complete", color="blue")
 
-    def setup(self):
+    def setup(self, configuration_overrides: Optional[Dict] = None):
         write_to_console("Loading default configuration", color="blue")
-        ConfigurationManager.load("monorepo-builder-config.json")
+        ConfigurationManager.load(CONFIGURATION_FILENAME)
+        ConfigurationManager.override(configuration_overrides or {})
 
         write_to_console("Checking for installer folder")
         configuration = ConfigurationManager.get()
@@ -59,51 +328,123 @@ class Runner:
 
     def gather_projects(self) -> Projects:
         write_to_console("Creating Project List", color="blue")
-        projects = Projects.projects_factory()
+        with TraceManager.span("scan projects"):
+            daemon_projects = DaemonClient().get_projects()
+            if daemon_projects is None:
+                projects = Projects.projects_factory()
+            else:
+                write_to_console("Using the project list kept by the daemon")
+                projects = Projects()
+                projects.extend(daemon_projects)
+        with TraceManager.span("save caches"):
+            FileHashCacheManager.save()
+            FolderListingCacheManager.save()
         write_to_console("Identifying projects requiring a build")
         BuildRunner().identify_projects_needing_build(projects)
         return projects
 
-    def do_builds(self, projects: Projects) -> ProjectBuildRequests:
-        build_requests = BuildRunner().build_library_projects(projects)
-        if build_requests.success:
-            build_requests.extend(BuildRunner().build_standard_projects(projects))
-        return build_requests
+    def do_builds(self, projects: Projects, version: str) -> ProjectBuildRequests:
+        return BuildRunner().build_projects(projects, version)
+
+    def save_trace(self):
+        tracer = TraceManager.stop()
+        trace_filename = ConfigurationManager.get().trace_filename
+        if tracer is not None and trace_filename:
+            tracer.save(trace_filename)
+            write_to_console(f"Trace written to {trace_filename}")
+
+    def record_history(
+        self, build_requests: ProjectBuildRequests, version: str, started_at: float
+    ):
+        build_history = BuildHistoryManager.get()
+        if build_history is None:
+            return
+        records = [
+            record
+            for record in (
+                BuildRecord.from_build_request(build_request)
+                for build_request in build_requests
+            )
+            if record is not None
+        ]
+        build_history.add_run(
+            version, started_at, time.time(), build_requests.success, records
+        )
+        build_history.prune(ConfigurationManager.get().history_max_runs)
+        BuildHistoryManager.close()
+
+    def report_artifact_cache(self):
+        artifact_cache = ArtifactCacheManager.get()
+        if artifact_cache is None:
+            return
+        statistics = artifact_cache.statistics
+        write_to_console(
+            f"Artifact cache: {statistics.hits} hits ({statistics.remote_hits} remote),"
+            f" {statistics.misses} misses, {statistics.stored} stored"
+            f" ({statistics.uploaded} uploaded), {statistics.evicted} evicted"
+        )
+        ArtifactCacheManager.save()
 
     def finish_builds_on_success(self, projects: Projects, current_version: str):
         write_to_console("All builds completed successfully, build file updated")
-        ProjectListManager().save_project_list(projects)
         version_list = ProjectVersionManager().build_version_list(
             projects, current_version
         )
-        ProjectVersionManager().save_version_list(version_list)
+        with StateStoreManager.get().transaction():
+            ProjectListManager().save_project_list(projects)
+            ProjectVersionManager().save_version_list(version_list)
 
     def finish_builds_on_failure(self, build_requests: ProjectBuildRequests):
         write_to_console("Builds failed", color="red")
         for build_request in build_requests.failed:
             write_to_console(f"{build_request.project.name} failed")
+        for build_request in build_requests.cancelled:
+            write_to_console(f"{build_request.project.name} cancelled")
+        for build_request in build_requests.skipped:
+            write_to_console(f"{build_request.project.name} skipped")
 
 
 class BuildRunner:
     def identify_projects_needing_build(self, projects: Projects):
-        self._need_build_when_files_changed(projects)
-        self._identify_projects_to_build_due_to_library_changes(projects)
+        with TraceManager.span("identify projects needing build"):
+            self._need_build_when_files_changed(projects)
+            self._identify_projects_to_build_due_to_library_changes(projects)
 
     def _need_build_when_files_changed(self, projects: Projects):
-        previous_projects = ProjectListManager().load_list_from_last_successful_run()
+        project_list_manager = ProjectListManager()
         for project in projects:
-            previous_project = self._get_previous_project_by_name(
-                previous_projects, project.name
+            previous_project = (
+                project_list_manager.load_project_from_last_successful_run(project.name)
             )
             project.set_needs_build_due_to_file_changes(previous_project)
+            if project.needs_build and previous_project:
+                self._report_file_changes(project, previous_project)
+
+    def _report_file_changes(self, project: Project, previous_project: Project):
+        changes = project.file_list.changes_since(previous_project.file_list)
+        folders = [folder or "." for folder in changes.folders]
+        if len(folders) > 5:
+            folders = folders[:5] + [f"{len(folders) - 5} more"]
+        write_to_console(
+            f"{project.name} changed: {len(changes.modified)} modified,"
+            f" {len(changes.added)} added, {len(changes.removed)} removed"
+            f" in {', '.join(folders)}"
+        )
 
     def _identify_projects_to_build_due_to_library_changes(self, projects: Projects):
         library_project_names = self._get_names_for_library_projects_requiring_build(
             projects
         )
-        for project in projects.standard_projects:
-            project.set_needs_build_due_to_updated_library_reference(
-                library_project_names
+        dependency_index = projects.dependency_index
+        dependent_project_names = dependency_index.transitive_dependents(
+            library_project_names
+        )
+        for project_name in dependent_project_names:
+            changed_library_names = dependency_index.transitive_dependencies(
+                {project_name}
+            ).intersection(library_project_names)
+            projects.index.get_by_name(project_name).set_needs_build(
+                f"library changed: {', '.join(sorted(changed_library_names))}"
             )
 
     def _get_names_for_library_projects_requiring_build(
@@ -115,25 +456,114 @@ class BuildRunner:
                 library_project_names.append(library_project.name)
         return library_project_names
 
-    def _get_previous_project_by_name(
-        self, previous_projects: Optional[Projects], name: str
-    ) -> Optional[Project]:
-        if not previous_projects:
-            return None
-        for project in previous_projects:
-            if project.name == name:
-                return project
-        return None
+    def build_projects(
+        self, projects: Projects, current_version: str
+    ) -> ProjectBuildRequests:
+        build_requests = ProjectBuildRequests.all_projects(projects)
+        project_versions = ProjectVersionManager().build_version_list(
+            projects, current_version
+        )
+        for build_request in build_requests:
+            build_request.library_versions = library_versions_for(
+                projects, build_request.project, project_versions
+            )
+        if ArtifactCacheManager.get() is not None:
+            keys = artifact_keys(projects)
+            for build_request in build_requests:
+                build_request.artifact_key = keys[build_request.project.name]
+        duration_estimator = BuildDurationEstimator.build_duration_estimator_factory()
+        durations = duration_estimator.estimate(
+            build_request.project for build_request in build_requests
+        )
+        for build_request in build_requests:
+            build_request.estimated_duration = durations[build_request.project.name]
+        build_graph = BuildGraph.build_graph_factory(
+            build_requests, projects.dependency_index
+        )
+        shard = ConfigurationManager.get().shard
+        if shard:
+            build_requests = self._select_shard(
+                build_requests, projects, Shard.parse(shard)
+            )
+            build_graph = BuildGraph.build_graph_factory(
+                build_requests, projects.dependency_index
+            )
+        predicted_makespan = simulate_makespan(
+            build_graph, durations, ConfigurationManager.get().build_jobs
+        )
+        build_requests = BuildExecutor().execute_builds(build_requests, build_graph)
+        self._report_makespan(build_requests, predicted_makespan, duration_estimator)
+        return build_requests
 
-    def build_library_projects(self, projects: Projects) -> ProjectBuildRequests:
-        return BuildExecutor().execute_builds(
-            ProjectBuildRequests.library_projects(projects)
+    def _select_shard(
+        self,
+        build_requests: ProjectBuildRequests,
+        projects: Projects,
+        shard: Shard,
+    ) -> ProjectBuildRequests:
+        # Every agent must plan the same shards, so the plan covers all projects and
+        # estimates them from their file count, never from local state or history.
+        # Each project then stays with the same shard from run to run.
+        build_graph = BuildGraph.build_graph_factory(
+            ProjectBuildRequests(
+                ProjectBuildRequest(project=project) for project in projects
+            ),
+            projects.dependency_index,
         )
+        durations = BuildDurationEstimator({}).estimate(projects)
+        shard_plan = ShardPlanner(build_graph, durations).plan(shard.count)
+        shard_names = shard_plan[shard.index - 1]
+        shared_names = {
+            name
+            for index, other_names in enumerate(shard_plan)
+            if index != shard.index - 1
+            for name in other_names & shard_names
+        }
+        selected_requests = ProjectBuildRequests()
+        for build_request in build_requests:
+            if build_request.project.name in shard_names:
+                selected_requests.append(build_request)
+            else:
+                self._leave_to_other_shard(build_request.project)
+        write_to_console(
+            f"Shard {shard}: {len(shard_names)} of {len(projects)} projects,"
+            f" {len(shared_names)} shared with other shards; building"
+            f" {len(selected_requests)} of {len(build_requests)} projects needing a"
+            " build"
+        )
+        return selected_requests
+
+    def _leave_to_other_shard(self, project: Project):
+        project.needs_build = False
+        project.left_to_other_shard = True
 
-    def build_standard_projects(self, projects: Projects) -> ProjectBuildRequests:
-        return BuildExecutor().execute_builds(
-            ProjectBuildRequests.standard_projects(projects)
+    def _report_makespan(
+        self,
+        build_requests: ProjectBuildRequests,
+        predicted_makespan: float,
+        duration_estimator: BuildDurationEstimator,
+    ):
+        timed_requests = [
+            build_request
+            for build_request in build_requests
+            if build_request.started_at is not None
+            and build_request.ended_at is not None
+        ]
+        if not timed_requests:
+            return
+        actual_makespan = max(
+            build_request.ended_at for build_request in timed_requests
+        ) - min(build_request.started_at for build_request in timed_requests)
+        message = (
+            f"Build time: {format_duration(actual_makespan)},"
+            f" predicted {format_duration(predicted_makespan)}"
         )
+        if duration_estimator.estimated_from_files:
+            message += (
+                f" ({duration_estimator.estimated_from_files} projects without"
+                " history estimated from their file count)"
+            )
+        write_to_console(message)
 
 
 if __name__ == "__main__":
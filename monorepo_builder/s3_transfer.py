@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.tracing import TraceManager
+
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class S3Object(NamedTuple):
+    key: str
+    size: int
+    etag: str
+
+
+def local_etag(filename: str, multipart: bool) -> str:
+    # S3 gives a single part upload the MD5 of its content, and a multipart upload
+    # the MD5 of its part MD5s followed by the part count.
+    with open(filename, "rb") as file:
+        if not multipart:
+            digest = hashlib.md5()
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+        part_digests = []
+        for part in iter(lambda: file.read(MULTIPART_CHUNK_SIZE), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+def is_same_file(filename: str, s3_object: S3Object) -> bool:
+    try:
+        size = os.path.getsize(filename)
+    except FileNotFoundError:
+        return False
+    if size != s3_object.size:
+        return False
+    return local_etag(filename, "-" in s3_object.etag) == s3_object.etag
+
+
+class S3InstallerStore:
+    def __init__(self, bucket: str, s3_client, transfer_workers: int):
+        self.bucket = bucket
+        self.s3_client = s3_client
+        self.transfer_workers = transfer_workers
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=MULTIPART_CONCURRENCY,
+        )
+        self.files_transferred = 0
+        self.files_skipped = 0
+        self.bytes_transferred = 0
+        self._objects: Optional[Dict[str, S3Object]] = None
+        self._lock = threading.Lock()
+
+    def objects(self) -> Dict[str, S3Object]:
+        with self._lock:
+            if self._objects is None:
+                self._objects = {}
+                paginator = self.s3_client.get_paginator("list_objects_v2")
+                for page in paginator.paginate(Bucket=self.bucket):
+                    for entry in page.get("Contents", []):
+                        self._objects[entry["Key"]] = S3Object(
+                            entry["Key"], entry["Size"], entry["ETag"].strip('"')
+                        )
+            return self._objects
+
+    def download(self, keys: Iterable[str], folder: str):
+        os.makedirs(folder, exist_ok=True)
+        objects = self.objects()
+        self._run_transfers(
+            self._download_file, [(objects[key], folder) for key in keys]
+        )
+
+    def upload(self, filenames: Iterable[str]):
+        self._run_transfers(self._upload_file, [(filename,) for filename in filenames])
+
+    def _download_file(self, s3_object: S3Object, folder: str):
+        filename = os.path.join(folder, s3_object.key)
+        if is_same_file(filename, s3_object):
+            self._count(transferred=False)
+            return
+        self.s3_client.download_file(
+            self.bucket, s3_object.key, filename, Config=self.transfer_config
+        )
+        self._count(transferred=True, size=s3_object.size)
+
+    def _upload_file(self, filename: str):
+        key = os.path.basename(filename)
+        s3_object = self.objects().get(key)
+        if s3_object is not None and is_same_file(filename, s3_object):
+            self._count(transferred=False)
+            return
+        self.s3_client.upload_file(
+            filename, self.bucket, key, Config=self.transfer_config
+        )
+        size = os.path.getsize(filename)
+        etag = local_etag(filename, size >= MULTIPART_CHUNK_SIZE)
+        with self._lock:
+            self._objects[key] = S3Object(key, size, etag)
+        self._count(transferred=True, size=size)
+
+    def _run_transfers(self, transfer, arguments: List[tuple]):
+        if len(arguments) <= 1:
+            for argument in arguments:
+                transfer(*argument)
+            return
+        with ThreadPoolExecutor(max_workers=self.transfer_workers) as pool:
+            for future in [pool.submit(transfer, *argument) for argument in arguments]:
+                future.result()
+
+    def _count(self, transferred: bool, size: int = 0):
+        with self._lock:
+            if transferred:
+                self.files_transferred += 1
+                self.bytes_transferred += size
+            else:
+                self.files_skipped += 1
+        TraceManager.count(
+            "s3 transfers",
+            files_transferred=int(transferred),
+            files_skipped=int(not transferred),
+            bytes_transferred=size,
+        )
+
+
+class S3ClientManager:
+    s3_client = None
+    installer_store: Optional[S3InstallerStore] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        # boto3 clients are thread safe, so every transfer shares one client and its
+        # connection pool.
+        with cls._lock:
+            if cls.s3_client is None:
+                configuration = ConfigurationManager.get()
+                pool_size = (
+                    configuration.s3_transfer_workers
+                    * MULTIPART_CONCURRENCY
+                    * max(1, configuration.build_jobs)
+                )
+                cls.s3_client = boto3.client(
+                    "s3", config=Config(max_pool_connections=pool_size)
+                )
+            return cls.s3_client
+
+    @classmethod
+    def get_installer_store(cls) -> S3InstallerStore:
+        configuration = ConfigurationManager.get()
+        s3_client = cls.get()
+        with cls._lock:
+            if cls.installer_store is None:
+                cls.installer_store = S3InstallerStore(
+                    configuration.installer_s3_bucket,
+                    s3_client,
+                    configuration.s3_transfer_workers,
+                )
+            return cls.installer_store
@@ -0,0 +1,84 @@
+import heapq
+import statistics
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.history import BuildHistoryManager, ProjectBuildStatistics
+from monorepo_builder.projects import Project
+
+DEFAULT_SECONDS_PER_FILE = 0.01
+
+
+class BuildDurationEstimator:
+    def __init__(self, project_statistics: Dict[str, ProjectBuildStatistics]):
+        self.project_statistics = project_statistics
+        self.estimated_from_history = 0
+        self.estimated_from_files = 0
+
+    @staticmethod
+    def build_duration_estimator_factory() -> "BuildDurationEstimator":
+        build_history = BuildHistoryManager.get()
+        if build_history is None:
+            return BuildDurationEstimator({})
+        return BuildDurationEstimator(
+            build_history.statistics(ConfigurationManager.get().history_window)
+        )
+
+    def estimate(self, projects: Iterable[Project]) -> Dict[str, float]:
+        projects = list(projects)
+        seconds_per_file = self._seconds_per_file(projects)
+        durations: Dict[str, float] = {}
+        for project in projects:
+            duration = self._historical_duration(project)
+            if duration is None:
+                # Without history, a project's size is the best guess at its build time.
+                duration = max(1, len(project.file_list)) * seconds_per_file
+                self.estimated_from_files += 1
+            else:
+                self.estimated_from_history += 1
+            durations[project.name] = duration
+        return durations
+
+    def _historical_duration(self, project: Project) -> Optional[float]:
+        project_statistics = self.project_statistics.get(project.name)
+        if project_statistics is None:
+            return None
+        return project_statistics.p50
+
+    def _seconds_per_file(self, projects: List[Project]) -> float:
+        rates = [
+            duration / len(project.file_list)
+            for project, duration in (
+                (project, self._historical_duration(project)) for project in projects
+            )
+            if duration is not None and len(project.file_list) > 0
+        ]
+        return statistics.median(rates) if rates else DEFAULT_SECONDS_PER_FILE
+
+
+def simulate_makespan(
+    build_graph: BuildGraph, durations: Dict[str, float], workers: int
+) -> float:
+    # Replays the executor: whenever a worker is free it takes the ready project with
+    # the longest critical path.
+    priorities = build_graph.critical_path_lengths(durations)
+    dependents = build_graph.dependents_by_name()
+    remaining = {
+        name: len(dependencies & dependents.keys())
+        for name, dependencies in build_graph.dependencies.items()
+    }
+    ready = [name for name, count in remaining.items() if count == 0]
+    running: List[Tuple[float, str]] = []
+    now = 0.0
+    while ready or running:
+        ready.sort(key=lambda name: priorities[name])
+        while ready and len(running) < max(1, workers):
+            name = ready.pop()
+            heapq.heappush(running, (now + durations.get(name, 0.0), name))
+        now, name = heapq.heappop(running)
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    return now
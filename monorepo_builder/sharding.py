@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from monorepo_builder.build_graph import BuildGraph
+
+SHARD_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    count: int
+
+    @staticmethod
+    def parse(value: str) -> "Shard":
+        match = SHARD_PATTERN.match(value)
+        if match is None:
+            raise InvalidShardException(value)
+        shard = Shard(int(match.group(1)), int(match.group(2)))
+        if not 1 <= shard.index <= shard.count:
+            raise InvalidShardException(value)
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+@dataclass
+class PlannedShard:
+    # How many of the shard's projects need each name, so a shared library stays until
+    # its last user leaves.
+    names: Dict[str, int] = field(default_factory=dict)
+    load: float = 0.0
+
+
+class ShardPlanner:
+    def __init__(self, build_graph: BuildGraph, durations: Dict[str, float]):
+        self.build_graph = build_graph
+        self.durations = durations
+
+    def plan(self, shard_count: int) -> List[Set[str]]:
+        # Projects nothing else waits on are shared out longest first, each to the
+        # shard it adds the least time to. A shard also builds every library its
+        # projects use, so libraries can be built by more than one shard.
+        dependents = self.build_graph.dependents_by_name()
+        required = {
+            name: self._required_names(name)
+            for name, names in dependents.items()
+            if not names
+        }
+        unit_names = sorted(
+            required, key=lambda name: (-self._duration_of(required[name]), name)
+        )
+        shards = [PlannedShard() for _ in range(shard_count)]
+        assignments: Dict[str, int] = {}
+        for name in unit_names:
+            best = min(
+                range(shard_count),
+                key=lambda index: (
+                    shards[index].load
+                    + self._added_duration(shards[index], required[name]),
+                    index,
+                ),
+            )
+            self._add(shards[best], required[name])
+            assignments[name] = best
+        self._improve(unit_names, required, assignments, shards)
+        return [set(shard.names) for shard in shards]
+
+    def _improve(
+        self,
+        unit_names: List[str],
+        required: Dict[str, Set[str]],
+        assignments: Dict[str, int],
+        shards: "List[PlannedShard]",
+    ):
+        # Placing one project at a time can split projects that share a long library
+        # build, so projects are moved while a move shortens the longer of the two
+        # shards involved.
+        for _ in range(len(unit_names)):
+            moved = False
+            for name in unit_names:
+                source = shards[assignments[name]]
+                source_load = source.load - self._removed_duration(
+                    source, required[name]
+                )
+                for index, target in enumerate(shards):
+                    if target is source:
+                        continue
+                    target_load = target.load + self._added_duration(
+                        target, required[name]
+                    )
+                    if max(source_load, target_load) < max(source.load, target.load):
+                        self._remove(source, required[name])
+                        self._add(target, required[name])
+                        assignments[name] = index
+                        moved = True
+                        break
+            if not moved:
+                return
+
+    def _added_duration(self, shard: "PlannedShard", names: Set[str]) -> float:
+        return self._duration_of(names - shard.names.keys())
+
+    def _removed_duration(self, shard: "PlannedShard", names: Set[str]) -> float:
+        return self._duration_of({name for name in names if shard.names[name] == 1})
+
+    def _add(self, shard: "PlannedShard", names: Set[str]):
+        shard.load += self._added_duration(shard, names)
+        for name in names:
+            shard.names[name] = shard.names.get(name, 0) + 1
+
+    def _remove(self, shard: "PlannedShard", names: Set[str]):
+        shard.load -= self._removed_duration(shard, names)
+        for name in names:
+            shard.names[name] -= 1
+            if shard.names[name] == 0:
+                del shard.names[name]
+
+    def _required_names(self, name: str) -> Set[str]:
+        names = {name}
+        pending = [name]
+        while pending:
+            for dependency in self.build_graph.dependencies_for(pending.pop()):
+                if (
+                    dependency in self.build_graph.dependencies
+                    and dependency not in names
+                ):
+                    names.add(dependency)
+                    pending.append(dependency)
+        return names
+
+    def _duration_of(self, names: Set[str]) -> float:
+        return sum(self.durations.get(name, 0.0) for name in names)
+
+
+class InvalidShardException(Exception):
+    def __init__(self, value: str):
+        super().__init__(
+            f"Invalid shard {value}, expected INDEX/COUNT with 1 <= INDEX <= COUNT"
+        )
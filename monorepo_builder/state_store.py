@@ -0,0 +1,209 @@
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from monorepo_builder.configuration import ConfigurationManager
+from monorepo_builder.console import write_to_console
+from monorepo_builder.file_list import FileList
+from monorepo_builder.projects import Project
+
+SCHEMA_VERSION = "1"
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS projects ("
+    " name TEXT PRIMARY KEY,"
+    " project_path TEXT NOT NULL,"
+    " file_list BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS versions ("
+    " project_path TEXT PRIMARY KEY,"
+    " version TEXT NOT NULL)",
+]
+
+
+class StateStore:
+    def __init__(self, filename: str):
+        self.connection = sqlite3.connect(
+            filename, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        with self.transaction():
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+            self.set_metadata("schema_version", SCHEMA_VERSION)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            if self._transaction_depth == 0:
+                self.connection.execute("BEGIN IMMEDIATE")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self.connection.execute("ROLLBACK")
+                raise
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.connection.execute("COMMIT")
+
+    def close(self):
+        self.connection.close()
+
+    def get_metadata(self, key: str) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT value FROM metadata WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_metadata(self, key: str, value: str):
+        with self.transaction():
+            self.connection.execute(
+                "INSERT INTO metadata (key, value) VALUES (?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def project_names(self) -> List[str]:
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT name FROM projects ORDER BY name"
+            )
+        ]
+
+    def load_project(self, name: str) -> Optional[Project]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT project_path, file_list FROM projects WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        project_path, file_list = row
+        return Project(
+            project_path=project_path,
+            file_list=FileList.from_bytes(project_path, file_list),
+        )
+
+    def save_projects(
+        self, projects: Iterable[Project], kept_names: Iterable[str] = ()
+    ):
+        with self.transaction():
+            saved_names = set(kept_names)
+            for project in projects:
+                self.save_project(project)
+                saved_names.add(project.name)
+            for name in set(self.project_names()) - saved_names:
+                self.delete_project(name)
+
+    def save_project(self, project: Project):
+        with self.transaction():
+            self.connection.execute(
+                "INSERT INTO projects (name, project_path, file_list) VALUES (?, ?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET"
+                " project_path = excluded.project_path,"
+                " file_list = excluded.file_list"
+                " WHERE project_path != excluded.project_path"
+                " OR file_list != excluded.file_list",
+                (project.name, project.project_path, project.file_list.to_bytes()),
+            )
+
+    def delete_project(self, name: str):
+        with self.transaction():
+            self.connection.execute("DELETE FROM projects WHERE name = ?", (name,))
+
+    def load_versions(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(
+                self.connection.execute("SELECT project_path, version FROM versions")
+            )
+
+    def save_versions(self, versions: Dict[str, str]):
+        with self.transaction():
+            stored_versions = self.load_versions()
+            self.connection.executemany(
+                "INSERT INTO versions (project_path, version) VALUES (?, ?)"
+                " ON CONFLICT (project_path) DO UPDATE SET version = excluded.version",
+                [
+                    (project_path, version)
+                    for project_path, version in versions.items()
+                    if stored_versions.get(project_path) != version
+                ],
+            )
+            self.connection.executemany(
+                "DELETE FROM versions WHERE project_path = ?",
+                [
+                    (project_path,)
+                    for project_path in stored_versions
+                    if project_path not in versions
+                ],
+            )
+
+
+@dataclass(frozen=True)
+class PickledFile:
+    file: str
+    last_changed_time: float
+    content_hash: Optional[str] = None
+
+
+class PickledStateUnpickler(pickle.Unpickler):
+    # The pickled lists hold the File dataclass that has since become FileList.
+    def find_class(self, module: str, name: str):
+        if (module, name) == ("monorepo_builder.projects", "File"):
+            return PickledFile
+        return super().find_class(module, name)
+
+
+class PickledStateMigration:
+    def migrate(self, state_store: StateStore):
+        configuration = ConfigurationManager.get()
+        project_list_file = Path(configuration.project_list_filename)
+        version_list_file = Path(configuration.version_list_filename)
+        with state_store.transaction():
+            state_store.set_metadata("pickle_migration", "complete")
+            if not project_list_file.exists() and not version_list_file.exists():
+                return
+            write_to_console("Migrating the pickled project and version lists")
+            if project_list_file.exists():
+                with open(project_list_file, "rb") as file:
+                    projects = PickledStateUnpickler(file).load()
+                for project in projects:
+                    project.file_list = FileList.from_files(
+                        project.project_path, project.file_list
+                    )
+                state_store.save_projects(projects)
+            if version_list_file.exists():
+                with open(version_list_file, "rb") as file:
+                    state_store.save_versions(pickle.load(file))
+
+
+class StateStoreManager:
+    state_store: Optional[StateStore] = None
+    _open_lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> StateStore:
+        with cls._open_lock:
+            if not cls.state_store:
+                state_store = StateStore(
+                    ConfigurationManager.get().state_store_filename
+                )
+                if state_store.get_metadata("pickle_migration") is None:
+                    PickledStateMigration().migrate(state_store)
+                cls.state_store = state_store
+        return cls.state_store
+
+    @classmethod
+    def close(cls):
+        if cls.state_store:
+            cls.state_store.close()
+            cls.state_store = None
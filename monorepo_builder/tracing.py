@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+RUNNER_TRACK = "Runner"
+
+
+class Tracer:
+    def __init__(self, started_at_ns: Optional[int] = None):
+        self.events: List[Dict] = []
+        self.started_at_ns = (
+            time.perf_counter_ns() if started_at_ns is None else started_at_ns
+        )
+        self.process_id = os.getpid()
+        self._track_ids: Dict[str, int] = {}
+        self._counter_totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, track: str = RUNNER_TRACK, **args):
+        started_at_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add_span(name, started_at_ns, time.perf_counter_ns(), track, **args)
+
+    def add_span(
+        self,
+        name: str,
+        started_at_ns: int,
+        ended_at_ns: int,
+        track: str = RUNNER_TRACK,
+        **args,
+    ):
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": self._microseconds(started_at_ns),
+            "dur": (ended_at_ns - started_at_ns) / 1000,
+            "pid": self.process_id,
+        }
+        if args:
+            event["args"] = args
+        self._add(event, track)
+
+    def count(self, name: str, **increments):
+        with self._lock:
+            totals = self._counter_totals.setdefault(name, {})
+            for key, increment in increments.items():
+                totals[key] = totals.get(key, 0) + increment
+            values = dict(totals)
+        self._add(
+            {
+                "name": name,
+                "ph": "C",
+                "ts": self._microseconds(time.perf_counter_ns()),
+                "pid": self.process_id,
+                "args": values,
+            },
+            RUNNER_TRACK,
+        )
+
+    def trace_events(self) -> List[Dict]:
+        with self._lock:
+            # Each track is shown as a thread, named by a metadata event, in the order
+            # it was first used.
+            metadata = [
+                event
+                for track, track_id in self._track_ids.items()
+                for event in (
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self.process_id,
+                        "tid": track_id,
+                        "args": {"name": track},
+                    },
+                    {
+                        "name": "thread_sort_index",
+                        "ph": "M",
+                        "pid": self.process_id,
+                        "tid": track_id,
+                        "args": {"sort_index": track_id},
+                    },
+                )
+            ]
+            return metadata + list(self.events)
+
+    def save(self, filename: str):
+        with open(filename, "w") as trace_file:
+            json.dump(
+                {"traceEvents": self.trace_events(), "displayTimeUnit": "ms"},
+                trace_file,
+            )
+
+    def _add(self, event: Dict, track: str):
+        with self._lock:
+            event["tid"] = self._track_ids.setdefault(track, len(self._track_ids))
+            self.events.append(event)
+
+    def _microseconds(self, timestamp_ns: int) -> float:
+        return (timestamp_ns - self.started_at_ns) / 1000
+
+
+class TraceManager:
+    tracer: Optional[Tracer] = None
+
+    @classmethod
+    def start(cls, started_at_ns: Optional[int] = None) -> Tracer:
+        cls.tracer = Tracer(started_at_ns)
+        return cls.tracer
+
+    @classmethod
+    def stop(cls) -> Optional[Tracer]:
+        tracer = cls.tracer
+        cls.tracer = None
+        return tracer
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str, track: str = RUNNER_TRACK, **args):
+        if cls.tracer is None:
+            yield
+            return
+        with cls.tracer.span(name, track, **args):
+            yield
+
+    @classmethod
+    def count(cls, name: str, **increments):
+        if cls.tracer is not None:
+            cls.tracer.count(name, **increments)
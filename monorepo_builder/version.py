@@ -1,10 +1,8 @@
-import pickle
-from pathlib import Path
 from typing import Dict, Optional
 
-from monorepo_builder.configuration import ConfigurationManager
 from monorepo_builder.project_list import Projects
 from monorepo_builder.projects import Project
+from monorepo_builder.state_store import StateStoreManager
 
 
 class ProjectVersions(dict, Dict[str, str]):
@@ -45,14 +43,7 @@ class ProjectVersionManager:
         pass
 
     def load_previous_version_list(self) -> ProjectVersions:
-        version_filename = ConfigurationManager.get().version_list_filename
-        file = Path(version_filename)
-        if not file.exists():
-            return ProjectVersions()
-        with open(version_filename, "rb") as file:
-            return pickle.load(file)
+        return ProjectVersions(StateStoreManager.get().load_versions())
 
     def save_version_list(self, project_versions: ProjectVersions):
-        version_filename = ConfigurationManager.get().version_list_filename
-        with open(version_filename, "wb") as file:
-            pickle.dump(project_versions, file)
+        StateStoreManager.get().save_versions(project_versions)
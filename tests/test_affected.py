@@ -0,0 +1,101 @@
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from monorepo_builder.affected import (
+    AffectedProjectsFinder,
+    GitDiffException,
+    ProjectPathTrie,
+)
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.projects import Project
+
+
+def git(folder, *arguments):
+    subprocess.run(["git", *arguments], cwd=folder, check=True, capture_output=True)
+
+
+def commit(folder, message):
+    git(folder, "add", ".")
+    git(folder, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def monorepo(mocker, tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "builder@example.com")
+    git(tmp_path, "config", "user.name", "builder")
+    for project_folder, requirements in [
+        ("libraries/lib1", ""),
+        ("libraries/lib2", "lib1"),
+        ("platform/group/app1", "lib2"),
+        ("platform/app2", ""),
+        ("web/site", "lib1"),
+    ]:
+        (tmp_path / project_folder).mkdir(parents=True)
+        (tmp_path / project_folder / "requirements.txt").write_text(requirements)
+        (tmp_path / project_folder / "main.py").write_text("")
+    (tmp_path / "readme.md").write_text("")
+    commit(tmp_path, "initial")
+    configuration = Configuration(monorepo_root_folder=str(tmp_path))
+    mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+    yield tmp_path
+
+
+class TestProjectPathTrie:
+    def test_find_project_for_file(self):
+        project = MagicMock(spec=Project)
+        trie = ProjectPathTrie()
+        trie.add("platform/group/app", project)
+
+        assert trie.find("platform/group/app/src/main.py") is project
+        assert trie.find("platform/group/app") is project
+
+    def test_find_file_outside_projects(self):
+        trie = ProjectPathTrie()
+        trie.add("platform/app", MagicMock(spec=Project))
+
+        assert trie.find("platform/application/main.py") is None
+        assert trie.find("platform/readme.md") is None
+        assert trie.find("readme.md") is None
+
+
+class TestAffectedProjectsFinder:
+    def test_find_changed_standard_project(self, monorepo):
+        (monorepo / "platform" / "app2" / "main.py").write_text("change")
+        (monorepo / "readme.md").write_text("change")
+        commit(monorepo, "change")
+
+        result = AffectedProjectsFinder().find("HEAD~1")
+
+        assert [project.name for project in result] == ["app2"]
+
+    def test_find_includes_library_dependents(self, monorepo):
+        (monorepo / "libraries" / "lib1" / "main.py").write_text("change")
+        commit(monorepo, "change")
+
+        result = AffectedProjectsFinder().find("HEAD~1")
+
+        assert [project.name for project in result] == [
+            "lib1",
+            "lib2",
+            "app1",
+            "site",
+        ]
+
+    def test_find_does_not_read_dependencies_without_library_changes(
+        self, mocker, monorepo
+    ):
+        (monorepo / "web" / "site" / "main.py").write_text("change")
+        commit(monorepo, "change")
+        read_dependency_names_spy = mocker.spy(Project, "read_dependency_names")
+
+        result = AffectedProjectsFinder().find("HEAD~1")
+
+        assert [project.name for project in result] == ["site"]
+        read_dependency_names_spy.assert_not_called()
+
+    def test_find_with_unknown_ref(self, monorepo):
+        with pytest.raises(GitDiffException):
+            AffectedProjectsFinder().find("missing")
@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from monorepo_builder.artifact_cache import (
+    ArtifactCache,
+    ArtifactCacheManager,
+    ArtifactCacheStatistics,
+    HttpArtifactStore,
+    RemoteArtifactStore,
+    RemoteCacheException,
+    S3ArtifactStore,
+    artifact_keys,
+)
+from monorepo_builder.cache_server import cache_server_factory
+from monorepo_builder.configuration import (
+    ConfigurationManager,
+    Configuration,
+    RemoteCacheType,
+)
+from monorepo_builder.dependencies import DependencyIndex
+from monorepo_builder.file_list import FileList
+from monorepo_builder.project_list import Projects
+from monorepo_builder.projects import Project
+from monorepo_builder.s3_transfer import S3ClientManager
+
+KEY = "a" * 40
+
+
+def make_dist_folder(folder, **files):
+    os.makedirs(folder)
+    for name, content in files.items():
+        with open(os.path.join(folder, name), "w") as file:
+            file.write(content)
+
+
+class TestArtifactCache:
+    def test_store_and_restore(self, tmp_path):
+        make_dist_folder(tmp_path / "dist", installer="built")
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024 * 1024)
+        artifact_cache.store("key", str(tmp_path / "dist"))
+        make_dist_folder(tmp_path / "restored", stale="left over")
+
+        result = artifact_cache.restore("key", str(tmp_path / "restored"))
+
+        assert result is True
+        assert os.listdir(tmp_path / "restored") == ["installer"]
+        assert (tmp_path / "restored" / "installer").read_text() == "built"
+        assert artifact_cache.statistics == ArtifactCacheStatistics(hits=1, stored=1)
+
+    def test_restore_missing_artifact(self, tmp_path):
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024 * 1024)
+
+        result = artifact_cache.restore("key", str(tmp_path / "dist"))
+
+        assert result is False
+        assert not (tmp_path / "dist").exists()
+        assert artifact_cache.statistics == ArtifactCacheStatistics(misses=1)
+
+    def test_store_without_dist_folder(self, tmp_path):
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024 * 1024)
+
+        artifact_cache.store("key", str(tmp_path / "dist"))
+
+        assert artifact_cache.artifact_count() == 0
+
+    def test_store_evicts_least_recently_used(self, tmp_path):
+        make_dist_folder(tmp_path / "dist", installer="x" * 4000)
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024 * 1024)
+        for key, used_at in [("first", 100), ("second", 300), ("third", 200)]:
+            artifact_cache.store(key, str(tmp_path / "dist"))
+            os.utime(tmp_path / "cache" / f"{key}.tar", (used_at, used_at))
+        artifact_cache.max_size = 2 * artifact_cache.size() // 3
+
+        artifact_cache.store("fourth", str(tmp_path / "dist"))
+
+        assert sorted(os.listdir(tmp_path / "cache")) == [
+            "fourth.tar",
+            "second.tar",
+        ]
+        assert artifact_cache.statistics.evicted == 2
+
+    def test_save_statistics_adds_to_saved_statistics(self, tmp_path):
+        os.makedirs(tmp_path / "cache")
+        (tmp_path / "cache" / "statistics.json").write_text(
+            json.dumps({"hits": 2, "misses": 1, "stored": 1, "evicted": 0})
+        )
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024)
+        artifact_cache.statistics = ArtifactCacheStatistics(hits=1, misses=1)
+
+        artifact_cache.save_statistics()
+
+        assert artifact_cache.load_statistics() == ArtifactCacheStatistics(
+            hits=3, misses=2, stored=1
+        )
+        assert artifact_cache.load_statistics().hit_rate == 0.6
+
+    def test_clear(self, tmp_path):
+        make_dist_folder(tmp_path / "dist", installer="built")
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024 * 1024)
+        artifact_cache.store("key", str(tmp_path / "dist"))
+
+        artifact_cache.clear()
+
+        assert artifact_cache.artifact_count() == 0
+        assert artifact_cache.size() == 0
+
+
+class TestArtifactCacheManager:
+    def test_get_when_not_configured(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+
+        assert ArtifactCacheManager.get() is None
+
+    def test_get(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(
+                artifact_cache_folder="cache", artifact_cache_max_size_mb=2
+            ),
+        )
+        mocker.patch.object(ArtifactCacheManager, "artifact_cache", None)
+
+        result = ArtifactCacheManager.get()
+
+        assert str(result.folder) == "cache"
+        assert result.max_size == 2 * 1024 * 1024
+        assert result.remote is None
+        assert ArtifactCacheManager.get() is result
+
+    def test_get_with_s3_remote_uses_installer_bucket(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(
+                artifact_cache_folder="cache",
+                remote_cache_type=RemoteCacheType.s3,
+                installer_s3_bucket="installers",
+            ),
+        )
+        mocker.patch.object(ArtifactCacheManager, "artifact_cache", None)
+
+        result = ArtifactCacheManager.get()
+
+        assert result.remote.bucket == "installers"
+        assert result.remote.prefix == "build-cache/"
+
+
+class TestArtifactKeys:
+    def make_projects(self, modified_time):
+        projects = Projects()
+        projects.extend(
+            [
+                Project(
+                    project_path="/repo/libraries/lib1",
+                    file_list=FileList("/repo/libraries/lib1", ["a"], [1], [0]),
+                ),
+                Project(
+                    project_path="/repo/libraries/lib2",
+                    file_list=FileList(
+                        "/repo/libraries/lib2", ["a"], [modified_time], [0]
+                    ),
+                ),
+                Project(
+                    project_path="/repo/platform/app",
+                    file_list=FileList("/repo/platform/app", ["a"], [1], [0]),
+                ),
+            ]
+        )
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("lib1", set())
+        dependency_index.add_project("lib2", {"lib1"})
+        dependency_index.add_project("app", {"lib2"})
+        projects._dependency_index = dependency_index
+        return projects
+
+    def test_keys_change_with_dependencies(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+
+        current = artifact_keys(self.make_projects(modified_time=1))
+        previous = artifact_keys(self.make_projects(modified_time=2))
+
+        assert sorted(current) == ["app", "lib1", "lib2"]
+        assert current["lib1"] == previous["lib1"]
+        assert current["lib2"] != previous["lib2"]
+        assert current["app"] != previous["app"]
+
+    def test_keys_do_not_depend_on_project_order(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        projects = self.make_projects(modified_time=1)
+        reversed_projects = Projects()
+        reversed_projects.extend(reversed(projects))
+        reversed_projects._dependency_index = projects.dependency_index
+
+        assert artifact_keys(projects) == artifact_keys(reversed_projects)
+
+
+@pytest.fixture
+def server_url(tmp_path):
+    server = cache_server_factory(str(tmp_path / "remote"), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class TestHttpArtifactStore:
+    def test_upload_and_download(self, tmp_path, server_url):
+        (tmp_path / "artifact.tar").write_bytes(b"artifact")
+        store = HttpArtifactStore(server_url + "/")
+        store.upload(KEY, str(tmp_path / "artifact.tar"))
+
+        result = store.download(KEY, str(tmp_path / "downloaded.tar"))
+
+        assert result is True
+        assert (tmp_path / "downloaded.tar").read_bytes() == b"artifact"
+
+    def test_download_missing_artifact(self, tmp_path, server_url):
+        result = HttpArtifactStore(server_url).download(
+            KEY, str(tmp_path / "downloaded.tar")
+        )
+
+        assert result is False
+
+    def test_download_when_unreachable(self, tmp_path):
+        with pytest.raises(RemoteCacheException):
+            HttpArtifactStore("http://127.0.0.1:1").download(
+                KEY, str(tmp_path / "downloaded.tar")
+            )
+
+
+class TestS3ArtifactStore:
+    def test_download(self, mocker):
+        s3_client = mocker.patch.object(S3ClientManager, "get").return_value
+
+        result = S3ArtifactStore("bucket", "cache/").download(KEY, "file")
+
+        assert result is True
+        s3_client.download_file.assert_called_once_with(
+            "bucket", f"cache/{KEY}.tar", "file"
+        )
+
+    def test_download_missing_artifact(self, mocker):
+        s3_client = mocker.patch.object(S3ClientManager, "get").return_value
+        s3_client.download_file.side_effect = ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+
+        assert S3ArtifactStore("bucket", "cache/").download(KEY, "file") is False
+
+    def test_download_denied(self, mocker):
+        s3_client = mocker.patch.object(S3ClientManager, "get").return_value
+        s3_client.download_file.side_effect = ClientError(
+            {"Error": {"Code": "403"}}, "HeadObject"
+        )
+
+        with pytest.raises(RemoteCacheException):
+            S3ArtifactStore("bucket", "cache/").download(KEY, "file")
+
+    def test_upload(self, mocker):
+        s3_client = mocker.patch.object(S3ClientManager, "get").return_value
+
+        S3ArtifactStore("bucket", "cache/").upload(KEY, "file")
+
+        s3_client.upload_file.assert_called_once_with(
+            "file", "bucket", f"cache/{KEY}.tar"
+        )
+
+
+class TestArtifactCacheWithRemote:
+    def test_artifact_built_on_one_agent_is_restored_on_another(
+        self, tmp_path, server_url
+    ):
+        make_dist_folder(tmp_path / "dist", installer="built")
+        first_agent = ArtifactCache(
+            str(tmp_path / "first"), 1024 * 1024, HttpArtifactStore(server_url)
+        )
+        second_agent = ArtifactCache(
+            str(tmp_path / "second"), 1024 * 1024, HttpArtifactStore(server_url)
+        )
+        first_agent.store(KEY, str(tmp_path / "dist"))
+
+        result = second_agent.restore(KEY, str(tmp_path / "restored"))
+
+        assert result is True
+        assert (tmp_path / "restored" / "installer").read_text() == "built"
+        assert first_agent.statistics.uploaded == 1
+        assert second_agent.statistics.remote_hits == 1
+        assert second_agent.artifact_count() == 1
+
+    def test_store_without_upload(self, tmp_path):
+        make_dist_folder(tmp_path / "dist", installer="built")
+        remote = MagicMock(spec=RemoteArtifactStore)
+        artifact_cache = ArtifactCache(
+            str(tmp_path / "cache"), 1024 * 1024, remote, upload=False
+        )
+
+        artifact_cache.store(KEY, str(tmp_path / "dist"))
+
+        remote.upload.assert_not_called()
+
+    def test_unreachable_remote_counts_as_miss(self, mocker, tmp_path):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.artifact_cache.write_to_console"
+        )
+        remote = MagicMock(spec=RemoteArtifactStore)
+        remote.download.side_effect = RemoteCacheException("remote", "refused")
+        artifact_cache = ArtifactCache(str(tmp_path / "cache"), 1024 * 1024, remote)
+
+        result = artifact_cache.restore(KEY, str(tmp_path / "dist"))
+
+        assert result is False
+        assert artifact_cache.statistics.misses == 1
+        assert list((tmp_path / "cache").iterdir()) == []
+        write_to_console_mock.assert_called_once_with(
+            "Unable to use the remote cache at remote: refused", color="yellow"
+        )
@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.generator import MonorepoGenerator, MonorepoSpec
+from benchmarks.suite import (
+    BenchmarkResult,
+    BenchmarkSuite,
+    compare_with_baseline,
+    results_document,
+)
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.project_list import Projects
+
+SMALL_SPEC = MonorepoSpec(
+    library_count=4,
+    standard_count=4,
+    files_per_project=5,
+    folder_depth=2,
+    dependency_fan_out=2,
+    installer_size=16,
+)
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+    return MonorepoGenerator(SMALL_SPEC).generate(str(tmp_path))
+
+
+class TestMonorepoGenerator:
+    def test_generate(self, mocker, monorepo):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(monorepo_root_folder=monorepo.root),
+        )
+
+        projects = Projects.projects_factory()
+
+        assert len(projects.library_projects) == 4
+        assert len(projects.standard_projects) == 4
+        assert {len(project.file_list) for project in projects} == {7}
+        for project in projects:
+            assert projects.dependency_index.dependencies_of(project.name) == set(
+                monorepo.dependencies[project.name]
+            )
+
+    def test_libraries_only_use_earlier_libraries(self, monorepo):
+        for index, path in enumerate(monorepo.library_paths):
+            dependencies = monorepo.dependencies[os.path.basename(path)]
+            assert len(dependencies) == min(index, 2)
+            assert all(
+                dependency < os.path.basename(path) for dependency in dependencies
+            )
+
+    def test_generate_is_repeatable(self, tmp_path):
+        first = MonorepoGenerator(SMALL_SPEC).generate(str(tmp_path / "first"))
+        second = MonorepoGenerator(SMALL_SPEC).generate(str(tmp_path / "second"))
+
+        assert first.dependencies == second.dependencies
+
+
+class TestBenchmarkSuite:
+    def test_run(self, monorepo):
+        previous_configuration = ConfigurationManager.configuration
+
+        results = BenchmarkSuite(monorepo, repeat=2).run()
+
+        assert [result.name for result in results][:5] == [
+            "scan projects",
+            "identify projects needing build",
+            "schedule builds",
+            "save state",
+            "load state",
+        ]
+        assert all(len(result.timings) == 2 for result in results)
+        assert ConfigurationManager.configuration is previous_configuration
+
+    def test_run_named_benchmarks(self, monorepo):
+        results = BenchmarkSuite(monorepo, repeat=1).run(["schedule builds"])
+
+        assert [result.name for result in results] == ["schedule builds"]
+
+    def test_identify_projects_needing_build_finds_the_changed_library(self, monorepo):
+        suite = BenchmarkSuite(monorepo, repeat=1)
+        with suite.configured():
+            suite.prepare()
+            projects = suite.fresh_projects(needs_build=False)
+            suite.fresh_projects = lambda needs_build: projects
+
+            suite.identify_projects_needing_build()
+
+        assert "lib-0000" in [
+            project.name for project in projects if project.needs_build
+        ]
+
+
+class TestBaselineComparison:
+    def test_compare_with_baseline(self):
+        baseline = results_document(
+            SMALL_SPEC,
+            [BenchmarkResult("scan", [1.0]), BenchmarkResult("load", [2.0])],
+        )
+
+        comparisons = compare_with_baseline(
+            [
+                BenchmarkResult("scan", [1.5, 1.4]),
+                BenchmarkResult("load", [2.1]),
+                BenchmarkResult("new", [1.0]),
+            ],
+            json.loads(json.dumps(baseline)),
+            0.25,
+        )
+
+        assert [
+            (comparison.name, comparison.regressed) for comparison in comparisons
+        ] == [("scan", True), ("load", False)]
+        assert comparisons[0].ratio == pytest.approx(1.4)
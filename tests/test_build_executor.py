@@ -1,7 +1,10 @@
+import os
+import threading
 from pathlib import Path
-from subprocess import CompletedProcess
 from unittest.mock import MagicMock, call
 
+from monorepo_builder.artifact_cache import ArtifactCache, ArtifactCacheManager
+from monorepo_builder.build_logs import BuildLogManager, ProjectLog
 from monorepo_builder.build_executor import (
     ProjectBuildRequests,
     ProjectBuildRequest,
@@ -9,24 +12,36 @@ from monorepo_builder.build_executor import (
     BuildExecutor,
     InstallerManager,
 )
+from monorepo_builder.build_graph import BuildGraph
 from monorepo_builder.configuration import (
     ConfigurationManager,
     Configuration,
+    FailureMode,
     InstallerLocationType,
+    ProvisioningMode,
 )
 from monorepo_builder.project_list import Projects
 from monorepo_builder.projects import Project, ProjectType
+from monorepo_builder.s3_transfer import S3ClientManager, S3InstallerStore
 
 
 class TestProjectBuildRequests:
     def test_library_projects_filters_to_library_projects_needing_build(self, mocker):
         lib1 = MagicMock(
-            spec=Project, project_type=ProjectType.Library, needs_build=True
+            spec=Project,
+            project_path="path1",
+            project_type=ProjectType.Library,
+            needs_build=True,
         )
         lib2 = MagicMock(
-            spec=Project, project_type=ProjectType.Library, needs_build=False
+            spec=Project,
+            project_path="path2",
+            project_type=ProjectType.Library,
+            needs_build=False,
+        )
+        std = MagicMock(
+            spec=Project, project_path="path3", project_type=ProjectType.Standard
         )
-        std = MagicMock(spec=Project, project_type=ProjectType.Standard)
         projects = Projects()
         projects.extend([lib1, lib2, std])
         req = MagicMock(spec=ProjectBuildRequest)
@@ -41,12 +56,20 @@ class TestProjectBuildRequests:
         project_build_request_mock.assert_called_once_with(project=lib1)
 
     def test_standard_projects_filters_as_expected(self, mocker):
-        lib = MagicMock(spec=Project, project_type=ProjectType.Library)
+        lib = MagicMock(
+            spec=Project, project_path="path1", project_type=ProjectType.Library
+        )
         std1 = MagicMock(
-            spec=Project, project_type=ProjectType.Standard, needs_build=True
+            spec=Project,
+            project_path="path2",
+            project_type=ProjectType.Standard,
+            needs_build=True,
         )
         std2 = MagicMock(
-            spec=Project, project_type=ProjectType.Standard, needs_build=False
+            spec=Project,
+            project_path="path3",
+            project_type=ProjectType.Standard,
+            needs_build=False,
         )
         projects = Projects()
         projects.extend([lib, std1, std2])
@@ -101,100 +124,599 @@ class TestProjectBuildRequests:
         assert len(result) == 1
         assert request1 in result
 
+    def test_all_projects_puts_libraries_first(self, mocker):
+        lib = MagicMock(spec=ProjectBuildRequest)
+        std = MagicMock(spec=ProjectBuildRequest)
+        mocker.patch.object(
+            ProjectBuildRequests,
+            "library_projects",
+            return_value=ProjectBuildRequests([lib]),
+        )
+        mocker.patch.object(
+            ProjectBuildRequests,
+            "standard_projects",
+            return_value=ProjectBuildRequests([std]),
+        )
+
+        result = ProjectBuildRequests.all_projects(MagicMock(spec=Projects))
+
+        assert result == [lib, std]
+
+    def test_cancelled_builds_are_not_failed(self):
+        request1 = MagicMock(
+            spec=ProjectBuildRequest,
+            build_status=BuildRequestStatus.Cancelled,
+            run_successful=False,
+        )
+        request2 = MagicMock(
+            spec=ProjectBuildRequest,
+            build_status=BuildRequestStatus.Complete,
+            run_successful=False,
+        )
+        requests = ProjectBuildRequests()
+        requests.extend([request1, request2])
+
+        assert requests.cancelled == [request1]
+        assert requests.failed == [request2]
+        assert requests.success is False
+
+    def test_skipped_builds(self):
+        request1 = MagicMock(
+            spec=ProjectBuildRequest, build_status=BuildRequestStatus.Skipped
+        )
+        request2 = MagicMock(
+            spec=ProjectBuildRequest, build_status=BuildRequestStatus.Complete
+        )
+        requests = ProjectBuildRequests()
+        requests.extend([request1, request2])
+
+        assert requests.skipped == [request1]
+
+
+def make_project(name: str) -> Project:
+    project = MagicMock(spec=Project, project_type=ProjectType.Standard)
+    project.name = name
+    return project
+
 
 class TestBuildExecutor:
     def test_execute_builds(self, mocker):
-        run_build_mock = mocker.patch.object(BuildExecutor, "run_build")
-        copy_distributable_mock = mocker.patch.object(
-            InstallerManager, "copy_installer_to_shared_folder"
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(build_jobs=1)
+        )
+        build_and_publish_mock = mocker.patch.object(
+            BuildExecutor,
+            "build_and_publish",
+            side_effect=lambda request: setattr(request, "run_successful", True),
         )
         project_build_requests = ProjectBuildRequests()
-        project_1 = MagicMock(spec=Project, project_type=ProjectType.Library)
-        build_request_1 = MagicMock(spec=ProjectBuildRequest, project=project_1)
-        project_2 = MagicMock(spec=Project, project_type=ProjectType.Standard)
-        build_request_2 = MagicMock(spec=ProjectBuildRequest, project=project_2)
+        build_request_1 = ProjectBuildRequest(project=make_project("lib"))
+        build_request_2 = ProjectBuildRequest(project=make_project("std"))
         project_build_requests.extend([build_request_1, build_request_2])
+        build_graph = BuildGraph({"lib": set(), "std": {"lib"}})
 
-        result = BuildExecutor().execute_builds(project_build_requests)
+        result = BuildExecutor().execute_builds(project_build_requests, build_graph)
 
         assert result is project_build_requests
-        assert run_build_mock.call_args_list == [
+        assert build_and_publish_mock.call_args_list == [
             call(build_request_1),
             call(build_request_2),
         ]
-        copy_distributable_mock.assert_called_once_with(build_request_1)
+
+    def test_execute_builds_starts_the_longest_critical_path_first(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(build_jobs=1)
+        )
+        started = []
+
+        def build(request):
+            started.append(request.project.name)
+            request.run_successful = True
+
+        mocker.patch.object(BuildExecutor, "build_and_publish", side_effect=build)
+        project_build_requests = ProjectBuildRequests()
+        for name, duration in [("leaf", 5.0), ("lib", 1.0), ("std", 10.0)]:
+            build_request = ProjectBuildRequest(project=make_project(name))
+            build_request.estimated_duration = duration
+            project_build_requests.append(build_request)
+        build_graph = BuildGraph({"leaf": set(), "lib": set(), "std": {"lib"}})
+
+        BuildExecutor().execute_builds(project_build_requests, build_graph)
+
+        assert started == ["lib", "std", "leaf"]
+
+    def test_execute_builds_builds_independent_projects_concurrently(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(build_jobs=2)
+        )
+        both_started = threading.Barrier(2, timeout=5)
+
+        def build(request):
+            both_started.wait()
+            request.run_successful = True
+
+        mocker.patch.object(BuildExecutor, "build_and_publish", side_effect=build)
+        project_build_requests = ProjectBuildRequests()
+        project_build_requests.extend(
+            [
+                ProjectBuildRequest(project=make_project("one")),
+                ProjectBuildRequest(project=make_project("two")),
+            ]
+        )
+        build_graph = BuildGraph({"one": set(), "two": set()})
+
+        BuildExecutor().execute_builds(project_build_requests, build_graph)
+
+        assert project_build_requests.success is True
+
+    def test_execute_builds_starts_dependents_when_their_libraries_finish(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(build_jobs=2)
+        )
+        slow_library_release = threading.Event()
+        finished = []
+
+        def build(request):
+            if request.project.name == "slow-lib":
+                assert slow_library_release.wait(timeout=5)
+            if request.project.name == "std":
+                slow_library_release.set()
+            finished.append(request.project.name)
+            request.run_successful = True
+
+        mocker.patch.object(BuildExecutor, "build_and_publish", side_effect=build)
+        project_build_requests = ProjectBuildRequests()
+        project_build_requests.extend(
+            [
+                ProjectBuildRequest(project=make_project("slow-lib")),
+                ProjectBuildRequest(project=make_project("fast-lib")),
+                ProjectBuildRequest(project=make_project("std")),
+            ]
+        )
+        build_graph = BuildGraph(
+            {"slow-lib": set(), "fast-lib": set(), "std": {"fast-lib"}}
+        )
+
+        BuildExecutor().execute_builds(project_build_requests, build_graph)
+
+        assert finished == ["fast-lib", "std", "slow-lib"]
+
+    def test_execute_builds_skips_projects_depending_on_failed_builds(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(build_jobs=2)
+        )
+
+        def build(request):
+            request.run_successful = request.project.name != "lib"
+
+        build_and_publish_mock = mocker.patch.object(
+            BuildExecutor, "build_and_publish", side_effect=build
+        )
+        lib_request = ProjectBuildRequest(project=make_project("lib"))
+        std_request = ProjectBuildRequest(project=make_project("std"))
+        nested_request = ProjectBuildRequest(project=make_project("nested"))
+        other_request = ProjectBuildRequest(project=make_project("other"))
+        project_build_requests = ProjectBuildRequests()
+        project_build_requests.extend(
+            [nested_request, lib_request, std_request, other_request]
+        )
+        build_graph = BuildGraph(
+            {"lib": set(), "std": {"lib"}, "nested": {"std"}, "other": set()}
+        )
+
+        BuildExecutor().execute_builds(project_build_requests, build_graph)
+
+        assert build_and_publish_mock.call_count == 2
+        assert std_request.build_status == BuildRequestStatus.Skipped
+        assert nested_request.build_status == BuildRequestStatus.Skipped
+        assert other_request.run_successful is True
+        assert project_build_requests.failed == [lib_request]
+        assert project_build_requests.skipped == [nested_request, std_request]
+
+    def test_execute_builds_stops_starting_builds_after_a_failure(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(
+                build_jobs=1, failure_mode=FailureMode.finish_running
+            ),
+        )
+
+        def build(request):
+            request.run_successful = request.project.name != "lib"
+
+        build_and_publish_mock = mocker.patch.object(
+            BuildExecutor, "build_and_publish", side_effect=build
+        )
+        lib_request = ProjectBuildRequest(project=make_project("lib"))
+        lib_request.estimated_duration = 2.0
+        other_request = ProjectBuildRequest(project=make_project("other"))
+        other_request.estimated_duration = 1.0
+        project_build_requests = ProjectBuildRequests([lib_request, other_request])
+        build_graph = BuildGraph({"lib": set(), "other": set()})
+        build_executor = BuildExecutor()
+
+        build_executor.execute_builds(project_build_requests, build_graph)
+
+        build_and_publish_mock.assert_called_once_with(lib_request)
+        assert other_request.build_status == BuildRequestStatus.Skipped
+        assert build_executor.stop_reason == "lib failed"
+        assert build_executor.cancel_reason is None
+
+    def test_execute_builds_cancels_running_builds_after_a_failure(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(build_jobs=2, failure_mode=FailureMode.cancel),
+        )
+        build_executor = BuildExecutor()
+        slow_log = MagicMock(spec=ProjectLog)
+        slow_released = threading.Event()
+        slow_log.terminate.side_effect = lambda reason: slow_released.set()
+        build_executor._project_logs["slow"] = slow_log
+
+        def build(request):
+            if request.project.name == "slow":
+                assert slow_released.wait(timeout=5)
+                build_executor.cancel_build(request, build_executor.cancel_reason)
+            else:
+                request.run_successful = False
+
+        mocker.patch.object(BuildExecutor, "build_and_publish", side_effect=build)
+        slow_request = ProjectBuildRequest(project=make_project("slow"))
+        slow_request.estimated_duration = 2.0
+        lib_request = ProjectBuildRequest(project=make_project("lib"))
+        lib_request.estimated_duration = 1.0
+        project_build_requests = ProjectBuildRequests([slow_request, lib_request])
+        build_graph = BuildGraph({"slow": set(), "lib": set()})
+
+        build_executor.execute_builds(project_build_requests, build_graph)
+
+        slow_log.terminate.assert_called_once_with("lib failed")
+        assert project_build_requests.failed == [lib_request]
+        assert project_build_requests.cancelled == [slow_request]
+
+    def test_execute_builds_cancels_builds_when_the_run_times_out(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(build_jobs=1, run_timeout_seconds=1),
+        )
+        build_executor = BuildExecutor()
+        hung_log = MagicMock(spec=ProjectLog)
+        hung_released = threading.Event()
+        hung_log.terminate.side_effect = lambda reason: hung_released.set()
+        build_executor._project_logs["hung"] = hung_log
+
+        def build(request):
+            assert hung_released.wait(timeout=5)
+            build_executor.cancel_build(request, build_executor.cancel_reason)
+
+        mocker.patch.object(BuildExecutor, "build_and_publish", side_effect=build)
+        hung_request = ProjectBuildRequest(project=make_project("hung"))
+        std_request = ProjectBuildRequest(project=make_project("std"))
+        project_build_requests = ProjectBuildRequests([hung_request, std_request])
+        build_graph = BuildGraph({"hung": set(), "std": {"hung"}})
+
+        build_executor.execute_builds(project_build_requests, build_graph)
+
+        hung_log.terminate.assert_called_once_with("the run timed out after 1s")
+        assert hung_request.build_status == BuildRequestStatus.Cancelled
+        assert std_request.build_status == BuildRequestStatus.Skipped
+
+    def test_build_and_publish_library(self, mocker):
+        run_build_mock = mocker.patch.object(BuildExecutor, "run_build")
+        copy_distributable_mock = mocker.patch.object(
+            InstallerManager, "copy_installer_to_shared_folder"
+        )
+        project = MagicMock(spec=Project, project_type=ProjectType.Library)
+        build_request = MagicMock(
+            spec=ProjectBuildRequest, project=project, run_successful=True
+        )
+
+        BuildExecutor().build_and_publish(build_request)
+
+        run_build_mock.assert_called_once_with(build_request)
+        copy_distributable_mock.assert_called_once_with(build_request)
+
+    def test_build_and_publish_failed_library_is_not_published(self, mocker):
+        mocker.patch.object(BuildExecutor, "run_build")
+        copy_distributable_mock = mocker.patch.object(
+            InstallerManager, "copy_installer_to_shared_folder"
+        )
+        project = MagicMock(spec=Project, project_type=ProjectType.Library)
+        build_request = MagicMock(
+            spec=ProjectBuildRequest, project=project, run_successful=False
+        )
+
+        BuildExecutor().build_and_publish(build_request)
+
+        copy_distributable_mock.assert_not_called()
+
+    def test_build_and_publish_standard_project(self, mocker):
+        run_build_mock = mocker.patch.object(BuildExecutor, "run_build")
+        copy_distributable_mock = mocker.patch.object(
+            InstallerManager, "copy_installer_to_shared_folder"
+        )
+        project = MagicMock(spec=Project, project_type=ProjectType.Standard)
+        build_request = MagicMock(
+            spec=ProjectBuildRequest, project=project, run_successful=True
+        )
+
+        BuildExecutor().build_and_publish(build_request)
+
+        run_build_mock.assert_called_once_with(build_request)
+        copy_distributable_mock.assert_not_called()
 
     def test_run_build_successful(self, mocker):
         mocker.patch("monorepo_builder.build_executor.write_to_console")
-        subprocess_mock = mocker.patch("monorepo_builder.build_executor.subprocess")
-        subprocess_mock.PIPE = "pipe"
-        subprocess_mock.STDOUT = "stdout"
-        run_result = MagicMock(spec=CompletedProcess, returncode=0)
-        subprocess_mock.run.return_value = run_result
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        project_log = MagicMock(spec=ProjectLog)
+        project_log.run.return_value = 0
+        mocker.patch.object(
+            BuildLogManager, "project_log_factory", return_value=project_log
+        )
         project = MagicMock(spec=Project, project_path="here", needs_build=True)
         build_request = MagicMock(spec=ProjectBuildRequest, project=project)
         copy_installers_mock = mocker.patch.object(
             InstallerManager, "copy_installers_to_project"
         )
 
+        mocker.patch.object(BuildExecutor, "restore_artifact", return_value=False)
+        store_artifact_mock = mocker.patch.object(BuildExecutor, "store_artifact")
+
         BuildExecutor().run_build(build_request)
 
         assert build_request.run_successful is True
         assert build_request.build_status == BuildRequestStatus.Complete
-        subprocess_mock.run.assert_called_once_with(["./build.sh"], cwd="here")
-        copy_installers_mock.assert_called_once_with(project)
+        project_log.run.assert_called_once_with(["./build.sh"], "here", None)
+        copy_installers_mock.assert_called_once_with(
+            project, build_request.library_versions
+        )
+        store_artifact_mock.assert_called_once_with(build_request)
 
     def test_run_build_failed(self, mocker):
         mocker.patch("monorepo_builder.build_executor.write_to_console")
-        subprocess_mock = mocker.patch("monorepo_builder.build_executor.subprocess")
-        subprocess_mock.PIPE = "pipe"
-        subprocess_mock.STDOUT = "stdout"
-        run_result = MagicMock(spec=CompletedProcess, returncode=1)
-        subprocess_mock.run.return_value = run_result
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        project_log = MagicMock(spec=ProjectLog, termination_reason=None)
+        project_log.run.return_value = 1
+        mocker.patch.object(
+            BuildLogManager, "project_log_factory", return_value=project_log
+        )
         project = MagicMock(spec=Project, project_path="here", needs_build=True)
         build_request = MagicMock(spec=ProjectBuildRequest, project=project)
         copy_installers_mock = mocker.patch.object(
             InstallerManager, "copy_installers_to_project"
         )
 
+        mocker.patch.object(BuildExecutor, "restore_artifact", return_value=False)
+        store_artifact_mock = mocker.patch.object(BuildExecutor, "store_artifact")
+        report_failure_mock = mocker.patch.object(BuildExecutor, "report_failure")
+
         BuildExecutor().run_build(build_request)
 
         assert build_request.run_successful is False
         assert build_request.build_status == BuildRequestStatus.Complete
-        subprocess_mock.run.assert_called_once_with(["./build.sh"], cwd="here")
-        copy_installers_mock.assert_called_once_with(project)
+        assert build_request.exit_code == 1
+        project_log.run.assert_called_once_with(["./build.sh"], "here", None)
+        copy_installers_mock.assert_called_once_with(
+            project, build_request.library_versions
+        )
+        store_artifact_mock.assert_not_called()
+        report_failure_mock.assert_called_once_with(build_request, project_log)
+
+    def test_run_build_with_a_timeout(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(
+                build_timeout_seconds=600, project_build_timeouts={"slow": 1200}
+            ),
+        )
+        mocker.patch.object(BuildExecutor, "restore_artifact", return_value=False)
+        mocker.patch.object(InstallerManager, "copy_installers_to_project")
+        report_failure_mock = mocker.patch.object(BuildExecutor, "report_failure")
+        project_log = MagicMock(
+            spec=ProjectLog, termination_reason="timed out after 1200s", timed_out=True
+        )
+        project_log.run.return_value = -15
+        mocker.patch.object(
+            BuildLogManager, "project_log_factory", return_value=project_log
+        )
+        project = make_project("slow")
+        project.project_path = "here"
+        project.needs_build = True
+        build_request = ProjectBuildRequest(project=project)
+
+        BuildExecutor().run_build(build_request)
+
+        project_log.run.assert_called_once_with(["./build.sh"], "here", 1200)
+        assert build_request.build_status == BuildRequestStatus.Complete
+        assert build_request.run_successful is False
+        report_failure_mock.assert_called_once_with(build_request, project_log)
+
+    def test_run_build_cancelled_while_running(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        mocker.patch.object(BuildExecutor, "restore_artifact", return_value=False)
+        mocker.patch.object(InstallerManager, "copy_installers_to_project")
+        report_failure_mock = mocker.patch.object(BuildExecutor, "report_failure")
+        project_log = MagicMock(
+            spec=ProjectLog, termination_reason="lib failed", timed_out=False
+        )
+        project_log.run.return_value = -15
+        mocker.patch.object(
+            BuildLogManager, "project_log_factory", return_value=project_log
+        )
+        project = make_project("app")
+        project.project_path = "here"
+        project.needs_build = True
+        build_request = ProjectBuildRequest(project=project)
+        build_executor = BuildExecutor()
+
+        build_executor.run_build(build_request)
+
+        assert build_request.build_status == BuildRequestStatus.Cancelled
+        assert build_request.run_successful is False
+        assert build_request.exit_code == -15
+        assert build_executor._project_logs == {}
+        report_failure_mock.assert_not_called()
+
+    def test_run_build_after_builds_were_cancelled(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(BuildExecutor, "restore_artifact", return_value=False)
+        mocker.patch.object(InstallerManager, "copy_installers_to_project")
+        project_log_factory_mock = mocker.patch.object(
+            BuildLogManager, "project_log_factory"
+        )
+        project = make_project("app")
+        project.needs_build = True
+        build_request = ProjectBuildRequest(project=project)
+        build_executor = BuildExecutor()
+        build_executor.stop("lib failed", True)
+
+        build_executor.run_build(build_request)
+
+        project_log_factory_mock.assert_not_called()
+        assert build_request.build_status == BuildRequestStatus.Cancelled
+
+    def test_report_failure_of_a_terminated_build(self, mocker):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.build_executor.write_to_console"
+        )
+        project_log = ProjectLog("app", ".build-logs/app.log", 2)
+        project_log.add_line("compiling")
+        project_log.termination_reason = "timed out after 30s"
+        build_request = ProjectBuildRequest(project=make_project("app"))
+        build_request.exit_code = -15
+
+        BuildExecutor().report_failure(build_request, project_log)
+
+        assert write_to_console_mock.call_args_list[0] == call(
+            "app timed out after 30s, last 1 of 1 lines of .build-logs/app.log:",
+            color="red",
+            bold=True,
+        )
+
+    def test_report_failure(self, mocker):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.build_executor.write_to_console"
+        )
+        project_log = ProjectLog("app", ".build-logs/app.log", 2)
+        for line in ["one", "two", "three"]:
+            project_log.add_line(line)
+        build_request = ProjectBuildRequest(project=make_project("app"))
+        build_request.exit_code = 2
+
+        BuildExecutor().report_failure(build_request, project_log)
+
+        assert write_to_console_mock.call_args_list == [
+            call(
+                "app failed with exit code 2, last 2 of 3 lines of .build-logs/app.log:",
+                color="red",
+                bold=True,
+            ),
+            call("  two"),
+            call("  three"),
+        ]
 
     def test_run_build_not_needed(self, mocker):
-        subprocess_mock = mocker.patch("monorepo_builder.build_executor.subprocess")
+        project_log_factory_mock = mocker.patch.object(
+            BuildLogManager, "project_log_factory"
+        )
         project = MagicMock(spec=Project, project_path="here", needs_build=False)
         build_request = MagicMock(spec=ProjectBuildRequest, project=project)
 
         BuildExecutor().run_build(build_request)
 
         assert build_request.build_status == BuildRequestStatus.NotNeeded
-        subprocess_mock.run.assert_not_called()
+        project_log_factory_mock.assert_not_called()
+
+    def test_run_build_restored_from_artifact_cache(self, mocker):
+        project_log_factory_mock = mocker.patch.object(
+            BuildLogManager, "project_log_factory"
+        )
+        mocker.patch.object(BuildExecutor, "restore_artifact", return_value=True)
+        project = MagicMock(spec=Project, project_path="here", needs_build=True)
+        build_request = MagicMock(spec=ProjectBuildRequest, project=project)
+
+        BuildExecutor().run_build(build_request)
+
+        project_log_factory_mock.assert_not_called()
+
+    def test_restore_artifact(self, mocker):
+        mocker.patch("monorepo_builder.build_executor.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(project_distributable_folder="dist"),
+        )
+        artifact_cache = MagicMock(spec=ArtifactCache)
+        artifact_cache.restore.return_value = True
+        mocker.patch.object(ArtifactCacheManager, "get", return_value=artifact_cache)
+        project = MagicMock(spec=Project, project_path="here")
+        build_request = ProjectBuildRequest(project=project)
+        build_request.artifact_key = "key"
+
+        result = BuildExecutor().restore_artifact(build_request)
+
+        assert result is True
+        assert build_request.run_successful is True
+        assert build_request.build_status == BuildRequestStatus.Complete
+        artifact_cache.restore.assert_called_once_with("key", "here/dist")
+
+    def test_restore_artifact_without_key(self, mocker):
+        artifact_cache = MagicMock(spec=ArtifactCache)
+        mocker.patch.object(ArtifactCacheManager, "get", return_value=artifact_cache)
+        build_request = ProjectBuildRequest(project=MagicMock(spec=Project))
+
+        result = BuildExecutor().restore_artifact(build_request)
+
+        assert result is False
+        artifact_cache.restore.assert_not_called()
+
+    def test_store_artifact(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(project_distributable_folder="dist"),
+        )
+        artifact_cache = MagicMock(spec=ArtifactCache)
+        mocker.patch.object(ArtifactCacheManager, "get", return_value=artifact_cache)
+        project = MagicMock(spec=Project, project_path="here")
+        build_request = ProjectBuildRequest(project=project)
+        build_request.artifact_key = "key"
+
+        BuildExecutor().store_artifact(build_request)
+
+        artifact_cache.store.assert_called_once_with("key", "here/dist")
 
 
 class TestInstallerManager:
-    def test_copy_installer_to_shared_folder(self, mocker):
+    def test_copy_installer_to_shared_folder(self, mocker, tmp_path):
         configuration = MagicMock(
             spec=Configuration,
-            installer_folder="to",
+            installer_folder=str(tmp_path / "installers"),
             project_distributable_folder="dist",
             installer_location_type=InstallerLocationType.folder,
         )
         mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        project = MagicMock(spec=Project, project_path="from")
+        (tmp_path / "installers").mkdir()
+        (tmp_path / "installers" / "lib1-1.0.tgz").write_text("old")
+        (tmp_path / "lib1" / "dist").mkdir(parents=True)
+        (tmp_path / "lib1" / "dist" / "lib1-1.0.tgz").write_text("new")
+        project = MagicMock(spec=Project, project_path=str(tmp_path / "lib1"))
         project_build_request = MagicMock(spec=ProjectBuildRequest, project=project)
-        file = MagicMock(spec=Path, **{"__str__.return_value": "installer"})
-        path_mock = mocker.patch.object(Path, "__init__", return_value=None)
-        mocker.patch.object(Path, "iterdir", return_value=[file])
-        copy_mock = mocker.patch("monorepo_builder.build_executor.shutil.copy")
 
         InstallerManager().copy_installer_to_shared_folder(project_build_request)
 
-        path_mock.assert_called_once_with("from/dist")
-        copy_mock.assert_called_once_with("installer", "to")
+        assert os.listdir(tmp_path / "installers") == ["lib1-1.0.tgz"]
+        assert (tmp_path / "installers" / "lib1-1.0.tgz").read_text() == "new"
 
     def test_copy_installer_to_s3(self, mocker):
         configuration = MagicMock(
@@ -208,28 +730,29 @@ class TestInstallerManager:
         project = MagicMock(spec=Project, project_path="from")
         project_build_request = MagicMock(spec=ProjectBuildRequest, project=project)
         file = MagicMock(spec=Path, **{"__str__.return_value": "installer"})
-        file.name = "Ismael"
         path_mock = mocker.patch.object(Path, "__init__", return_value=None)
         mocker.patch.object(Path, "iterdir", return_value=[file])
-        bucket_mock = MagicMock()
-        client_mock = mocker.patch("monorepo_builder.build_executor.boto3.client")
-        client_mock.return_value.Bucket.return_value = bucket_mock
+        installer_store = MagicMock(spec=S3InstallerStore)
+        mocker.patch.object(
+            S3ClientManager, "get_installer_store", return_value=installer_store
+        )
 
         InstallerManager().copy_installer_to_shared_folder(project_build_request)
 
         path_mock.assert_called_once_with("from/dist")
-        client_mock.assert_called_once_with("s3")
-        client_mock.return_value.Bucket.assert_called_once_with("bucket")
-        bucket_mock.upload_file.assert_called_once_with("installer", "Ismael")
+        assert list(installer_store.upload.call_args[0][0]) == ["installer"]
 
     def test_copy_installers_from_shared_folder_to_project(self, mocker):
         configuration = MagicMock(
             spec=Configuration,
             installer_folder="from",
             installer_location_type=InstallerLocationType.folder,
+            installer_provisioning=ProvisioningMode.hardlink,
         )
         mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        copytree_mock = mocker.patch("monorepo_builder.build_executor.shutil.copytree")
+        folder_provisioner_mock = mocker.patch(
+            "monorepo_builder.build_executor.FolderProvisioner"
+        )
         path_join_mock = mocker.patch(
             "monorepo_builder.build_executor.os.path.join", return_value="gohere"
         )
@@ -238,35 +761,187 @@ class TestInstallerManager:
         InstallerManager().copy_installers_to_project(project)
 
         path_join_mock.assert_called_once_with("here", "from")
-        copytree_mock.assert_called_once_with("from", "gohere")
+        folder_provisioner_mock.assert_called_once_with(ProvisioningMode.hardlink)
+        folder_provisioner_mock.return_value.provision.assert_called_once_with(
+            "from", "gohere", None
+        )
+
+    def test_copy_dependency_installers_from_shared_folder(
+        self, mocker, monkeypatch, tmp_path
+    ):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "installers").mkdir()
+        for name in [
+            "lib1-1.0-py3-none-any.whl",
+            "lib1-2.0-py3-none-any.whl",
+            "lib2-1.0.tgz",
+            "other-1.0.tar.gz",
+        ]:
+            (tmp_path / "installers" / name).write_text(name)
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(
+                installer_folder="installers",
+                installer_provisioning=ProvisioningMode.copy,
+            ),
+        )
+        project = Project(project_path=str(tmp_path / "app"))
+
+        InstallerManager().copy_installers_to_project(
+            project, {"lib1": "2.0", "lib2": None}
+        )
+
+        assert sorted(
+            path.name for path in (tmp_path / "app" / "installers").iterdir()
+        ) == [".provisioned", "lib1-2.0-py3-none-any.whl", "lib2-1.0.tgz"]
+        assert len(list((tmp_path / "installers").iterdir())) == 4
+
+    def test_copy_installers_with_an_absolute_installer_folder(self, mocker, tmp_path):
+        (tmp_path / "installers").mkdir()
+        for name in ["lib1-1.0-py3-none-any.whl", "other-1.0.tar.gz"]:
+            (tmp_path / "installers" / name).write_text(name)
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(installer_folder=str(tmp_path / "installers")),
+        )
+
+        InstallerManager().copy_installers_to_project(
+            Project(project_path=str(tmp_path / "app")), {"lib1": "1.0"}
+        )
+
+        assert sorted(path.name for path in (tmp_path / "installers").iterdir()) == [
+            "lib1-1.0-py3-none-any.whl",
+            "other-1.0.tar.gz",
+        ]
+
+    def test_select_installers(self):
+        result = InstallerManager().select_installers(
+            [
+                "my_lib-1.0-py3-none-any.whl",
+                "my_lib-2.0-py3-none-any.whl",
+                "my_lib-2.0.tar.gz",
+                "web-lib-3.1.0.tgz",
+                "other-2.0.zip",
+                "notes.txt",
+            ],
+            {"My.Lib": "2.0", "web_lib": "9.9"},
+        )
+
+        assert result == [
+            "my_lib-2.0-py3-none-any.whl",
+            "my_lib-2.0.tar.gz",
+            "web-lib-3.1.0.tgz",
+        ]
+
+    def test_select_installers_of_scoped_npm_packages(self):
+        result = InstallerManager().select_installers(
+            [
+                "acme-ui-kit-1.2.0.tgz",
+                "acme-ui-kit-1.1.0.tgz",
+                "kit-2.0.tgz",
+                "acme-tools-kit-1.0.tgz",
+            ],
+            {"ui-kit": "1.2.0", "kit": "2.0"},
+        )
+
+        assert result == ["acme-ui-kit-1.2.0.tgz", "kit-2.0.tgz"]
+
+    def test_select_installers_warns_about_libraries_without_installers(self, mocker):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.build_executor.write_to_console"
+        )
+
+        result = InstallerManager().select_installers(
+            ["my_lib-1.0-py3-none-any.whl"], {"my_lib": "1.0", "missing-lib": "2.0"}
+        )
+
+        assert result == ["my_lib-1.0-py3-none-any.whl"]
+        write_to_console_mock.assert_called_once_with(
+            "No installer found for library missing-lib", color="yellow"
+        )
 
     def test_copy_installers_from_s3_to_project(self, mocker):
         configuration = MagicMock(
             spec=Configuration,
             installer_folder="from",
-            installer_s3_bucket="bucket",
             installer_location_type=InstallerLocationType.s3,
         )
         mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        path_join_mock = mocker.patch(
-            "monorepo_builder.build_executor.os.path.join",
-            side_effect=["gohere", "first", "second"],
+        installer_store = MagicMock(spec=S3InstallerStore)
+        installer_store.objects.return_value = {
+            "file1": MagicMock(),
+            "file2": MagicMock(),
+            "build-cache/artifact.tar": MagicMock(),
+        }
+        mocker.patch.object(
+            S3ClientManager, "get_installer_store", return_value=installer_store
         )
+        prune_mock = mocker.patch("monorepo_builder.build_executor.prune_provisioned")
         project = MagicMock(spec=Project, project_path="here")
-        bucket_mock = MagicMock(
-            objects=[MagicMock(key="file1"), MagicMock(key="file2")]
-        )
-        client_mock = mocker.patch("monorepo_builder.build_executor.boto3.client")
-        client_mock.return_value.Bucket.return_value = bucket_mock
 
         InstallerManager().copy_installers_to_project(project)
 
-        assert path_join_mock.call_args_list == [
-            call("here", "from"),
-            call("gohere", "file1"),
-            call("gohere", "file2"),
-        ]
-        assert bucket_mock.download_file.call_args_list == [
-            call("file1", "first"),
-            call("file2", "second"),
+        installer_store.download.assert_called_once_with(
+            ["file1", "file2"], "here/from"
+        )
+        prune_mock.assert_called_once_with("here/from", {"file1", "file2"})
+
+    def test_copy_dependency_installers_from_s3(self, mocker):
+        configuration = MagicMock(
+            spec=Configuration,
+            installer_folder="from",
+            installer_location_type=InstallerLocationType.s3,
+        )
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        installer_store = MagicMock(spec=S3InstallerStore)
+        installer_store.objects.return_value = {
+            "lib1-1.0.tgz": MagicMock(),
+            "lib2-1.0.tgz": MagicMock(),
+        }
+        mocker.patch.object(
+            S3ClientManager, "get_installer_store", return_value=installer_store
+        )
+        prune_mock = mocker.patch("monorepo_builder.build_executor.prune_provisioned")
+        project = MagicMock(spec=Project, project_path="here")
+
+        InstallerManager().copy_installers_to_project(project, {"lib2": "1.0"})
+
+        installer_store.download.assert_called_once_with(["lib2-1.0.tgz"], "here/from")
+        prune_mock.assert_called_once_with("here/from", {"lib2-1.0.tgz"})
+
+    def test_copy_installers_from_s3_removes_stale_installers(self, mocker, tmp_path):
+        configuration = MagicMock(
+            spec=Configuration,
+            installer_folder="installers",
+            installer_location_type=InstallerLocationType.s3,
+        )
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        installer_store = MagicMock(spec=S3InstallerStore)
+        installer_store.objects.return_value = {
+            "lib1-1.0.tgz": MagicMock(),
+            "lib1-2.0.tgz": MagicMock(),
+        }
+
+        def download(keys, folder):
+            os.makedirs(folder, exist_ok=True)
+            for key in keys:
+                Path(folder, key).write_text(key)
+
+        installer_store.download.side_effect = download
+        mocker.patch.object(
+            S3ClientManager, "get_installer_store", return_value=installer_store
+        )
+        project = MagicMock(spec=Project, project_path=str(tmp_path))
+        (tmp_path / "installers").mkdir()
+        (tmp_path / "installers" / "notes.txt").write_text("kept")
+
+        InstallerManager().copy_installers_to_project(project, {"lib1": "1.0"})
+        InstallerManager().copy_installers_to_project(project, {"lib1": "2.0"})
+
+        assert sorted(os.listdir(tmp_path / "installers")) == [
+            ".provisioned",
+            "lib1-2.0.tgz",
+            "notes.txt",
         ]
@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from monorepo_builder.build_executor import ProjectBuildRequest, ProjectBuildRequests
+from monorepo_builder.build_graph import BuildGraph, BuildGraphCycleException
+from monorepo_builder.dependencies import DependencyIndex
+from monorepo_builder.projects import Project
+
+
+def make_request(name: str):
+    project = MagicMock(spec=Project)
+    project.name = name
+    return ProjectBuildRequest(project=project)
+
+
+class TestBuildGraph:
+    def test_build_graph_factory_keeps_dependencies_being_built(self):
+        requests = ProjectBuildRequests()
+        requests.extend(
+            [make_request("lib1"), make_request("lib2"), make_request("std1")]
+        )
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("lib1", set())
+        dependency_index.add_project("lib2", {"lib1", "unbuilt"})
+        dependency_index.add_project("std1", {"lib2"})
+
+        result = BuildGraph.build_graph_factory(requests, dependency_index)
+
+        assert result.dependencies == {
+            "lib1": set(),
+            "lib2": {"lib1"},
+            "std1": {"lib2"},
+        }
+
+    def test_dependencies_for_unknown_project(self):
+        assert BuildGraph().dependencies_for("missing") == set()
+
+    def test_dependents_of(self):
+        build_graph = BuildGraph({"lib": set(), "one": {"lib"}, "two": {"lib"}})
+
+        assert build_graph.dependents_of("lib") == {"one", "two"}
+        assert build_graph.dependents_of("one") == set()
+
+    def test_critical_path_lengths(self):
+        build_graph = BuildGraph(
+            {
+                "lib1": set(),
+                "lib2": {"lib1"},
+                "std1": {"lib2"},
+                "std2": {"lib1"},
+                "std3": set(),
+            }
+        )
+
+        result = build_graph.critical_path_lengths(
+            {"lib1": 2.0, "lib2": 3.0, "std1": 1.0, "std2": 10.0, "std3": 4.0}
+        )
+
+        assert result == {
+            "lib1": 12.0,
+            "lib2": 4.0,
+            "std1": 1.0,
+            "std2": 10.0,
+            "std3": 4.0,
+        }
+
+    def test_critical_path_lengths_without_durations(self):
+        build_graph = BuildGraph({"lib": set(), "std": {"lib", "unbuilt"}})
+
+        assert build_graph.critical_path_lengths({}) == {"lib": 0.0, "std": 0.0}
+
+    def test_verify_no_cycles_raises_exception_for_cycle(self):
+        build_graph = BuildGraph({"lib1": {"lib2"}, "lib2": {"lib1"}, "std": set()})
+
+        with pytest.raises(BuildGraphCycleException) as excp:
+            build_graph.verify_no_cycles()
+
+        assert "lib1, lib2" in str(excp.value)
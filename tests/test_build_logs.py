@@ -0,0 +1,208 @@
+import queue
+import signal
+import time
+
+from monorepo_builder.build_logs import (
+    BuildLogManager,
+    LineRateLimiter,
+    LiveOutput,
+    ProjectLog,
+)
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+
+SCRIPT = "echo one; echo two >&2; echo three; exit 3"
+
+
+class TestProjectLog:
+    def test_run(self, tmp_path):
+        project_log = ProjectLog("app", str(tmp_path / "logs" / "app.log"), 2)
+
+        result = project_log.run(["sh", "-c", SCRIPT], str(tmp_path))
+
+        assert result == 3
+        assert (tmp_path / "logs" / "app.log").read_text() == "one\ntwo\nthree\n"
+        assert project_log.tail() == ["two", "three"]
+        assert project_log.line_count == 3
+
+    def test_run_with_live_output(self, tmp_path):
+        live_output = LiveOutput()
+        posted = []
+        live_output.post = posted.append
+        project_log = ProjectLog(
+            "app", str(tmp_path / "app.log"), 10, live_output, lines_per_second=2
+        )
+
+        project_log.run(["sh", "-c", SCRIPT], str(tmp_path))
+        live_output.close()
+
+        assert posted == [
+            "[app] one",
+            "[app] two",
+            f"[app] 1 more lines in {tmp_path / 'app.log'}",
+        ]
+        assert project_log.lines_not_shown == 1
+
+    def test_run_reads_long_output_without_blocking(self, tmp_path):
+        project_log = ProjectLog("app", str(tmp_path / "app.log"), 5)
+
+        result = project_log.run(
+            [
+                "sh",
+                "-c",
+                "i=0; while [ $i -lt 20000 ]; do echo line $i; i=$((i+1)); done",
+            ],
+            str(tmp_path),
+        )
+
+        assert result == 0
+        assert project_log.line_count == 20000
+        assert project_log.tail()[-1] == "line 19999"
+
+    def test_run_returns_when_build_leaves_a_background_process(self, mocker, tmp_path):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.build_logs.write_to_console"
+        )
+        project_log = ProjectLog("app", str(tmp_path / "app.log"), 5)
+        started_at = time.monotonic()
+
+        result = project_log.run(
+            ["sh", "-c", "echo started; sleep 30 & exit 0"], str(tmp_path)
+        )
+
+        assert time.monotonic() - started_at < 10
+        assert result == 0
+        assert project_log.termination_reason is None
+        assert project_log.tail() == ["started"]
+        write_to_console_mock.assert_called_once_with(
+            "app build.sh left processes running, stopping them", color="yellow"
+        )
+
+    def test_run_kills_the_process_group_when_it_times_out(self, tmp_path):
+        project_log = ProjectLog("app", str(tmp_path / "app.log"), 5)
+        started_at = time.monotonic()
+
+        result = project_log.run(
+            ["sh", "-c", "echo started; sleep 30 & sleep 30"], str(tmp_path), 0.5
+        )
+
+        assert time.monotonic() - started_at < 10
+        assert result == -signal.SIGTERM
+        assert project_log.timed_out is True
+        assert project_log.termination_reason == "timed out after 0.5s"
+        assert project_log.tail() == ["started"]
+
+    def test_run_kills_builds_that_ignore_the_terminate_signal(self, mocker, tmp_path):
+        mocker.patch("monorepo_builder.build_logs.TERMINATE_GRACE_SECONDS", 0.2)
+        project_log = ProjectLog("app", str(tmp_path / "app.log"), 5)
+
+        result = project_log.run(
+            ["sh", "-c", "trap '' TERM; sleep 30"], str(tmp_path), 0.2
+        )
+
+        assert result == -signal.SIGKILL
+
+    def test_terminate_before_the_build_starts(self, tmp_path):
+        project_log = ProjectLog("app", str(tmp_path / "app.log"), 5)
+
+        project_log.terminate("lib failed")
+        result = project_log.run(["sleep", "30"], str(tmp_path))
+
+        assert result == -signal.SIGTERM
+        assert project_log.termination_reason == "lib failed"
+        assert project_log.timed_out is False
+
+    def test_terminate_after_the_build_finished(self, tmp_path):
+        project_log = ProjectLog("app", str(tmp_path / "app.log"), 5)
+        project_log.run(["true"], str(tmp_path))
+
+        project_log.terminate("lib failed")
+
+        assert project_log.termination_reason is None
+
+
+class TestLineRateLimiter:
+    def test_allow(self, mocker):
+        monotonic_mock = mocker.patch(
+            "monorepo_builder.build_logs.time.monotonic", return_value=100.0
+        )
+        rate_limiter = LineRateLimiter(2)
+
+        allowed = [rate_limiter.allow() for _ in range(3)]
+        monotonic_mock.return_value = 100.5
+
+        assert allowed == [True, True, False]
+        assert rate_limiter.allow() is True
+        assert rate_limiter.allow() is False
+
+
+class TestLiveOutput:
+    def test_lines_are_written_in_order(self, mocker):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.build_logs.write_to_console"
+        )
+        live_output = LiveOutput()
+
+        live_output.post("[lib] one")
+        live_output.post("[app] two")
+        live_output.close()
+
+        assert [call[0][0] for call in write_to_console_mock.call_args_list] == [
+            "[lib] one",
+            "[app] two",
+        ]
+
+    def test_post_drops_lines_when_the_console_is_behind(self, mocker):
+        write_to_console_mock = mocker.patch(
+            "monorepo_builder.build_logs.write_to_console"
+        )
+        live_output = LiveOutput()
+        mocker.patch.object(live_output.lines, "put_nowait", side_effect=queue.Full())
+
+        result = live_output.post("[app] one")
+        live_output.close()
+
+        assert result is False
+        assert live_output.lines_dropped == 1
+        write_to_console_mock.assert_called_once_with(
+            "1 lines of build output were not shown, the console could not keep up",
+            color="yellow",
+        )
+
+
+class TestBuildLogManager:
+    def test_project_log_factory(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(build_log_folder="logs", build_log_tail_lines=7),
+        )
+        mocker.patch.object(BuildLogManager, "live_output", None)
+
+        project_log = BuildLogManager.project_log_factory("app")
+
+        assert project_log.filename == "logs/app.log"
+        assert project_log.tail_lines.maxlen == 7
+        assert project_log.live_output is None
+
+    def test_start_without_live_output(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(live_output_lines_per_second=0),
+        )
+        mocker.patch.object(BuildLogManager, "live_output", None)
+
+        BuildLogManager.start()
+
+        assert BuildLogManager.live_output is None
+
+    def test_start_and_stop(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        mocker.patch.object(BuildLogManager, "live_output", None)
+
+        BuildLogManager.start()
+        live_output = BuildLogManager.live_output
+        BuildLogManager.stop()
+
+        assert live_output is not None
+        assert BuildLogManager.live_output is None
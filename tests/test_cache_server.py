@@ -0,0 +1,54 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from monorepo_builder.cache_server import cache_server_factory
+
+KEY = "a" * 40
+
+
+@pytest.fixture
+def server_url(tmp_path):
+    server = cache_server_factory(str(tmp_path / "artifacts"), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(url, method="GET", data=None):
+    with urllib.request.urlopen(
+        urllib.request.Request(url, data=data, method=method)
+    ) as response:
+        return response.status, response.read()
+
+
+class TestCacheServer:
+    def test_put_then_get(self, tmp_path, server_url):
+        put_status, _ = request(f"{server_url}/{KEY}.tar", "PUT", b"artifact")
+
+        result = request(f"{server_url}/{KEY}.tar")
+
+        assert put_status == 201
+        assert result == (200, b"artifact")
+        assert (tmp_path / "artifacts" / f"{KEY}.tar").read_bytes() == b"artifact"
+
+    def test_get_missing_artifact(self, server_url):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(f"{server_url}/{KEY}.tar")
+
+        assert error.value.code == 404
+
+    @pytest.mark.parametrize(
+        "path", ["/../secret.tar", f"/nested/{KEY}.tar", "/ABC.tar", f"/{KEY}"]
+    )
+    def test_rejects_other_paths(self, tmp_path, server_url, path):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(f"{server_url}{path}", "PUT", b"artifact")
+
+        assert error.value.code == 404
+        assert list((tmp_path / "artifacts").iterdir()) == []
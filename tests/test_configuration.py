@@ -8,8 +8,12 @@ from monorepo_builder.configuration import (
     Configuration,
     ConfigurationManager,
     get_current_folder,
+    get_default_scan_workers,
     InvalidConfigurationSettingException,
     InvalidConfigurationException,
+    InvalidConfigurationValueException,
+    ChangeDetectionMode,
+    InstallerLocationType,
 )
 
 
@@ -27,6 +31,12 @@ def test_get_current_folder(mocker):
     assert result == "here"
 
 
+def test_get_default_scan_workers(mocker):
+    mocker.patch("monorepo_builder.configuration.os.cpu_count", return_value=4)
+
+    assert get_default_scan_workers() == 8
+
+
 class TestConfiguration:
     def test_default_value_standard_folder_list(self,):
         configuration = Configuration()
@@ -56,6 +66,23 @@ class TestConfiguration:
         assert configuration.skip_hidden_files is False
         assert configuration.project_list_filename == "list.me"
 
+    def test_build_from_settings_converts_enum_names(self):
+        configuration_settings = {
+            "config": {
+                "changeDetection": "content",
+                "installerLocationType": "s3",
+            }
+        }
+        configuration = Configuration.build_from_settings(configuration_settings)
+
+        assert configuration.change_detection_mode == ChangeDetectionMode.content
+        assert configuration.installer_location_type == InstallerLocationType.s3
+
+    def test_build_from_settings_raises_exception_with_invalid_enum_name(self):
+        configuration_settings = {"config": {"changeDetection": "guess"}}
+        with pytest.raises(InvalidConfigurationValueException):
+            Configuration.build_from_settings(configuration_settings)
+
     def test_build_from_settings_raises_exception_with_invalid_setting(self):
         configuration_settings = {"config": {"whatIsDat": "value"}}
         with pytest.raises(InvalidConfigurationSettingException) as excp:
@@ -119,3 +146,13 @@ class TestConfigurationManager:
         path_mock.assert_called_once_with("configuration file")
         build_from_settings_mock.assert_called_once_with(read_configuration)
         assert ConfigurationManager.configuration is configuration
+
+    def test_override_replaces_values_that_are_set(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "configuration", Configuration(build_jobs=1)
+        )
+
+        ConfigurationManager.override({"build_jobs": 4, "installer_folder": None})
+
+        assert ConfigurationManager.configuration.build_jobs == 4
+        assert ConfigurationManager.configuration.installer_folder == "./installers"
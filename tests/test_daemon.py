@@ -0,0 +1,236 @@
+import errno
+import os
+import shutil
+import socket
+import threading
+
+import pytest
+
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.daemon import (
+    DaemonClient,
+    InotifyWatcher,
+    ProjectStateDaemon,
+    IN_CREATE,
+    IN_Q_OVERFLOW,
+    RESPONSE_STALE,
+    decode_projects,
+    encode_projects,
+)
+from monorepo_builder.file_list import FileList
+from monorepo_builder.fingerprints import FileHashCacheManager
+from monorepo_builder.folder_cache import FolderListingCacheManager
+from monorepo_builder.projects import Project
+
+
+def make_project_folder(folder, *files):
+    folder.mkdir(parents=True)
+    (folder / "requirements.txt").write_text("")
+    for file in files:
+        (folder / file).write_text(file)
+
+
+@pytest.fixture
+def monorepo(mocker, tmp_path):
+    make_project_folder(tmp_path / "libraries" / "lib1", "main.py")
+    make_project_folder(tmp_path / "platform" / "app", "main.py")
+    configuration = Configuration(
+        monorepo_root_folder=str(tmp_path),
+        daemon_socket_filename=str(tmp_path / "daemon.sock"),
+    )
+    mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+    mocker.patch.object(FileHashCacheManager, "save")
+    mocker.patch.object(FolderListingCacheManager, "save")
+    yield tmp_path
+
+
+@pytest.fixture
+def project_state_daemon(monorepo):
+    watcher = InotifyWatcher()
+    project_state_daemon = ProjectStateDaemon(watcher)
+    project_state_daemon.start()
+    yield project_state_daemon
+    watcher.close()
+
+
+def file_names(project_state_daemon, project_path):
+    return project_state_daemon.projects[str(project_path)].file_list.paths()
+
+
+class TestInotifyWatcher:
+    def test_read_events(self, tmp_path):
+        watcher = InotifyWatcher()
+        watch_descriptor = watcher.add_watch(str(tmp_path))
+        (tmp_path / "file").write_text("")
+
+        result = watcher.read_events()
+        watcher.close()
+
+        assert (watch_descriptor, IN_CREATE, "file") in result
+
+    def test_read_events_when_nothing_changed(self, tmp_path):
+        watcher = InotifyWatcher()
+        watcher.add_watch(str(tmp_path))
+
+        assert watcher.read_events() == []
+        watcher.close()
+
+
+class TestProjectStateDaemon:
+    def test_start_scans_projects(self, monorepo, project_state_daemon):
+        assert sorted(project_state_daemon.projects) == [
+            str(monorepo / "libraries" / "lib1"),
+            str(monorepo / "platform" / "app"),
+        ]
+        assert file_names(project_state_daemon, monorepo / "platform" / "app") == [
+            "main.py",
+            "requirements.txt",
+        ]
+
+    def test_refresh_rescans_only_changed_projects(
+        self, mocker, monorepo, project_state_daemon
+    ):
+        os.mkdir(monorepo / "platform" / "app" / "src")
+        (monorepo / "platform" / "app" / "src" / "new.py").write_text("")
+        lib1 = project_state_daemon.projects[str(monorepo / "libraries" / "lib1")]
+        lib1_file_list = lib1.file_list
+
+        project_state_daemon.refresh()
+
+        assert file_names(project_state_daemon, monorepo / "platform" / "app") == [
+            "main.py",
+            "requirements.txt",
+            "src/new.py",
+        ]
+        assert lib1.file_list is lib1_file_list
+
+    def test_refresh_watches_new_folders(self, monorepo, project_state_daemon):
+        os.mkdir(monorepo / "platform" / "app" / "src")
+        project_state_daemon.refresh()
+        (monorepo / "platform" / "app" / "src" / "later.py").write_text("")
+
+        project_state_daemon.refresh()
+
+        assert "src/later.py" in file_names(
+            project_state_daemon, monorepo / "platform" / "app"
+        )
+
+    def test_refresh_finds_added_and_removed_projects(
+        self, monorepo, project_state_daemon
+    ):
+        make_project_folder(monorepo / "platform" / "group" / "new", "main.py")
+        shutil.rmtree(monorepo / "libraries" / "lib1")
+
+        project_state_daemon.refresh()
+
+        assert sorted(project_state_daemon.projects) == [
+            str(monorepo / "platform" / "app"),
+            str(monorepo / "platform" / "group" / "new"),
+        ]
+        assert file_names(
+            project_state_daemon, monorepo / "platform" / "group" / "new"
+        ) == ["main.py", "requirements.txt"]
+
+    def test_refresh_watches_folders_created_during_an_overflow(
+        self, monorepo, project_state_daemon
+    ):
+        os.mkdir(monorepo / "platform" / "app" / "src")
+        # The kernel dropped the events, and reported an overflow instead.
+        project_state_daemon.watcher.read_events()
+        project_state_daemon.handle_events([(-1, IN_Q_OVERFLOW, "")])
+        project_state_daemon.refresh()
+        (monorepo / "platform" / "app" / "src" / "later.py").write_text("")
+
+        project_state_daemon.refresh()
+
+        assert "src/later.py" in file_names(
+            project_state_daemon, monorepo / "platform" / "app"
+        )
+
+    def test_skipped_folders_are_not_watched(self, monorepo, project_state_daemon):
+        watch_count = len(project_state_daemon.watched_folders)
+        os.makedirs(monorepo / "platform" / "app" / "node_modules" / "x" / "y" / "z")
+        (monorepo / "platform" / "app" / "package-lock.json").write_text("")
+
+        project_state_daemon.handle_events(project_state_daemon.watcher.read_events())
+
+        assert len(project_state_daemon.watched_folders) == watch_count
+        assert project_state_daemon.rediscover is False
+        assert project_state_daemon.dirty_project_paths == set()
+
+    def test_daemon_is_stale_when_a_folder_cannot_be_watched(
+        self, mocker, monorepo, project_state_daemon
+    ):
+        mocker.patch("monorepo_builder.daemon.write_to_console")
+        mocker.patch.object(
+            project_state_daemon.watcher,
+            "add_watch",
+            side_effect=OSError(errno.ENOSPC, "No space left on device"),
+        )
+        os.mkdir(monorepo / "platform" / "app" / "src")
+
+        project_state_daemon.refresh()
+        client, server = socket.socketpair()
+        with client, server:
+            client.sendall(f"projects {project_state_daemon.settings_key}\n".encode())
+            project_state_daemon.handle_request(server)
+            response = client.recv(1)
+
+        assert project_state_daemon.stale is True
+        assert response == RESPONSE_STALE
+
+
+class TestDaemonClient:
+    def test_get_projects_without_daemon(self, monorepo):
+        assert DaemonClient().get_projects() is None
+
+    def test_get_projects_from_daemon(self, monorepo, project_state_daemon):
+        socket_filename = ConfigurationManager.get().daemon_socket_filename
+        server = threading.Thread(
+            target=project_state_daemon.serve, args=(socket_filename,)
+        )
+        server.start()
+        while not DaemonClient().is_running():
+            pass
+        (monorepo / "platform" / "app" / "added.py").write_text("")
+
+        result = DaemonClient().get_projects()
+        stopped = DaemonClient().stop()
+        server.join()
+
+        assert sorted(project.project_path for project in result) == sorted(
+            project_state_daemon.projects
+        )
+        app = [project for project in result if project.name == "app"][0]
+        assert app.file_list.paths() == ["added.py", "main.py", "requirements.txt"]
+        assert stopped
+        assert not os.path.exists(socket_filename)
+
+    def test_get_projects_from_daemon_with_other_settings(
+        self, monorepo, project_state_daemon
+    ):
+        socket_filename = ConfigurationManager.get().daemon_socket_filename
+        server = threading.Thread(
+            target=project_state_daemon.serve, args=(socket_filename,)
+        )
+        server.start()
+        while not DaemonClient().is_running():
+            pass
+        ConfigurationManager.get().skip_hidden_files = False
+
+        result = DaemonClient().get_projects()
+        DaemonClient().stop()
+        server.join()
+
+        assert result is None
+
+
+def test_encode_and_decode_projects():
+    project = Project(
+        project_path="/repo/libraries/lib",
+        file_list=FileList("/repo/libraries/lib", ["a"], [1.5], [3]),
+    )
+
+    result = decode_projects(encode_projects([project]))
+
+    assert result == [project]
@@ -0,0 +1,236 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from monorepo_builder.dependencies import (
+    DependencyParser,
+    DependencyIndex,
+    DependencyFileParseException,
+    normalize_package_name,
+    parse_installer_name,
+)
+from monorepo_builder.project_list import Projects
+from monorepo_builder.projects import Project
+
+
+def test_normalize_package_name():
+    assert normalize_package_name("My_Library.Name--two") == "my-library-name-two"
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("my_lib-1.0.2-py3-none-any.whl", ("my-lib", "1.0.2")),
+        ("my_lib-1.0.2-1-py3-none-any.whl", ("my-lib", "1.0.2")),
+        ("my-lib-2.0.tar.gz", ("my-lib", "2.0")),
+        ("scope-web-lib-3.1.0.tgz", ("scope-web-lib", "3.1.0")),
+        ("lib2-1.0.zip", ("lib2", "1.0")),
+        ("lib-without-version.tgz", None),
+        ("notes-1.0.txt", None),
+    ],
+)
+def test_parse_installer_name(filename, expected):
+    assert parse_installer_name(filename) == expected
+
+
+class TestDependencyParser:
+    def test_parse_requirements_matches_whole_names(self):
+        requirements = "something==1.0\nthing-two>=2 ; python_version > '3'\n"
+
+        result = DependencyParser().parse_requirements(requirements)
+
+        assert result == {"something", "thing-two"}
+
+    def test_parse_requirements_normalizes_names(self):
+        result = DependencyParser().parse_requirements("My_Lib[extra]~=1.0")
+
+        assert result == {"my-lib"}
+
+    def test_parse_requirements_skips_comments_and_options(self):
+        requirements = (
+            "# comment\n"
+            "--index-url https://example.com/simple\n"
+            "-c constraints.txt\n"
+            "one  # trailing comment\n"
+            "\n"
+        )
+
+        result = DependencyParser().parse_requirements(requirements)
+
+        assert result == {"one"}
+
+    def test_parse_requirements_handles_references(self):
+        requirements = (
+            "-e ../../libraries/lib_one\n"
+            "--editable=git+https://example.com/repo.git#egg=lib_two\n"
+            "lib3 @ https://example.com/lib3.whl\n"
+            "./wheels/lib4-1.0-py3-none-any.whl\n"
+        )
+
+        result = DependencyParser().parse_requirements(requirements)
+
+        assert result == {"lib-one", "lib-two", "lib3", "lib4"}
+
+    def test_parse_requirements_names_archives_with_hyphens(self):
+        requirements = (
+            "./dist/my-lib-1.0.tar.gz\n"
+            "./wheels/other_lib-2.0-py3-none-any.whl\n"
+            "./dist/plain-lib.zip\n"
+        )
+
+        result = DependencyParser().parse_requirements(requirements)
+
+        assert result == {"my-lib", "other-lib", "plain-lib"}
+
+    def test_parse_requirements_joins_continued_lines(self):
+        result = DependencyParser().parse_requirements("one \\\n  ==1.0\ntwo")
+
+        assert result == {"one", "two"}
+
+    def test_parse_requirements_follows_included_files(self, tmp_path):
+        (tmp_path / "base.txt").write_text("two\n-r requirements.txt")
+        (tmp_path / "requirements.txt").write_text("one\n-r base.txt")
+
+        result = DependencyParser().parse_requirements(
+            (tmp_path / "requirements.txt").read_text(), tmp_path
+        )
+
+        assert result == {"one", "two"}
+
+    def test_parse_requirements_ignores_missing_included_files(self, tmp_path):
+        result = DependencyParser().parse_requirements("-r missing.txt", tmp_path)
+
+        assert result == set()
+
+    def test_parse_package_json(self):
+        package_json = """{
+            "name": "web1",
+            "dependencies": {"@celltrak/Lib_One": "^1.0.0", "react": "^16"},
+            "devDependencies": {"lib2": "file:../../libraries/lib2"},
+            "peerDependencies": {"lib3": "*"},
+            "optionalDependencies": {"lib4": "*"},
+            "scripts": {"lib5": "echo"}
+        }"""
+
+        result = DependencyParser().parse_package_json(package_json)
+
+        assert result == {
+            "@celltrak/lib-one",
+            "react",
+            "lib2",
+            "lib3",
+            "lib4",
+        }
+
+    def test_parse_package_json_names_archives_with_hyphens(self):
+        package_json = """{
+            "dependencies": {"vendored": "file:../libs/my-lib-1.0.0.tgz"}
+        }"""
+
+        result = DependencyParser().parse_package_json(package_json)
+
+        assert result == {"vendored", "my-lib"}
+
+    def test_parse_package_json_invalid(self):
+        with pytest.raises(DependencyFileParseException):
+            DependencyParser().parse_package_json("{not json")
+
+    def test_parse_package_json_skips_sections_that_are_not_objects(self):
+        package_json = """{
+            "dependencies": null,
+            "devDependencies": ["lib1"],
+            "peerDependencies": {"lib2": "*"}
+        }"""
+
+        result = DependencyParser().parse_package_json(package_json)
+
+        assert result == {"lib2"}
+
+    def test_parse_package_json_not_an_object(self):
+        with pytest.raises(DependencyFileParseException):
+            DependencyParser().parse_package_json("null")
+
+    @pytest.mark.parametrize(
+        "package_json, expected",
+        [
+            ('{"name": "@Acme/UI_Kit"}', "@acme/ui-kit"),
+            ('{"name": null}', None),
+            ("{}", None),
+        ],
+    )
+    def test_parse_package_name(self, package_json, expected):
+        assert DependencyParser().parse_package_name(package_json) == expected
+
+
+def make_project(name: str, dependency_names=(), package_name=None):
+    project = MagicMock(spec=Project)
+    project.name = name
+    project.read_dependency_names.return_value = set(dependency_names)
+    project.read_package_name.return_value = package_name
+    return project
+
+
+class TestDependencyIndex:
+    def test_dependency_index_factory(self):
+        lib1 = make_project("lib-one")
+        lib2 = make_project("lib2", ["lib-one", "requests"])
+        std = make_project("std", ["lib2", "lib22"])
+        projects = MagicMock(
+            spec=Projects,
+            **{
+                "__iter__.return_value": [lib1, lib2, std],
+                "library_projects": [lib1, lib2],
+            },
+        )
+
+        result = DependencyIndex.dependency_index_factory(projects)
+
+        assert result.library_dependencies == {
+            "lib-one": set(),
+            "lib2": {"lib-one"},
+            "std": {"lib2"},
+        }
+        assert result.dependents_of("lib-one") == {"lib2"}
+        assert result.dependents_of("std") == set()
+
+    def test_dependency_index_factory_matches_scoped_package_names(self):
+        ui_kit = make_project("ui-kit", package_name="@acme/ui-kit")
+        node = make_project("node")
+        web = make_project("web", ["@acme/ui-kit", "@types/node"])
+        projects = MagicMock(
+            spec=Projects,
+            **{
+                "__iter__.return_value": [ui_kit, node, web],
+                "library_projects": [ui_kit, node],
+            },
+        )
+
+        result = DependencyIndex.dependency_index_factory(projects)
+
+        assert result.dependencies_of("web") == {"ui-kit"}
+
+    def test_add_project_ignores_self_references(self):
+        dependency_index = DependencyIndex()
+
+        dependency_index.add_project("lib", {"lib", "other"})
+
+        assert dependency_index.dependencies_of("lib") == {"other"}
+
+    def test_transitive_dependents(self):
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("lib1", set())
+        dependency_index.add_project("lib2", {"lib1"})
+        dependency_index.add_project("lib3", set())
+        dependency_index.add_project("std1", {"lib2"})
+        dependency_index.add_project("std2", {"lib3"})
+
+        assert dependency_index.transitive_dependents(["lib1"]) == {"lib2", "std1"}
+        assert dependency_index.transitive_dependents([]) == set()
+
+    def test_transitive_dependencies(self):
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("lib1", set())
+        dependency_index.add_project("lib2", {"lib1"})
+        dependency_index.add_project("std1", {"lib2"})
+
+        assert dependency_index.transitive_dependencies(["std1"]) == {"lib1", "lib2"}
@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+from monorepo_builder.file_list import (
+    File,
+    FileList,
+    FileListChanges,
+    FileListFormatException,
+)
+
+HASH_1 = "1" * 40
+HASH_2 = "2" * 40
+
+
+class TestFileList:
+    def test_iterates_files_with_absolute_paths(self):
+        file_list = FileList("/repo/lib1", ["a", "b/c"], [1.5, 2.5], [10, 20])
+
+        assert len(file_list) == 2
+        assert list(file_list) == [
+            File(os.path.join("/repo/lib1", "a"), 1.5),
+            File(os.path.join("/repo/lib1", "b/c"), 2.5),
+        ]
+
+    def test_iterates_content_hashes(self):
+        file_list = FileList("/repo", ["a", "b"], [1, 2], [0, 0], [HASH_1, HASH_2])
+
+        assert [file.content_hash for file in file_list] == [HASH_1, HASH_2]
+
+    def test_round_trips_through_bytes(self):
+        file_list = FileList(
+            "/repo", ["a", "b/\udcff"], [1.25, 2.5], [3, 4], [HASH_1, HASH_2]
+        )
+
+        result = FileList.from_bytes("/repo", file_list.to_bytes())
+
+        assert result == file_list
+        assert result.paths() == ["a", "b/\udcff"]
+
+    def test_round_trips_empty_list(self):
+        result = FileList.from_bytes("/repo", FileList("/repo").to_bytes())
+
+        assert len(result) == 0
+        assert result.paths() == []
+        assert list(result) == []
+
+    def test_from_bytes_rejects_unknown_format(self):
+        with pytest.raises(FileListFormatException):
+            FileList.from_bytes("/repo", b"XXXX" + FileList().to_bytes()[4:])
+
+    def test_columns_must_have_same_length(self):
+        with pytest.raises(FileListFormatException):
+            FileList("/repo", ["a"], [1], [])
+
+    def test_from_files_uses_scan_order(self):
+        result = FileList.from_files(
+            "/repo",
+            [
+                File("/repo/a.txt", 1),
+                File("/repo/a/z", 2),
+                File("/repo/B", 3),
+            ],
+        )
+
+        assert result == FileList("/repo", ["B", "a/z", "a.txt"], [3, 2, 1], [0, 0, 0])
+
+    def test_from_files_keeps_hashes_only_when_all_files_have_them(self):
+        result = FileList.from_files(
+            "/repo", [File("/repo/a", 1, HASH_1), File("/repo/b", 1)]
+        )
+
+        assert result.content_hashes == b""
+
+    def test_same_files_compares_modified_times(self):
+        current = FileList("/repo", ["a"], [1], [0])
+
+        assert current.same_files_as(FileList("/repo", ["a"], [1], [5]))
+        assert not current.same_files_as(FileList("/repo", ["a"], [2], [0]))
+        assert not current.same_files_as(FileList("/repo", ["b"], [1], [0]))
+
+    def test_same_files_compares_content_hashes(self):
+        current = FileList("/repo", ["a"], [1], [0], [HASH_1])
+
+        assert current.same_files_as(FileList("/repo", ["a"], [2], [0], [HASH_1]))
+        assert not current.same_files_as(FileList("/repo", ["a"], [1], [0], [HASH_2]))
+        assert not current.same_files_as(FileList("/repo", ["a"], [1], [0]))
+
+    def test_digest_is_stored_with_file_list(self, mocker):
+        file_list = FileList("/repo", ["a", "b/c"], [1, 2], [0, 0])
+        data = file_list.to_bytes()
+        folder_digests_spy = mocker.spy(FileList, "folder_digests")
+
+        result = FileList.from_bytes("/repo", data)
+
+        assert result.digest == file_list.digest
+        folder_digests_spy.assert_not_called()
+
+    def test_folder_digests_only_change_along_changed_path(self):
+        paths = ["a", "src/b", "src/deep/c", "tests/d"]
+        current = FileList("/repo", paths, [1, 1, 2, 1], [0] * 4).folder_digests()
+        previous = FileList("/repo", paths, [1, 1, 1, 1], [0] * 4).folder_digests()
+
+        assert sorted(current) == ["", "src", "src/deep", "tests"]
+        assert [
+            folder for folder in sorted(current) if current[folder] != previous[folder]
+        ] == ["", "src", "src/deep"]
+
+    def test_digest_depends_on_folder_structure(self):
+        first = FileList("/repo", ["a/b", "c"], [1, 1], [0, 0])
+        second = FileList("/repo", ["a", "b", "c"], [1, 1, 1], [0, 0, 0])
+
+        assert first.digest != second.digest
+
+    def test_changes_since(self):
+        current = FileList(
+            "/repo", ["a", "src/b", "src/c", "tests/e"], [1, 2, 1, 1], [0] * 4
+        )
+        previous = FileList(
+            "/repo", ["a", "src/b", "src/d", "tests/e"], [1, 1, 1, 1], [0] * 4
+        )
+
+        result = current.changes_since(previous)
+
+        assert result == FileListChanges(
+            added=["src/c"], removed=["src/d"], modified=["src/b"]
+        )
+        assert result.folders == ["src"]
+
+    def test_changes_since_skips_unchanged_folders(self, mocker):
+        current = FileList("/repo", ["a", "src/b"], [2, 1], [0, 0])
+        previous = FileList("/repo", ["a", "src/b"], [1, 1], [0, 0])
+        fingerprints_in_spy = mocker.spy(FileList, "_fingerprints_in")
+
+        result = current.changes_since(previous)
+
+        assert result.modified == ["a"]
+        assert fingerprints_in_spy.call_args[0][1] == {""}
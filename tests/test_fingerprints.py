@@ -0,0 +1,198 @@
+import os
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.fingerprints import (
+    hash_file_contents,
+    FileHashCache,
+    FileHashCacheManager,
+    GitFingerprints,
+    GitFingerprintsManager,
+    RACY_WINDOW_NS,
+)
+
+
+def test_hash_file_contents_matches_git_blob_id(tmp_path):
+    file = tmp_path / "file.txt"
+    file.write_bytes(b"hello world\n")
+
+    result = hash_file_contents(str(file))
+
+    assert result == "3b18e512dba79e4c8300dd08aeb37f8e728b8dad"
+
+
+class TestFileHashCache:
+    def test_get_hash_hashes_new_files(self, tmp_path):
+        file = tmp_path / "file.txt"
+        file.write_text("content")
+        hash_cache = FileHashCache()
+
+        result = hash_cache.get_hash(str(file), os.stat(file))
+
+        assert result == hash_file_contents(str(file))
+        assert str(file) in hash_cache.files_seen
+
+    def test_get_hash_does_not_read_unchanged_files(self, mocker):
+        stat_result = MagicMock(st_ino=1, st_size=2, st_mtime_ns=3)
+        hash_mock = mocker.patch("monorepo_builder.fingerprints.hash_file_contents")
+        hash_cache = FileHashCache({"file": (1, 2, 3, "abc")})
+
+        result = hash_cache.get_hash("file", stat_result)
+
+        assert result == "abc"
+        hash_mock.assert_not_called()
+
+    def test_get_hash_reads_files_with_changed_stat(self, mocker):
+        stat_result = MagicMock(st_ino=1, st_size=2, st_mtime_ns=4)
+        mocker.patch(
+            "monorepo_builder.fingerprints.hash_file_contents", return_value="def"
+        )
+        hash_cache = FileHashCache({"file": (1, 2, 3, "abc")})
+
+        result = hash_cache.get_hash("file", stat_result)
+
+        assert result == "def"
+        assert hash_cache.entries["file"] == (1, 2, 4, "def")
+
+    def test_entries_to_save_drops_unseen_and_racy_entries(self):
+        saved_at_ns = 10 * RACY_WINDOW_NS
+        hash_cache = FileHashCache(
+            {
+                "old": (1, 1, RACY_WINDOW_NS, "a"),
+                "racy": (2, 1, saved_at_ns - 1, "b"),
+                "gone": (3, 1, RACY_WINDOW_NS, "c"),
+            }
+        )
+        hash_cache.files_seen = {"old", "racy"}
+
+        result = hash_cache.entries_to_save(saved_at_ns)
+
+        assert result == {"old": (1, 1, RACY_WINDOW_NS, "a")}
+
+
+class TestFileHashCacheManager:
+    def test_save_and_load(self, mocker, tmp_path):
+        configuration = Configuration(hash_cache_filename=str(tmp_path / "cache"))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FileHashCacheManager, "hash_cache", None)
+        hash_cache = FileHashCacheManager.get()
+        hash_cache.entries["file"] = (1, 2, 3, "abc")
+        hash_cache.files_seen.add("file")
+
+        FileHashCacheManager.save()
+        FileHashCacheManager.hash_cache = None
+        result = FileHashCacheManager.get()
+
+        assert result.entries == {"file": (1, 2, 3, "abc")}
+
+    def test_get_when_no_cache_file(self, mocker, tmp_path):
+        configuration = Configuration(hash_cache_filename=str(tmp_path / "missing"))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FileHashCacheManager, "hash_cache", None)
+
+        assert FileHashCacheManager.get().entries == {}
+
+    def test_save_without_loading_writes_nothing(self, mocker, tmp_path):
+        configuration = Configuration(hash_cache_filename=str(tmp_path / "cache"))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FileHashCacheManager, "hash_cache", None)
+
+        FileHashCacheManager.save()
+
+        assert not (tmp_path / "cache").exists()
+
+
+def git(folder, *arguments):
+    subprocess.run(["git", *arguments], cwd=folder, check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repository(mocker, tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "builder@example.com")
+    git(tmp_path, "config", "user.name", "builder")
+    (tmp_path / "monorepo").mkdir()
+    for name in ["clean.py", "staged.py", "modified.py"]:
+        (tmp_path / "monorepo" / name).write_text(name)
+    (tmp_path / "outside.py").write_text("outside")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "initial")
+    (tmp_path / "monorepo" / "staged.py").write_text("staged change")
+    git(tmp_path, "add", "monorepo/staged.py")
+    (tmp_path / "monorepo" / "modified.py").write_text("working tree change")
+    (tmp_path / "monorepo" / "untracked.py").write_text("untracked")
+    configuration = Configuration(
+        monorepo_root_folder=str(tmp_path / "monorepo"),
+        hash_cache_filename=str(tmp_path / "hashcache"),
+    )
+    mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+    mocker.patch.object(FileHashCacheManager, "hash_cache", None)
+    mocker.patch.object(GitFingerprintsManager, "git_fingerprints", None)
+    yield tmp_path / "monorepo"
+
+
+class TestGitFingerprints:
+    def test_get_hash_uses_blob_id(self, mocker):
+        hash_cache = MagicMock(spec=FileHashCache)
+        git_fingerprints = GitFingerprints({"file": "abc"}, hash_cache)
+
+        result = git_fingerprints.get_hash("file", MagicMock())
+
+        assert result == "abc"
+        hash_cache.get_hash.assert_not_called()
+
+    def test_get_hash_falls_back_to_hash_cache(self):
+        hash_cache = MagicMock(spec=FileHashCache)
+        stat_result = MagicMock()
+        git_fingerprints = GitFingerprints({}, hash_cache)
+
+        result = git_fingerprints.get_hash("file", stat_result)
+
+        assert result is hash_cache.get_hash.return_value
+        hash_cache.get_hash.assert_called_once_with("file", stat_result)
+
+
+class TestGitFingerprintsManager:
+    def test_get_reads_blob_ids_for_unchanged_files(self, git_repository):
+        result = GitFingerprintsManager.get()
+
+        assert result.blob_ids == {
+            f"{git_repository}/clean.py": hash_file_contents(
+                str(git_repository / "clean.py")
+            ),
+            f"{git_repository}/staged.py": hash_file_contents(
+                str(git_repository / "staged.py")
+            ),
+        }
+
+    def test_get_outside_git_hashes_every_file(self, mocker, tmp_path):
+        mocker.patch("monorepo_builder.fingerprints.write_to_console")
+        configuration = Configuration(monorepo_root_folder=str(tmp_path))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(GitFingerprintsManager, "git_fingerprints", None)
+        mocker.patch.dict(os.environ, {"GIT_CEILING_DIRECTORIES": str(tmp_path)})
+
+        result = GitFingerprintsManager.get()
+
+        assert result.blob_ids == {}
+
+    def test_parse_index_skips_symlinks_and_conflicts(self):
+        output = (
+            "100644 aaa 0\tfile\0"
+            "120000 bbb 0\tlink\0"
+            "160000 ccc 0\tsubmodule\0"
+            "100644 ddd 1\tconflict\0"
+            "100644 eee 2\tconflict\0"
+        )
+
+        assert GitFingerprintsManager.parse_index(output) == {"file": "aaa"}
+
+    def test_parse_status_returns_working_tree_changes(self):
+        output = " M sub/changed\0M  sub/staged\0RM sub/new\0sub/old\0R  sub/moved\0x\0"
+
+        result = GitFingerprintsManager.parse_status(output, "sub/")
+
+        assert result == ["changed", "new"]
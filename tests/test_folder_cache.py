@@ -0,0 +1,76 @@
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.fingerprints import RACY_WINDOW_NS
+from monorepo_builder.folder_cache import FolderListingCache, FolderListingCacheManager
+
+
+class TestFolderListingCache:
+    def test_get_listing_when_modified_time_matches(self):
+        folder_cache = FolderListingCache({"folder": (3, (("a", False),))})
+
+        result = folder_cache.get_listing("folder", 3)
+
+        assert result == (("a", False),)
+        assert "folder" in folder_cache.folders_seen
+
+    def test_get_listing_when_modified_time_changed(self):
+        folder_cache = FolderListingCache({"folder": (3, (("a", False),))})
+
+        assert folder_cache.get_listing("folder", 4) is None
+
+    def test_get_listing_for_new_folder(self):
+        assert FolderListingCache().get_listing("folder", 1) is None
+
+    def test_entries_to_save_drops_unseen_and_racy_entries(self):
+        saved_at_ns = 10 * RACY_WINDOW_NS
+        folder_cache = FolderListingCache(
+            {
+                "old": (RACY_WINDOW_NS, ()),
+                "racy": (saved_at_ns - 1, ()),
+                "gone": (RACY_WINDOW_NS, ()),
+            }
+        )
+        folder_cache.folders_seen = {"old", "racy"}
+
+        result = folder_cache.entries_to_save(saved_at_ns)
+
+        assert result == {"old": (RACY_WINDOW_NS, ())}
+
+
+class TestFolderListingCacheManager:
+    def test_save_and_load(self, mocker, tmp_path):
+        configuration = Configuration(folder_cache_filename=str(tmp_path / "cache"))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FolderListingCacheManager, "folder_cache", None)
+        folder_cache = FolderListingCacheManager.get()
+        folder_cache.get_listing("folder", 1)
+        folder_cache.set_listing("folder", 1, (("a", True),))
+
+        FolderListingCacheManager.save()
+        FolderListingCacheManager.folder_cache = None
+        result = FolderListingCacheManager.get()
+
+        assert result.entries == {"folder": (1, (("a", True),))}
+
+    def test_load_discards_listings_saved_with_other_filters(self, mocker, tmp_path):
+        configuration = Configuration(folder_cache_filename=str(tmp_path / "cache"))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FolderListingCacheManager, "folder_cache", None)
+        folder_cache = FolderListingCacheManager.get()
+        folder_cache.get_listing("folder", 1)
+        folder_cache.set_listing("folder", 1, (("a", True),))
+        FolderListingCacheManager.save()
+        FolderListingCacheManager.folder_cache = None
+        configuration.filenames_to_skip = ["a"]
+
+        result = FolderListingCacheManager.get()
+
+        assert result.entries == {}
+
+    def test_save_without_loading_writes_nothing(self, mocker, tmp_path):
+        configuration = Configuration(folder_cache_filename=str(tmp_path / "cache"))
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FolderListingCacheManager, "folder_cache", None)
+
+        FolderListingCacheManager.save()
+
+        assert not (tmp_path / "cache").exists()
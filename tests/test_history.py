@@ -0,0 +1,212 @@
+import pytest
+
+from monorepo_builder.build_executor import BuildRequestStatus, ProjectBuildRequest
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.history import (
+    BuildHistory,
+    BuildHistoryManager,
+    BuildRecord,
+    ProjectBuildStatistics,
+    percentile,
+)
+from monorepo_builder.projects import Project
+
+
+@pytest.fixture
+def build_history(tmp_path):
+    build_history = BuildHistory(str(tmp_path / "history.db"))
+    yield build_history
+    build_history.close()
+
+
+def build_record(project_name, status="built", duration=1.0, started_at=100.0):
+    return BuildRecord(
+        project_name=project_name,
+        status=status,
+        started_at=started_at,
+        ended_at=started_at + duration,
+        exit_code=1 if status == "failed" else 0,
+        reason="files changed",
+    )
+
+
+class TestBuildRecord:
+    def make_request(self, **values) -> ProjectBuildRequest:
+        project = Project(project_path="/repo/libraries/lib1")
+        project.build_reason = "files changed"
+        build_request = ProjectBuildRequest(project=project)
+        for name, value in values.items():
+            setattr(build_request, name, value)
+        return build_request
+
+    def test_from_build_request(self):
+        build_request = self.make_request(
+            build_status=BuildRequestStatus.Complete,
+            run_successful=True,
+            started_at=10.0,
+            ended_at=12.5,
+            exit_code=0,
+        )
+
+        record = BuildRecord.from_build_request(build_request)
+
+        assert record == BuildRecord(
+            project_name="lib1",
+            status="built",
+            started_at=10.0,
+            ended_at=12.5,
+            exit_code=0,
+            reason="files changed",
+        )
+        assert record.duration == 2.5
+
+    @pytest.mark.parametrize(
+        "values, status",
+        [
+            ({"run_successful": True, "cache_hit": True}, "restored"),
+            ({"run_successful": False, "exit_code": 2}, "failed"),
+            ({"build_status": BuildRequestStatus.Skipped}, "skipped"),
+            (
+                {"build_status": BuildRequestStatus.Cancelled, "run_successful": False},
+                "cancelled",
+            ),
+        ],
+    )
+    def test_status(self, values, status):
+        record = BuildRecord.from_build_request(self.make_request(**values))
+
+        assert record.status == status
+
+    def test_not_started_is_not_recorded(self):
+        assert BuildRecord.from_build_request(self.make_request()) is None
+
+
+class TestPercentile:
+    def test_percentile(self):
+        values = [5.0, 1.0, 4.0, 2.0, 3.0]
+
+        assert percentile(values, 0.5) == 3.0
+        assert percentile(values, 0.95) == 5.0
+        assert percentile(values, 0.0) == 1.0
+
+    def test_percentile_without_values(self):
+        assert percentile([], 0.5) is None
+
+
+class TestProjectBuildStatistics:
+    def test_add(self):
+        statistics = ProjectBuildStatistics("lib1")
+        for record in [
+            build_record("lib1", duration=4.0),
+            build_record("lib1", status="failed", duration=2.0),
+            build_record("lib1", status="restored", duration=0.1),
+            BuildRecord("lib1", "skipped"),
+            build_record("lib1", status="cancelled", duration=0.5),
+        ]:
+            statistics.add(record)
+
+        assert statistics.builds == 2
+        assert statistics.failure_rate == 0.5
+        assert statistics.cache_hit_rate == pytest.approx(1 / 3)
+        assert statistics.skips == 2
+        assert statistics.p50 == 2.0
+        assert statistics.p95 == 4.0
+
+
+class TestBuildHistory:
+    def test_add_run(self, build_history):
+        build_history.add_run(
+            "1.0",
+            100.0,
+            110.0,
+            True,
+            [build_record("lib1"), build_record("app", status="restored")],
+        )
+
+        assert build_history.run_count() == 1
+        assert {record.project_name for record in build_history.records()} == {
+            "lib1",
+            "app",
+        }
+        assert build_history.records("app")[0].status == "restored"
+
+    def test_records_newest_first(self, build_history):
+        for run, duration in enumerate([1.0, 2.0, 3.0]):
+            build_history.add_run(
+                f"1.{run}", 0.0, 1.0, True, [build_record("lib1", duration=duration)]
+            )
+
+        records = build_history.records("lib1", limit=2)
+
+        assert [record.duration for record in records] == [3.0, 2.0]
+
+    def test_statistics_use_the_window(self, build_history):
+        for run, status in enumerate(["failed", "built", "built"]):
+            build_history.add_run(
+                f"1.{run}", 0.0, 1.0, status == "built", [build_record("lib1", status)]
+            )
+        build_history.add_run("1.3", 0.0, 1.0, True, [build_record("app")])
+
+        statistics = build_history.statistics(window=2)
+
+        assert statistics["lib1"].builds == 2
+        assert statistics["lib1"].failures == 0
+        assert statistics["app"].builds == 1
+
+    def test_statistics_use_the_latest_builds(self, build_history):
+        for run, duration in enumerate([10.0, 20.0, 1.0, 2.0, 3.0]):
+            build_history.add_run(
+                f"1.{run}",
+                0.0,
+                1.0,
+                True,
+                [build_record("lib1", duration=duration, started_at=100.0 * run)],
+            )
+
+        statistics = build_history.statistics(window=3)
+
+        assert statistics["lib1"].durations == [3.0, 2.0, 1.0]
+        assert statistics["lib1"].last_started_at == 400.0
+
+    def test_prune(self, build_history):
+        for run in range(5):
+            build_history.add_run(f"1.{run}", 0.0, 1.0, True, [build_record("lib1")])
+
+        build_history.prune(2)
+
+        assert build_history.run_count() == 2
+        assert len(build_history.records()) == 2
+
+    def test_history_survives_reopening(self, tmp_path):
+        build_history = BuildHistory(str(tmp_path / "history.db"))
+        build_history.add_run("1.0", 0.0, 1.0, True, [build_record("lib1")])
+        build_history.close()
+
+        build_history = BuildHistory(str(tmp_path / "history.db"))
+
+        assert len(build_history.records()) == 1
+        build_history.close()
+
+
+class TestBuildHistoryManager:
+    def test_get_when_disabled(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(history_filename="")
+        )
+        mocker.patch.object(BuildHistoryManager, "build_history", None)
+
+        assert BuildHistoryManager.get() is None
+
+    def test_get(self, mocker, tmp_path):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(history_filename=str(tmp_path / "history.db")),
+        )
+        mocker.patch.object(BuildHistoryManager, "build_history", None)
+
+        build_history = BuildHistoryManager.get()
+
+        assert BuildHistoryManager.get() is build_history
+        BuildHistoryManager.close()
+        assert BuildHistoryManager.build_history is None
@@ -1,24 +1,41 @@
+import os
 from pathlib import Path
-from unittest.mock import mock_open, patch, MagicMock, call
+from unittest.mock import MagicMock, call
 
-from monorepo_builder.configuration import ConfigurationManager, Configuration
+import pytest
+
+from monorepo_builder.configuration import (
+    ConfigurationManager,
+    Configuration,
+    ChangeDetectionMode,
+)
+from monorepo_builder.dependencies import DependencyIndex
+from monorepo_builder.fingerprints import (
+    FileHashCache,
+    FileHashCacheManager,
+    GitFingerprints,
+    GitFingerprintsManager,
+)
+from monorepo_builder.folder_cache import FolderListingCacheManager
 from monorepo_builder.project_list import (
     ProjectListFactory,
     ProjectListManager,
     Projects,
+    ProjectIndex,
 )
 from monorepo_builder.projects import ProjectFileListBuilder, File, Project, ProjectType
+from monorepo_builder.state_store import StateStoreManager, StateStore
 
 
 class TestProjects:
     def test_build_project_list(self, mocker):
         project1 = MagicMock(spec=Project)
         project2 = MagicMock(spec=Project)
-        list1 = [project1, project2]
         project3 = MagicMock(spec=Project)
-        list2 = [project3]
         get_projects_mock = mocker.patch.object(
-            ProjectListFactory, "get_projects_in_folder", side_effect=[list1, list2, []]
+            ProjectListFactory,
+            "get_projects_in_folders",
+            return_value=[project1, project2, project3],
         )
         mocker.patch.object(
             ConfigurationManager,
@@ -32,21 +49,26 @@ class TestProjects:
 
         projects = Projects.projects_factory()
 
-        assert len(projects) == 3
-        assert project1 in projects
-        assert project2 in projects
-        assert project3 in projects
-        assert get_projects_mock.call_args_list == [
-            call("root/lib"),
-            call("root/folder1"),
-            call("root/folder2"),
-        ]
+        assert isinstance(projects, Projects)
+        assert projects == [project1, project2, project3]
+        get_projects_mock.assert_called_once_with(
+            ["root/lib", "root/folder1", "root/folder2"]
+        )
 
     def test_library_projects_property(self, mocker):
-        lib_project = MagicMock(spec=Project, project_type=ProjectType.Library)
+        lib_project = MagicMock(
+            spec=Project, project_path="path1", project_type=ProjectType.Library
+        )
         projects = Projects()
         projects.extend(
-            [lib_project, MagicMock(spec=Project, project_type=ProjectType.Standard)]
+            [
+                lib_project,
+                MagicMock(
+                    spec=Project,
+                    project_path="path2",
+                    project_type=ProjectType.Standard,
+                ),
+            ]
         )
 
         library_projects = projects.library_projects
@@ -55,10 +77,17 @@ class TestProjects:
         assert lib_project in library_projects
 
     def test_standard_projects_property(self, mocker):
-        std_project = MagicMock(spec=Project, project_type=ProjectType.Standard)
+        std_project = MagicMock(
+            spec=Project, project_path="path1", project_type=ProjectType.Standard
+        )
         projects = Projects()
         projects.extend(
-            [std_project, MagicMock(spec=Project, project_type=ProjectType.Library)]
+            [
+                std_project,
+                MagicMock(
+                    spec=Project, project_path="path2", project_type=ProjectType.Library
+                ),
+            ]
         )
 
         result = projects.standard_projects
@@ -66,127 +95,210 @@ class TestProjects:
         assert len(result) == 1
         assert std_project in result
 
-
-class TestProjectListManager:
-    def test_load_when_file_exists(self, mocker):
-        path_mock = mocker.patch("monorepo_builder.project_list.Path")
-        path_mock.return_value.exists.return_value = True
-        pickle_mock = mocker.patch("monorepo_builder.project_list.pickle")
-        pickle_mock.loads.return_value = "some data"
-        mocker.patch.object(
-            ConfigurationManager,
-            "get",
-            return_value=MagicMock(project_list_filename="here"),
+    def test_indexes_are_rebuilt_when_projects_are_added(self):
+        lib_project = Project(project_path="root/lib/one")
+        std_project = Project(project_path="root/web/two")
+        projects = Projects()
+        projects.append(lib_project)
+        first_index = projects.index
+
+        projects.extend([std_project])
+
+        assert projects.index is not first_index
+        assert projects.index is projects.index
+        assert projects.index.get_by_name("two") is std_project
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda projects, added: projects.insert(0, added),
+            lambda projects, added: projects.remove(projects[0]),
+            lambda projects, added: projects.pop(),
+            lambda projects, added: projects.clear(),
+            lambda projects, added: projects.__setitem__(0, added),
+            lambda projects, added: projects.__setitem__(slice(0, 1), [added]),
+            lambda projects, added: projects.__delitem__(0),
+            lambda projects, added: projects.__iadd__([added]),
+            lambda projects, added: projects.__imul__(2),
+            lambda projects, added: projects.sort(key=lambda project: project.name),
+            lambda projects, added: projects.reverse(),
+        ],
+        ids=[
+            "insert",
+            "remove",
+            "pop",
+            "clear",
+            "setitem",
+            "setitem slice",
+            "delitem",
+            "iadd",
+            "imul",
+            "sort",
+            "reverse",
+        ],
+    )
+    def test_indexes_are_rebuilt_when_projects_change(self, change):
+        projects = Projects()
+        projects.extend(
+            [
+                Project(project_path="root/lib/one"),
+                Project(project_path="root/web/two"),
+            ]
         )
-        m = mock_open(read_data="input")
-        with patch("builtins.open", m):
-            result = ProjectListManager().load_list_from_last_successful_run()
-            assert result == "some data"
-        path_mock.assert_called_once_with("here")
-        m.assert_called_once_with("here", "rb")
-        pickle_mock.loads.assert_called_once_with("input")
-
-    def test_load_when_file_does_not_exist(self, mocker):
-        path_mock = mocker.patch("monorepo_builder.project_list.Path")
-        path_mock.return_value.exists.return_value = False
+        projects._dependency_index = DependencyIndex()
+        first_index = projects.index
+
+        change(projects, Project(project_path="root/web/three"))
+
+        assert projects.index is not first_index
+        assert projects._dependency_index is None
+        assert set(projects.index.projects_by_name) == {
+            project.name for project in projects
+        }
+
+
+class TestProjectIndex:
+    def test_lookup_by_name_and_path(self):
+        project = Project(project_path="root/web/my_project")
+        project_index = ProjectIndex([project])
+
+        assert project_index.get_by_name("my-project") is project
+        assert project_index.get_by_path("root/web/my_project") is project
+        assert project_index.get_by_name("missing") is None
+        assert project_index.get_by_path("missing") is None
+
+    def test_partitions_by_project_type(self, mocker):
         mocker.patch.object(
             ConfigurationManager,
             "get",
-            return_value=MagicMock(project_list_filename="here"),
+            return_value=Configuration(library_folder_name="lib"),
         )
+        lib_project = Project(project_path="root/lib/one")
+        std_project = Project(project_path="root/web/two")
+
+        project_index = ProjectIndex([std_project, lib_project])
+
+        assert project_index.library_projects == [lib_project]
+        assert project_index.standard_projects == [std_project]
+
+
+class TestProjectListManager:
+    def test_load_list_from_last_successful_run(self, mocker):
+        project1 = MagicMock(spec=Project)
+        project2 = MagicMock(spec=Project)
+        state_store = MagicMock(spec=StateStore)
+        state_store.project_names.return_value = ["one", "two"]
+        state_store.load_project.side_effect = [project1, project2]
+        mocker.patch.object(StateStoreManager, "get", return_value=state_store)
+
         result = ProjectListManager().load_list_from_last_successful_run()
-        assert result == []
-        path_mock.assert_called_once_with("here")
+
+        assert isinstance(result, Projects)
+        assert result == [project1, project2]
+        assert state_store.load_project.call_args_list == [call("one"), call("two")]
+
+    def test_load_project_from_last_successful_run(self, mocker):
+        state_store = MagicMock(spec=StateStore)
+        mocker.patch.object(StateStoreManager, "get", return_value=state_store)
+
+        result = ProjectListManager().load_project_from_last_successful_run("one")
+
+        assert result is state_store.load_project.return_value
+        state_store.load_project.assert_called_once_with("one")
 
     def test_save_last_used_list(self, mocker):
-        pickle_mock = mocker.patch("monorepo_builder.project_list.pickle")
-        pickle_mock.dumps.return_value = "pickled data"
-        m = mock_open()
-        project_list_mock = [MagicMock(spec=Project)]
-        mocker.patch.object(
-            ConfigurationManager,
-            "get",
-            return_value=MagicMock(project_list_filename="here"),
-        )
-        with patch("builtins.open", m):
-            ProjectListManager().save_project_list(project_list_mock)
-        m.assert_called_once_with("here", "wb")
-        m.return_value.write.assert_called_once_with("pickled data")
-        pickle_mock.dumps.assert_called_once_with(project_list_mock)
+        state_store = MagicMock(spec=StateStore)
+        mocker.patch.object(StateStoreManager, "get", return_value=state_store)
+        built = Project(project_path="/repo/platform/built")
+        other = Project(project_path="/repo/platform/other")
+        other.left_to_other_shard = True
+        projects = Projects()
+        projects.extend([built, other])
+
+        ProjectListManager().save_project_list(projects)
+
+        state_store.save_projects.assert_called_once_with([built], {"other"})
 
 
 class TestProjectFileListFactory:
-    def test_build_include_all_files(self, mocker):
-        child1 = MagicMock(spec=Path, **{"is_dir.return_value": False})
-        child2 = MagicMock(spec=Path, **{"is_dir.return_value": False})
-        parent1 = MagicMock(
-            spec=Path,
-            **{"is_dir.return_value": True, "iterdir.return_value": [child1, child2]},
-        )
-        child3 = MagicMock(spec=Path, **{"is_dir.return_value": False})
-        project_path = MagicMock(
-            spec=Path, **{"iterdir.return_value": [parent1, child3]}
-        )
-        file1 = MagicMock(spec=File)
-        file2 = MagicMock(spec=File)
-        file3 = MagicMock(spec=File)
-        file_factory_mock = mocker.patch.object(
-            File, "file_factory", side_effect=[file1, file2, file3]
-        )
-        configuration = MagicMock(spec=Configuration)
+    def test_build_include_all_files(self, mocker, tmp_path):
+        (tmp_path / "parent").mkdir()
+        (tmp_path / "parent" / "child1").write_text("1")
+        (tmp_path / "parent" / "child2").write_text("2")
+        (tmp_path / "child3").write_text("3")
+        configuration = Configuration(filenames_to_skip=[])
         mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        process_file_mock = mocker.patch.object(
-            ProjectFileListBuilder, "process_file", return_value=True
-        )
 
-        result = ProjectFileListBuilder().build(project_path)
+        result = ProjectFileListBuilder().build(tmp_path)
 
-        assert len(result) == 3
-        assert file1 in result
-        assert file2 in result
-        assert file3 in result
-        assert file_factory_mock.call_args_list == [
-            call(child1),
-            call(child2),
-            call(child3),
-        ]
-        assert process_file_mock.call_args_list == [
-            call(parent1, configuration),
-            call(child1, configuration),
-            call(child2, configuration),
-            call(child3, configuration),
+        assert sorted(file.file for file in result) == [
+            str(tmp_path / "child3"),
+            str(tmp_path / "parent" / "child1"),
+            str(tmp_path / "parent" / "child2"),
         ]
+        assert all(file.content_hash is None for file in result)
+
+    def test_build_matches_path_walk(self, mocker, tmp_path):
+        for folder in ["a", "a/b", "a/b/c", "d", ".hidden"]:
+            (tmp_path / folder).mkdir()
+        for file in ["x.py", "a/y.py", "a/b/z.py", "a/b/c/w.txt", "d/v.egg-info"]:
+            (tmp_path / file).write_text(file)
+        (tmp_path / ".hidden" / "u.py").write_text("u")
+        configuration = Configuration(extensions_to_skip=[".egg-info"])
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
 
-    def test_build_exclude_file(self, mocker):
-        child1 = MagicMock(spec=Path, **{"is_dir.return_value": False})
-        child2 = MagicMock(spec=Path, **{"is_dir.return_value": False})
-        child3 = MagicMock(spec=Path, **{"is_dir.return_value": False})
-        project_path = MagicMock(
-            spec=Path, **{"iterdir.return_value": [child1, child2, child3]}
-        )
-        file1 = MagicMock(spec=File)
-        file2 = MagicMock(spec=File)
-        file_factory_mock = mocker.patch.object(
-            File, "file_factory", side_effect=[file1, file2]
-        )
-        configuration = MagicMock(spec=Configuration)
+        def walk(path):
+            for child in sorted(path.iterdir(), key=lambda child: child.name):
+                if child.name.startswith(".") or child.suffix == ".egg-info":
+                    continue
+                if child.is_dir():
+                    yield from walk(child)
+                else:
+                    yield File(str(child), child.stat().st_mtime)
+
+        result = ProjectFileListBuilder().build(tmp_path)
+
+        assert list(result) == list(walk(tmp_path))
+
+    def test_build_exclude_file(self, mocker, tmp_path):
+        (tmp_path / "child1").write_text("1")
+        (tmp_path / "child2").write_text("2")
+        (tmp_path / "child3").write_text("3")
+        configuration = Configuration(filenames_to_skip=["child2"])
         mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        process_file_mock = mocker.patch.object(
-            ProjectFileListBuilder, "process_file", side_effect=[True, False, True]
-        )
 
-        result = ProjectFileListBuilder().build(project_path)
+        result = ProjectFileListBuilder().build(tmp_path)
 
-        assert len(result) == 2
-        assert file1 in result
-        assert file2 in result
-        assert file_factory_mock.call_args_list == [call(child1), call(child3)]
-        assert process_file_mock.call_args_list == [
-            call(child1, configuration),
-            call(child2, configuration),
-            call(child3, configuration),
+        assert sorted(file.file for file in result) == [
+            str(tmp_path / "child1"),
+            str(tmp_path / "child3"),
         ]
 
+    def test_build_excluded_folders_are_not_scanned(self, mocker, tmp_path):
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "package").write_text("1")
+        configuration = Configuration()
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        scan_folder_spy = mocker.spy(ProjectFileListBuilder, "scan_folder")
+
+        result = ProjectFileListBuilder().build(tmp_path)
+
+        assert len(result) == 0
+        assert scan_folder_spy.call_count == 1
+
+    def test_build_uses_hash_cache_for_content_detection(self, mocker, tmp_path):
+        (tmp_path / "child").write_text("content")
+        configuration = Configuration(change_detection_mode=ChangeDetectionMode.content)
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        hash_cache = MagicMock(spec=FileHashCache)
+        hash_cache.get_hash.return_value = "ab" * 20
+        mocker.patch.object(FileHashCacheManager, "get", return_value=hash_cache)
+
+        result = ProjectFileListBuilder().build(tmp_path)
+
+        assert list(result)[0].content_hash == "ab" * 20
+        assert hash_cache.get_hash.call_args[0][0] == str(tmp_path / "child")
+
     def test_include_file(self,):
         configuration = MagicMock(
             spec=Configuration,
@@ -195,9 +307,8 @@ class TestProjectFileListFactory:
             extensions_to_skip=[".skip"],
             skip_hidden_folders=False,
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = "file.py"
-        file.suffix = ".py"
         assert ProjectFileListBuilder().process_file(file, configuration)
 
     def test_exclude_file_because_of_name(self):
@@ -208,9 +319,8 @@ class TestProjectFileListFactory:
             extensions_to_skip=[".skip"],
             skip_hidden_folders=False,
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = "skip.this"
-        file.suffix = ".this"
         assert ProjectFileListBuilder().process_file(file, configuration) is False
 
     def test_exclude_hidden_file(self):
@@ -221,9 +331,8 @@ class TestProjectFileListFactory:
             extensions_to_skip=[".skip"],
             skip_hidden_folders=False,
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = ".this"
-        file.suffix = ".this"
         assert ProjectFileListBuilder().process_file(file, configuration)
 
     def test_include_hidden_folder(self):
@@ -234,9 +343,8 @@ class TestProjectFileListFactory:
             extensions_to_skip=[".skip"],
             skip_hidden_folders=False,
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = ".this"
-        file.suffix = ".this"
         file.is_file.return_value = False
         assert ProjectFileListBuilder().process_file(file, configuration)
 
@@ -248,9 +356,8 @@ class TestProjectFileListFactory:
             extensions_to_skip=[".skip"],
             skip_hidden_folders=False,
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = ".this"
-        file.suffix = ".this"
         assert ProjectFileListBuilder().process_file(file, configuration)
 
     def test_exclude_file_because_of_extension(self):
@@ -261,9 +368,8 @@ class TestProjectFileListFactory:
             extensions_to_skip=[".skip"],
             skip_hidden_folders=False,
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = "file.skip"
-        file.suffix = ".skip"
         assert ProjectFileListBuilder().process_file(file, configuration) is False
 
     def test_exclude_folder_when_hidden(self):
@@ -274,9 +380,8 @@ class TestProjectFileListFactory:
             skip_hidden_folders=True,
             extensions_to_skip=[".skip"],
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = ".this"
-        file.suffix = ".this"
         file.is_dir.return_value = True
         assert ProjectFileListBuilder().process_file(file, configuration) is False
 
@@ -288,12 +393,58 @@ class TestProjectFileListFactory:
             skip_hidden_folders=True,
             extensions_to_skip=[".skip"],
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = ".this"
-        file.suffix = ".this"
         file.is_dir.return_value = False
         assert ProjectFileListBuilder().process_file(file, configuration)
 
+    def test_build_uses_git_fingerprints_for_git_detection(self, mocker, tmp_path):
+        (tmp_path / "child").write_text("content")
+        configuration = Configuration(change_detection_mode=ChangeDetectionMode.git)
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        git_fingerprints = MagicMock(spec=GitFingerprints)
+        git_fingerprints.get_hash.return_value = "cd" * 20
+        mocker.patch.object(
+            GitFingerprintsManager, "get", return_value=git_fingerprints
+        )
+
+        result = ProjectFileListBuilder().build(tmp_path)
+
+        assert list(result)[0].content_hash == "cd" * 20
+        assert git_fingerprints.get_hash.call_args[0][0] == str(tmp_path / "child")
+
+    def test_build_incremental_reuses_unchanged_folder_listings(self, mocker, tmp_path):
+        (tmp_path / "parent").mkdir()
+        (tmp_path / "parent" / "child1").write_text("1")
+        (tmp_path / "child2").write_text("2")
+        configuration = Configuration(incremental_scan=True)
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FolderListingCacheManager, "folder_cache", None)
+        first = ProjectFileListBuilder().build(tmp_path)
+        scan_folder_spy = mocker.spy(ProjectFileListBuilder, "scan_folder")
+
+        result = ProjectFileListBuilder().build(tmp_path)
+
+        assert result == first
+        scan_folder_spy.assert_not_called()
+
+    def test_build_incremental_rereads_changed_folders(self, mocker, tmp_path):
+        (tmp_path / "parent").mkdir()
+        (tmp_path / "parent" / "child1").write_text("1")
+        (tmp_path / "child2").write_text("2")
+        configuration = Configuration(incremental_scan=True)
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(FolderListingCacheManager, "folder_cache", None)
+        ProjectFileListBuilder().build(tmp_path)
+        (tmp_path / "parent" / "child3").write_text("3")
+        os.utime(tmp_path / "parent", ns=(1, 1))
+        scan_folder_spy = mocker.spy(ProjectFileListBuilder, "scan_folder")
+
+        result = ProjectFileListBuilder().build(tmp_path)
+
+        assert result.paths() == ["child2", "parent/child1", "parent/child3"]
+        scan_folder_spy.assert_called_once_with(mocker.ANY, str(tmp_path / "parent"))
+
     def test_include_folder_when_eclusion_turned_off(self):
         configuration = MagicMock(
             spec=Configuration,
@@ -302,163 +453,89 @@ class TestProjectFileListFactory:
             skip_hidden_folders=False,
             extensions_to_skip=[".skip"],
         )
-        file = MagicMock(spec=Path)
+        file = MagicMock(spec=os.DirEntry)
         file.name = ".this"
-        file.suffix = ".this"
         file.is_dir.return_value = False
         assert ProjectFileListBuilder().process_file(file, configuration)
 
 
+def make_project_folder(folder: Path, requirements_filename="requirements.txt"):
+    folder.mkdir(parents=True)
+    (folder / requirements_filename).write_text("")
+    (folder / "main.py").write_text("")
+
+
 class TestProjectListFactory:
-    def test_get_projects_from_folder(self, mocker):
-        mocker.patch("monorepo_builder.build_executor.write_to_console")
-        path1_mock = MagicMock(
-            **{"is_dir.return_value": True, "__str__.return_value": "first"}
-        )
-        path2_mock = MagicMock(
-            **{"is_dir.return_value": True, "__str__.return_value": "second"}
-        )
-        file1_mock = MagicMock(
-            **{"is_dir.return_value": False, "__str__.return_value": "thid"}
-        )
-        path_mock = mocker.patch(
-            "monorepo_builder.project_list.Path",
-            **{
-                "return_value.iterdir.return_value": [
-                    path1_mock,
-                    file1_mock,
-                    path2_mock,
-                ],
-                "return_value.exists.return_value": True,
-            },
-        )
-        is_folder_project_mock = mocker.patch.object(
-            ProjectListFactory, "is_folder_project", side_effect=[True, True]
-        )
-        project1_mock = MagicMock(spec=Project)
-        project2_mock = MagicMock(spec=Project)
-        project_mock = mocker.patch(
-            "monorepo_builder.project_list.Project",
-            side_effect=[project1_mock, project2_mock],
-        )
-        file_builder_mock = mocker.patch.object(
-            ProjectFileListBuilder, "build", side_effect=["numberone", "numbertwo"]
+    def test_get_projects_in_folders(self, mocker, tmp_path):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(scan_workers=4)
         )
+        make_project_folder(tmp_path / "lib" / "first")
+        make_project_folder(tmp_path / "lib" / "second", "package.json")
+        make_project_folder(tmp_path / "std" / "group" / "third")
+        (tmp_path / "std" / "file.txt").write_text("")
+        (tmp_path / "std" / "empty").mkdir()
 
-        result = ProjectListFactory().get_projects_in_folder("start")
+        result = ProjectListFactory().get_projects_in_folders(
+            [str(tmp_path / "lib"), str(tmp_path / "std"), str(tmp_path / "missing")]
+        )
 
-        assert result == [project1_mock, project2_mock]
-        assert path_mock.call_args_list == [call("start"), call("start")]
-        assert project_mock.call_args_list == [
-            call(project_path="first", file_list="numberone"),
-            call(project_path="second", file_list="numbertwo"),
+        assert sorted(project.project_path for project in result[:2]) == [
+            str(tmp_path / "lib" / "first"),
+            str(tmp_path / "lib" / "second"),
         ]
-        assert file_builder_mock.call_args_list == [call(path1_mock), call(path2_mock)]
-        assert is_folder_project_mock.call_args_list == [
-            call(path1_mock),
-            call(path2_mock),
+        assert result[2].project_path == str(tmp_path / "std" / "group" / "third")
+        assert sorted(file.file for file in result[2].file_list) == [
+            str(tmp_path / "std" / "group" / "third" / "main.py"),
+            str(tmp_path / "std" / "group" / "third" / "requirements.txt"),
         ]
 
-    def test_get_projects_from_nested_folder(self, mocker):
-        mocker.patch("monorepo_builder.build_executor.write_to_console")
-        path1_1_mock = MagicMock(
-            **{"is_dir.return_value": True, "__str__.return_value": "first first"}
-        )
-        path1_2_mock = MagicMock(
-            **{"is_dir.return_value": True, "__str__.return_value": "first second"}
-        )
-        path1_mock = MagicMock(
-            **{
-                "is_dir.return_value": True,
-                "__str__.return_value": "first",
-                "return_value.iterdir.return_value": [path1_1_mock, path1_2_mock],
-            }
-        )
-        path_mock = mocker.patch(
-            "monorepo_builder.project_list.Path",
-            **{
-                "return_value.iterdir.side_effect": [
-                    [path1_mock],
-                    [path1_1_mock, path1_2_mock],
-                ],
-                "return_value.exists.return_value": True,
-            },
-        )
-        is_folder_project_mock = mocker.patch.object(
-            ProjectListFactory, "is_folder_project", side_effect=[False, True, True]
-        )
-        project1_mock = MagicMock(spec=Project)
-        project2_mock = MagicMock(spec=Project)
-        project_mock = mocker.patch(
-            "monorepo_builder.project_list.Project",
-            side_effect=[project1_mock, project2_mock],
+    def test_get_projects_in_folders_keeps_discovery_order(self, mocker, tmp_path):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(scan_workers=8)
         )
-        file_builder_mock = mocker.patch.object(
-            ProjectFileListBuilder, "build", side_effect=["numberone", "numbertwo"]
+        folders = [tmp_path / f"root{index}" for index in range(4)]
+        for folder in folders:
+            make_project_folder(folder / "project")
+        project_folders = [folder / "project" for folder in folders]
+        mocker.patch.object(
+            ProjectListFactory,
+            "find_project_folders",
+            side_effect=lambda folder: [Path(folder) / "project"],
         )
 
-        result = ProjectListFactory().get_projects_in_folder("start")
+        result = ProjectListFactory().get_projects_in_folders(
+            [str(folder) for folder in folders]
+        )
 
-        assert result == [project1_mock, project2_mock]
-        assert path_mock.call_args_list == [
-            call("start"),
-            call("start"),
-            call("first"),
-            call("first"),
-        ]
-        assert project_mock.call_args_list == [
-            call(project_path="first first", file_list="numberone"),
-            call(project_path="first second", file_list="numbertwo"),
-        ]
-        assert file_builder_mock.call_args_list == [
-            call(path1_1_mock),
-            call(path1_2_mock),
-        ]
-        assert is_folder_project_mock.call_args_list == [
-            call(path1_mock),
-            call(path1_1_mock),
-            call(path1_2_mock),
+        assert [project.project_path for project in result] == [
+            str(project_folder) for project_folder in project_folders
         ]
 
-    def test_get_projects_in_folder_when_folder_not_found(self, mocker):
-        mocker.patch("monorepo_builder.build_executor.write_to_console")
-        path_mock = mocker.patch.object(Path, "__init__", return_value=None)
-        mocker.patch.object(Path, "exists", return_value=False)
-
-        result = ProjectListFactory().get_projects_in_folder("here")
+    def test_find_project_folders_when_folder_not_found(self, tmp_path):
+        result = ProjectListFactory().find_project_folders(str(tmp_path / "here"))
 
         assert result == []
-        path_mock.assert_called_once_with("here")
 
-    def test_is_folder_project_for_python(self,):
-        folder_mock = MagicMock(spec=Path)
-        folder_mock.glob.return_value = ["entry"]
+    def test_find_project_folders_does_not_search_inside_projects(self, tmp_path):
+        make_project_folder(tmp_path / "project")
+        make_project_folder(tmp_path / "project" / "nested")
 
-        result = ProjectListFactory().is_folder_project(folder_mock)
+        result = ProjectListFactory().find_project_folders(str(tmp_path))
 
-        assert result is True
-        folder_mock.glob.assert_called_once_with("requirements.txt")
+        assert result == [tmp_path / "project"]
 
-    def test_is_folder_project_for_node(self,):
-        folder_mock = MagicMock(spec=Path)
-        folder_mock.glob.side_effect = [[], ["entry"]]
+    def test_is_folder_project_for_python(self, tmp_path):
+        (tmp_path / "requirements.txt").write_text("")
 
-        result = ProjectListFactory().is_folder_project(folder_mock)
+        assert ProjectListFactory().is_folder_project(str(tmp_path)) is True
 
-        assert result is True
-        assert folder_mock.glob.call_args_list == [
-            call("requirements.txt"),
-            call("package.json"),
-        ]
+    def test_is_folder_project_for_node(self, tmp_path):
+        (tmp_path / "package.json").write_text("")
 
-    def test_is_folder_project_not_a_project(self,):
-        folder_mock = MagicMock(spec=Path)
-        folder_mock.glob.side_effect = [[], []]
+        assert ProjectListFactory().is_folder_project(str(tmp_path)) is True
 
-        result = ProjectListFactory().is_folder_project(folder_mock)
+    def test_is_folder_project_not_a_project(self, tmp_path):
+        (tmp_path / "requirements.txt").mkdir()
 
-        assert result is False
-        assert folder_mock.glob.call_args_list == [
-            call("requirements.txt"),
-            call("package.json"),
-        ]
+        assert ProjectListFactory().is_folder_project(str(tmp_path)) is False
@@ -1,16 +1,19 @@
-from pathlib import Path
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock
 
 import pytest
 
 from monorepo_builder.configuration import Configuration, ConfigurationManager
+from monorepo_builder.file_list import FileList
 from monorepo_builder.projects import (
     Project,
     ProjectType,
-    File,
     RequirementsFileNotFoundException,
+    file_suffix,
 )
 
+HASH_1 = "1" * 40
+HASH_2 = "2" * 40
+
 
 class TestProject:
     def test_get_project_name(self, mocker):
@@ -38,6 +41,24 @@ class TestProject:
         project = Project(project_path="something/lib/project")
         assert project.project_type == ProjectType.Library
 
+    def test_derived_attributes_are_calculated_once(self, mocker):
+        get_mock = mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=MagicMock(spec=Configuration, library_folder_name="lib"),
+        )
+        path_mock = mocker.patch("monorepo_builder.projects.Path")
+        path_mock.return_value.parts = ("first", "lib", "third")
+        path_mock.return_value.name = "third"
+        project = Project(project_path="first/lib/third")
+
+        assert project.project_type == ProjectType.Library
+        assert project.project_type == ProjectType.Library
+        assert project.name == "third"
+        assert project.name == "third"
+        get_mock.assert_called_once()
+        assert path_mock.call_count == 2
+
     def test_is_library_project_only_when_full_folder_name_used(self, mocker):
         configuration_mock = MagicMock(spec=Configuration, library_folder_name="lib")
         mocker.patch.object(
@@ -67,55 +88,61 @@ class TestProject:
         path_mock.assert_called_once_with("this")
 
     def test_project_has_not_changed(self):
-        current_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        current_file_2 = MagicMock(spec=File, file="second", last_changed_time=1)
         current_project = Project(
-            project_path="here", file_list=[current_file_2, current_file_1]
+            project_path="here",
+            file_list=FileList("here", ["first", "second"], [1, 1], [0, 0]),
         )
-        previous_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        previous_file_2 = MagicMock(spec=File, file="second", last_changed_time=1)
         project_from_last_run = MagicMock(
-            spec=Project, file_list=[previous_file_1, previous_file_2]
+            spec=Project,
+            file_list=FileList("here", ["first", "second"], [1, 1], [0, 0]),
         )
 
         current_project.set_needs_build_due_to_file_changes(project_from_last_run)
 
         assert current_project.needs_build is False
+        assert current_project.build_reason is None
 
     def test_project_has_changed_with_different_file_count(self):
-        current_file_1 = MagicMock(spec=File)
-        current_project = Project(project_path="here", file_list=[current_file_1])
-        previous_file_1 = MagicMock(spec=File)
-        previous_file_2 = MagicMock(spec=File)
+        current_project = Project(
+            project_path="here", file_list=FileList("here", ["first"], [1], [0])
+        )
         project_from_last_run = MagicMock(
-            spec=Project, file_list=[previous_file_2, previous_file_1]
+            spec=Project,
+            file_list=FileList("here", ["first", "second"], [1, 1], [0, 0]),
         )
 
         current_project.set_needs_build_due_to_file_changes(project_from_last_run)
 
         assert current_project.needs_build is True
+        assert current_project.build_reason == "files changed"
 
     def test_project_from_previous_run_is_none(self):
-        current_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        current_file_2 = MagicMock(spec=File, file="second", last_changed_time=1)
         current_project = Project(
-            project_path="here", file_list=[current_file_1, current_file_2]
+            project_path="here",
+            file_list=FileList("here", ["first", "second"], [1, 1], [0, 0]),
         )
 
         current_project.set_needs_build_due_to_file_changes(None)
 
         assert current_project.needs_build is True
+        assert current_project.build_reason == "not built before"
+
+    def test_set_needs_build_keeps_the_first_reason(self):
+        current_project = Project(project_path="here")
+
+        current_project.set_needs_build("library changed: lib1")
+        current_project.set_needs_build("library changed: lib2")
+
+        assert current_project.needs_build is True
+        assert current_project.build_reason == "library changed: lib1"
 
     def test_project_has_changed_with_with_unmatching_files(self):
-        current_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        current_file_2 = MagicMock(spec=File, file="second", last_changed_time=1)
         current_project = Project(
-            project_path="here", file_list=[current_file_1, current_file_2]
+            project_path="here",
+            file_list=FileList("here", ["first", "second"], [1, 1], [0, 0]),
         )
-        previous_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        previous_file_2 = MagicMock(spec=File, file="other", last_changed_time=1)
         project_from_last_run = MagicMock(
-            spec=Project, file_list=[previous_file_1, previous_file_2]
+            spec=Project, file_list=FileList("here", ["first", "other"], [1, 1], [0, 0])
         )
 
         current_project.set_needs_build_due_to_file_changes(project_from_last_run)
@@ -123,137 +150,106 @@ class TestProject:
         assert current_project.needs_build is True
 
     def test_project_has_changed_with_with_matching_files_and_different_times(self):
-        current_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        current_file_2 = MagicMock(spec=File, file="second", last_changed_time=1)
         current_project = Project(
-            project_path="here", file_list=[current_file_1, current_file_2]
+            project_path="here",
+            file_list=FileList("here", ["first", "second"], [1, 1], [0, 0]),
         )
-        previous_file_1 = MagicMock(spec=File, file="first", last_changed_time=1)
-        previous_file_2 = MagicMock(spec=File, file="second", last_changed_time=2)
         project_from_last_run = MagicMock(
-            spec=Project, file_list=[previous_file_1, previous_file_2]
+            spec=Project,
+            file_list=FileList("here", ["first", "second"], [1, 2], [0, 0]),
         )
 
         current_project.set_needs_build_due_to_file_changes(project_from_last_run)
 
         assert current_project.needs_build is True
 
-    def test_set_needs_build_due_to_updated_library_reference_yes(self, mocker):
-        updated_library_names = ["one", "two"]
-        project_references_updated_library_mock = mocker.patch.object(
-            Project, "project_references_updated_library", return_value=True
+    def test_project_content_has_not_changed_with_different_times(self):
+        current_project = Project(
+            project_path="here",
+            file_list=FileList("here", ["first"], [2], [0], [HASH_1]),
+        )
+        project_from_last_run = Project(
+            project_path="here",
+            file_list=FileList("here", ["first"], [1], [0], [HASH_1]),
         )
-        set_needs_build_mock = mocker.patch.object(Project, "set_needs_build")
 
-        project = Project(project_path="path")
-        project.set_needs_build_due_to_updated_library_reference(updated_library_names)
+        current_project.set_needs_build_due_to_file_changes(project_from_last_run)
 
-        project_references_updated_library_mock.assert_called_once_with(
-            updated_library_names
-        )
-        set_needs_build_mock.assert_called_once()
+        assert current_project.needs_build is False
 
-    def test_set_needs_build_due_to_updated_library_reference_no(self, mocker):
-        updated_library_names = ["one", "two"]
-        project_references_updated_library_mock = mocker.patch.object(
-            Project, "project_references_updated_library", return_value=False
+    def test_project_content_has_changed(self):
+        current_project = Project(
+            project_path="here",
+            file_list=FileList("here", ["first"], [1], [0], [HASH_1]),
+        )
+        project_from_last_run = Project(
+            project_path="here",
+            file_list=FileList("here", ["first"], [1], [0], [HASH_2]),
         )
-        set_needs_build_mock = mocker.patch.object(Project, "set_needs_build")
 
-        project = Project(project_path="path")
-        project.set_needs_build_due_to_updated_library_reference(updated_library_names)
+        current_project.set_needs_build_due_to_file_changes(project_from_last_run)
 
-        project_references_updated_library_mock.assert_called_once_with(
-            updated_library_names
-        )
-        set_needs_build_mock.assert_not_called()
+        assert current_project.needs_build is True
 
-    def test_project_does_reference_updated_library(self, mocker):
-        requirements = "one\ntwo\nthree\nmine"
-        mocker.patch.object(
-            Project, "read_requirements_file", return_value=requirements
+    def test_project_content_has_changed_when_last_run_had_no_hashes(self):
+        current_project = Project(
+            project_path="here",
+            file_list=FileList("here", ["first"], [1], [0], [HASH_1]),
+        )
+        project_from_last_run = Project(
+            project_path="here", file_list=FileList("here", ["first"], [1], [0])
         )
-        library_project_names = ["blah", "two", "else"]
 
-        project = Project(project_path="path")
-        result = project.project_references_updated_library(library_project_names)
+        current_project.set_needs_build_due_to_file_changes(project_from_last_run)
 
-        assert result is True
+        assert current_project.needs_build is True
 
-    def test_project_does_not_reference_updated_library(self, mocker):
-        requirements = "not\nplus\nthree\nmine"
-        mocker.patch.object(
-            Project, "read_requirements_file", return_value=requirements
-        )
-        library_project_names = ["one", "two", "else"]
+    def test_read_dependency_names_for_python(self, tmp_path):
+        (tmp_path / "requirements.txt").write_text("One_Lib>=1.0\nsomething\n")
+        project = Project(project_path=str(tmp_path))
 
-        project = Project(project_path="path")
-        result = project.project_references_updated_library(library_project_names)
+        result = project.read_dependency_names()
 
-        assert result is False
+        assert result == {"one-lib", "something"}
 
-    def test_read_requirements_file_for_python(self, mocker):
-        join_mock = mocker.patch(
-            "monorepo_builder.projects.os.path.join", side_effect=["file1", "file2"]
-        )
-        path_mock = mocker.patch.object(Path, "__init__", return_value=None)
-        project = Project(project_path="here")
-        exist_mock = mocker.patch.object(Path, "exists", return_value=True)
-        mocker.patch.object(Path, "read_text", return_value="content")
-
-        result = project.read_requirements_file()
-
-        assert join_mock.call_args_list == [
-            call("here", "requirements.txt"),
-            call("here", "package.json"),
-        ]
-        path_mock.assert_called_once_with("file1")
-        exist_mock.assert_called_once()
-        assert result == "content"
-
-    def test_read_requirements_file_for_node(self, mocker):
-        join_mock = mocker.patch(
-            "monorepo_builder.projects.os.path.join", side_effect=["file1", "file2"]
-        )
-        path_mock = mocker.patch.object(Path, "__init__", return_value=None)
-        project = Project(project_path="here")
-        exist_mock = mocker.patch.object(Path, "exists", side_effect=[False, True])
-        mocker.patch.object(Path, "read_text", return_value="content")
-
-        result = project.read_requirements_file()
-
-        assert join_mock.call_args_list == [
-            call("here", "requirements.txt"),
-            call("here", "package.json"),
-        ]
-        assert path_mock.call_args_list == [call("file1"), call("file2")]
-        assert exist_mock.call_count == 2
-        assert result == "content"
-
-    def test_read_requirements_file_not_found(self, mocker):
-        join_mock = mocker.patch(
-            "monorepo_builder.projects.os.path.join", side_effect=["file1", "file2"]
-        )
-        path_mock = mocker.patch.object(Path, "__init__", return_value=None)
-        project = Project(project_path="here")
-        exist_mock = mocker.patch.object(Path, "exists", side_effect=[False, False])
-        mocker.patch.object(Project, "name", return_value="project")
+    def test_read_dependency_names_for_node(self, tmp_path):
+        (tmp_path / "package.json").write_text('{"dependencies": {"thing": "^1"}}')
+        project = Project(project_path=str(tmp_path))
+
+        result = project.read_dependency_names()
+
+        assert result == {"thing"}
+
+    def test_read_dependency_names_combines_python_and_node(self, tmp_path):
+        (tmp_path / "requirements.txt").write_text("one")
+        (tmp_path / "package.json").write_text('{"devDependencies": {"two": "^1"}}')
+        project = Project(project_path=str(tmp_path))
+
+        result = project.read_dependency_names()
+
+        assert result == {"one", "two"}
+
+    def test_read_dependency_names_not_found(self, tmp_path):
+        project = Project(project_path=str(tmp_path))
 
         with pytest.raises(RequirementsFileNotFoundException):
-            project.read_requirements_file()
-
-        assert join_mock.call_args_list == [
-            call("here", "requirements.txt"),
-            call("here", "package.json"),
-        ]
-        assert path_mock.call_args_list == [call("file1"), call("file2")]
-        assert exist_mock.call_count == 2
-
-
-class TestFile:
-    def test_file_factory(self):
-        file = MagicMock(spec=Path, **{"__str__.return_value": "me"})
-        file.stat.return_value.st_mtime = 1000
-        result = File.file_factory(file)
-        assert result.file == "me"
-        assert result.last_changed_time == 1000
+            project.read_dependency_names()
+
+    def test_read_package_name(self, tmp_path):
+        (tmp_path / "package.json").write_text('{"name": "@acme/ui-kit"}')
+        project = Project(project_path=str(tmp_path))
+
+        assert project.read_package_name() == "@acme/ui-kit"
+
+    def test_read_package_name_without_package_json(self, tmp_path):
+        project = Project(project_path=str(tmp_path))
+
+        assert project.read_package_name() is None
+
+
+def test_file_suffix():
+    assert file_suffix("file.py") == ".py"
+    assert file_suffix("archive.tar.gz") == ".gz"
+    assert file_suffix(".hidden") == ""
+    assert file_suffix("trailing.") == ""
+    assert file_suffix("none") == ""
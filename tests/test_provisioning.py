@@ -0,0 +1,193 @@
+import errno
+import os
+
+import pytest
+
+from monorepo_builder.configuration import ProvisioningMode
+from monorepo_builder.provisioning import (
+    MANIFEST_FILENAME,
+    TEMPORARY_SUFFIX,
+    FolderProvisioner,
+    publish_file,
+)
+
+
+@pytest.fixture
+def installers(tmp_path):
+    folder = tmp_path / "installers"
+    (folder / "nested").mkdir(parents=True)
+    (folder / "lib1.whl").write_text("lib1")
+    (folder / "nested" / "lib2.tgz").write_text("lib2")
+    return folder
+
+
+def read_tree(folder):
+    return {
+        os.path.relpath(os.path.join(path, name), folder): open(
+            os.path.join(path, name)
+        ).read()
+        for path, _, names in os.walk(folder)
+        for name in names
+        if name != MANIFEST_FILENAME
+    }
+
+
+class TestFolderProvisioner:
+    @pytest.mark.parametrize("mode", list(ProvisioningMode))
+    def test_provision(self, tmp_path, installers, mode):
+        FolderProvisioner(mode).provision(str(installers), str(tmp_path / "project"))
+
+        assert read_tree(tmp_path / "project") == {
+            "lib1.whl": "lib1",
+            os.path.join("nested", "lib2.tgz"): "lib2",
+        }
+
+    @pytest.mark.parametrize("mode", list(ProvisioningMode))
+    def test_provision_again_leaves_current_files(self, tmp_path, installers, mode):
+        FolderProvisioner(mode).provision(str(installers), str(tmp_path / "project"))
+        provisioner = FolderProvisioner(mode)
+
+        provisioner.provision(str(installers), str(tmp_path / "project"))
+
+        assert provisioner.files_placed == 0
+        assert provisioner.files_unchanged == 2
+
+    def test_hardlink_shares_the_installer(self, tmp_path, installers):
+        FolderProvisioner(ProvisioningMode.hardlink).provision(
+            str(installers), str(tmp_path / "project")
+        )
+
+        assert os.path.samefile(
+            installers / "lib1.whl", tmp_path / "project" / "lib1.whl"
+        )
+
+    def test_symlink_points_at_the_installer(self, tmp_path, installers):
+        FolderProvisioner(ProvisioningMode.symlink).provision(
+            str(installers), str(tmp_path / "project")
+        )
+
+        assert os.readlink(tmp_path / "project" / "lib1.whl") == str(
+            installers / "lib1.whl"
+        )
+
+    def test_provision_updates_existing_folder(self, tmp_path, installers):
+        FolderProvisioner(ProvisioningMode.copy).provision(
+            str(installers), str(tmp_path / "project")
+        )
+        (installers / "lib1.whl").write_text("lib1 rebuilt")
+        (installers / "nested" / "lib2.tgz").unlink()
+        (tmp_path / "project" / "placed-elsewhere.whl").write_text("other")
+
+        FolderProvisioner(ProvisioningMode.copy).provision(
+            str(installers), str(tmp_path / "project")
+        )
+
+        assert read_tree(tmp_path / "project") == {
+            "lib1.whl": "lib1 rebuilt",
+            "placed-elsewhere.whl": "other",
+        }
+
+    def test_provision_named_entries(self, tmp_path, installers):
+        FolderProvisioner(ProvisioningMode.copy).provision(
+            str(installers), str(tmp_path / "project")
+        )
+        (tmp_path / "project" / "other.whl").write_text("other")
+
+        FolderProvisioner(ProvisioningMode.copy).provision(
+            str(installers), str(tmp_path / "project"), ["lib1.whl"]
+        )
+
+        assert read_tree(tmp_path / "project") == {
+            "lib1.whl": "lib1",
+            "other.whl": "other",
+        }
+
+    def test_provision_into_the_source_folder_changes_nothing(self, installers):
+        (installers / "unselected.whl").write_text("unselected")
+
+        FolderProvisioner(ProvisioningMode.copy).provision(
+            str(installers), str(installers), ["lib1.whl"]
+        )
+
+        assert read_tree(installers) == {
+            "lib1.whl": "lib1",
+            os.path.join("nested", "lib2.tgz"): "lib2",
+            "unselected.whl": "unselected",
+        }
+        assert not (installers / MANIFEST_FILENAME).exists()
+
+    def test_provision_skips_files_being_published(self, tmp_path, installers):
+        (installers / f".lib3.whl.abc{TEMPORARY_SUFFIX}").write_text("partial")
+
+        FolderProvisioner(ProvisioningMode.copy).provision(
+            str(installers), str(tmp_path / "project")
+        )
+
+        assert read_tree(tmp_path / "project") == {
+            "lib1.whl": "lib1",
+            os.path.join("nested", "lib2.tgz"): "lib2",
+        }
+
+    def test_hardlink_falls_back_to_copy(self, mocker, tmp_path, installers):
+        link_mock = mocker.patch(
+            "monorepo_builder.provisioning.os.link",
+            side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+        )
+        provisioner = FolderProvisioner(ProvisioningMode.hardlink)
+
+        provisioner.provision(str(installers), str(tmp_path / "project"))
+
+        assert read_tree(tmp_path / "project")["lib1.whl"] == "lib1"
+        assert provisioner.use_copy
+        link_mock.assert_called_once()
+
+    def test_reflink_falls_back_to_copy(self, mocker, tmp_path, installers):
+        mocker.patch(
+            "monorepo_builder.provisioning.fcntl.ioctl",
+            side_effect=OSError(errno.EOPNOTSUPP, "Operation not supported"),
+        )
+        provisioner = FolderProvisioner(ProvisioningMode.reflink)
+
+        provisioner.provision(str(installers), str(tmp_path / "project"))
+
+        assert read_tree(tmp_path / "project")["lib1.whl"] == "lib1"
+        assert provisioner.use_copy
+
+    def test_other_errors_are_raised(self, mocker, tmp_path, installers):
+        mocker.patch(
+            "monorepo_builder.provisioning.os.link",
+            side_effect=OSError(errno.ENOSPC, "No space left on device"),
+        )
+
+        with pytest.raises(OSError):
+            FolderProvisioner(ProvisioningMode.hardlink).provision(
+                str(installers), str(tmp_path / "project")
+            )
+
+
+class TestPublishFile:
+    def test_publish_file(self, tmp_path, installers):
+        (tmp_path / "lib1.whl").write_text("new lib1")
+
+        publish_file(str(tmp_path / "lib1.whl"), str(installers))
+
+        assert read_tree(installers) == {
+            "lib1.whl": "new lib1",
+            os.path.join("nested", "lib2.tgz"): "lib2",
+        }
+
+    def test_publish_file_removes_the_temporary_file_on_failure(
+        self, mocker, tmp_path, installers
+    ):
+        mocker.patch(
+            "monorepo_builder.provisioning.shutil.copy",
+            side_effect=OSError(errno.ENOSPC, "No space left on device"),
+        )
+
+        with pytest.raises(OSError):
+            publish_file(str(tmp_path / "lib3.whl"), str(installers))
+
+        assert read_tree(installers) == {
+            "lib1.whl": "lib1",
+            os.path.join("nested", "lib2.tgz"): "lib2",
+        }
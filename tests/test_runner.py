@@ -1,14 +1,203 @@
+import json
 from pathlib import Path
-from unittest.mock import MagicMock
-
-from monorepo_builder.build_executor import ProjectBuildRequests
-from monorepo_builder.configuration import ConfigurationManager, Configuration
-from monorepo_builder.project_list import ProjectListManager, Projects
+from unittest.mock import MagicMock, call
+
+from click.testing import CliRunner
+
+from monorepo_builder.affected import AffectedProjectsFinder, GitDiffException
+from monorepo_builder.build_executor import (
+    BuildExecutor,
+    BuildRequestStatus,
+    ProjectBuildRequest,
+    ProjectBuildRequests,
+)
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.configuration import (
+    ConfigurationManager,
+    Configuration,
+    FailureMode,
+)
+from monorepo_builder.daemon import DaemonClient
+from monorepo_builder.dependencies import DependencyIndex
+from monorepo_builder.file_list import FileList
+from monorepo_builder.fingerprints import FileHashCacheManager
+from monorepo_builder.folder_cache import FolderListingCacheManager
+from monorepo_builder.history import (
+    BuildHistory,
+    BuildHistoryManager,
+    BuildRecord,
+    ProjectBuildStatistics,
+)
+from monorepo_builder.project_list import ProjectListManager, Projects, ProjectIndex
 from monorepo_builder.projects import Project
-from monorepo_builder.runner import BuildRunner, Runner
+from monorepo_builder.state_store import StateStoreManager, StateStore
+from monorepo_builder.runner import BuildRunner, Runner, run_build
+from monorepo_builder.scheduling import BuildDurationEstimator
+from monorepo_builder.sharding import Shard
+from monorepo_builder.tracing import Tracer, TraceManager
 from monorepo_builder.version import ProjectVersionManager, ProjectVersions
 
 
+class TestCommandLine:
+    def test_run_build(self, mocker):
+        run_mock = mocker.patch.object(Runner, "run")
+
+        result = CliRunner().invoke(run_build, ["--version", "2.0", "-j", "3"])
+
+        assert result.exit_code == 0
+        run_mock.assert_called_once_with(
+            "2.0",
+            build_jobs=3,
+            trace_filename=None,
+            shard=None,
+            failure_mode=None,
+            run_timeout_seconds=None,
+        )
+
+    def test_run_build_prompts_for_version(self, mocker):
+        run_mock = mocker.patch.object(Runner, "run")
+
+        result = CliRunner().invoke(run_build, [], input="\n")
+
+        assert result.exit_code == 0
+        run_mock.assert_called_once_with(
+            "1.0.0",
+            build_jobs=None,
+            trace_filename=None,
+            shard=None,
+            failure_mode=None,
+            run_timeout_seconds=None,
+        )
+
+    def test_run_build_with_shard(self, mocker):
+        run_mock = mocker.patch.object(Runner, "run")
+
+        result = CliRunner().invoke(run_build, ["--version", "2.0", "--shard", "2/3"])
+
+        assert result.exit_code == 0
+        run_mock.assert_called_once_with(
+            "2.0",
+            build_jobs=None,
+            trace_filename=None,
+            shard="2/3",
+            failure_mode=None,
+            run_timeout_seconds=None,
+        )
+
+    def test_run_build_with_failure_mode_and_timeout(self, mocker):
+        run_mock = mocker.patch.object(Runner, "run")
+
+        result = CliRunner().invoke(
+            run_build,
+            ["--version", "2.0", "--failure-mode", "cancel", "--timeout", "600"],
+        )
+
+        assert result.exit_code == 0
+        run_mock.assert_called_once_with(
+            "2.0",
+            build_jobs=None,
+            trace_filename=None,
+            shard=None,
+            failure_mode=FailureMode.cancel,
+            run_timeout_seconds=600,
+        )
+
+    def test_run_build_with_invalid_shard(self, mocker):
+        run_mock = mocker.patch.object(Runner, "run")
+
+        result = CliRunner().invoke(run_build, ["--version", "2.0", "--shard", "4/3"])
+
+        assert result.exit_code == 2
+        assert "Invalid shard 4/3" in result.output
+        run_mock.assert_not_called()
+
+    def test_affected(self, mocker):
+        run_mock = mocker.patch.object(Runner, "run")
+        project = Project(project_path="/repo/platform/app")
+        find_mock = mocker.patch.object(
+            AffectedProjectsFinder, "find", return_value=[project]
+        )
+
+        result = CliRunner().invoke(run_build, ["affected", "--since", "main"])
+
+        assert result.exit_code == 0
+        assert result.output == "app\n"
+        find_mock.assert_called_once_with("main")
+        run_mock.assert_not_called()
+
+    def test_affected_as_json(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(monorepo_root_folder="/repo"),
+        )
+        project = Project(project_path="/repo/libraries/lib")
+        mocker.patch.object(AffectedProjectsFinder, "find", return_value=[project])
+
+        result = CliRunner().invoke(
+            run_build, ["affected", "--since", "main", "--json"]
+        )
+
+        assert json.loads(result.output) == [
+            {"name": "lib", "path": "libraries/lib", "type": "Library"}
+        ]
+
+    def test_history(self, mocker, tmp_path):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(history_filename=str(tmp_path / "history.db")),
+        )
+        mocker.patch.object(BuildHistoryManager, "build_history", None)
+        BuildHistoryManager.get().add_run(
+            "1.0",
+            0.0,
+            100.0,
+            True,
+            [
+                BuildRecord("lib1", "built", 10.0, 22.0, 0, reason="files changed"),
+                BuildRecord("app", "failed", 22.0, 112.0, 1, reason="not built before"),
+            ],
+        )
+
+        result = CliRunner().invoke(run_build, ["history"])
+        project_result = CliRunner().invoke(
+            run_build, ["history", "--project", "app", "--json"]
+        )
+        BuildHistoryManager.close()
+
+        assert result.exit_code == 0
+        assert [line.split() for line in result.output.splitlines()[1:]] == [
+            ["app", "1", "1m30s", "1m30s", "100%", "0%"],
+            ["lib1", "1", "12.0s", "12.0s", "0%", "0%"],
+        ]
+        assert json.loads(project_result.output)[0]["duration"] == 90.0
+        assert json.loads(project_result.output)[0]["reason"] == "not built before"
+
+    def test_history_when_disabled(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(history_filename="")
+        )
+        mocker.patch.object(BuildHistoryManager, "build_history", None)
+
+        result = CliRunner().invoke(run_build, ["history"])
+
+        assert result.exit_code == 1
+        assert "not configured" in result.output
+
+    def test_affected_with_git_error(self, mocker):
+        mocker.patch.object(
+            AffectedProjectsFinder,
+            "find",
+            side_effect=GitDiffException("main", "unknown revision"),
+        )
+
+        result = CliRunner().invoke(run_build, ["affected", "--since", "main"])
+
+        assert result.exit_code == 1
+        assert "unknown revision" in result.output
+
+
 class TestRunner:
     def test_run_build_successful(self, mocker):
         projects = MagicMock(spec=Projects)
@@ -19,13 +208,15 @@ class TestRunner:
         do_builds_mock = mocker.patch.object(Runner, "do_builds", return_value=requests)
         finish_builds_mock = mocker.patch.object(Runner, "finish_builds_on_success")
         setup_mock = mocker.patch.object(Runner, "setup")
+        record_history_mock = mocker.patch.object(Runner, "record_history")
 
         Runner.run("1.0")
 
         gather_projects_mock.assert_called_once()
-        do_builds_mock.assert_called_once_with(projects)
+        do_builds_mock.assert_called_once_with(projects, "1.0")
         finish_builds_mock.assert_called_once_with(projects, "1.0")
         setup_mock.assert_called_once()
+        record_history_mock.assert_called_once_with(requests, "1.0", mocker.ANY)
 
     def test_run_build_fails(self, mocker):
         projects = MagicMock(spec=Projects)
@@ -36,14 +227,65 @@ class TestRunner:
         do_builds_mock = mocker.patch.object(Runner, "do_builds", return_value=requests)
         finish_builds_mock = mocker.patch.object(Runner, "finish_builds_on_failure")
         setup_mock = mocker.patch.object(Runner, "setup")
+        record_history_mock = mocker.patch.object(Runner, "record_history")
 
         Runner.run("1.0")
 
         gather_projects_mock.assert_called_once()
-        do_builds_mock.assert_called_once_with(projects)
+        do_builds_mock.assert_called_once_with(projects, "1.0")
         finish_builds_mock.assert_called_once_with(requests)
         setup_mock.assert_called_once()
 
+    def test_run_build_without_trace_records_no_spans(self, mocker):
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        mocker.patch.object(TraceManager, "tracer", None)
+        tracers_during_builds = []
+
+        def do_builds(projects, version):
+            tracers_during_builds.append(TraceManager.tracer)
+            return MagicMock(spec=ProjectBuildRequests, success=True)
+
+        mocker.patch.object(Runner, "setup")
+        mocker.patch.object(Runner, "gather_projects")
+        mocker.patch.object(Runner, "do_builds", side_effect=do_builds)
+        mocker.patch.object(Runner, "finish_builds_on_success")
+        mocker.patch.object(Runner, "record_history")
+        mocker.patch.object(Runner, "report_artifact_cache")
+        add_span_spy = mocker.spy(Tracer, "add_span")
+
+        Runner.run("1.0")
+
+        assert tracers_during_builds == [None]
+        add_span_spy.assert_not_called()
+
+    def test_run_build_with_trace(self, mocker, tmp_path):
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        trace_filename = tmp_path / "trace.json"
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(trace_filename=str(trace_filename)),
+        )
+        mocker.patch.object(TraceManager, "tracer", None)
+        mocker.patch.object(Runner, "setup")
+        mocker.patch.object(Runner, "gather_projects")
+        mocker.patch.object(
+            Runner,
+            "do_builds",
+            return_value=MagicMock(spec=ProjectBuildRequests, success=True),
+        )
+        mocker.patch.object(Runner, "finish_builds_on_success")
+        mocker.patch.object(Runner, "record_history")
+        mocker.patch.object(Runner, "report_artifact_cache")
+
+        Runner.run("1.0")
+
+        saved = json.loads(trace_filename.read_text())
+        names = [event["name"] for event in saved["traceEvents"] if event["ph"] == "X"]
+        assert names == ["setup", "gather projects", "builds", "finish"]
+        assert TraceManager.tracer is None
+
     def test_setup(self, mocker):
         mocker.patch("monorepo_builder.runner.write_to_console")
         configuration_load_mock = mocker.patch.object(ConfigurationManager, "load")
@@ -58,81 +300,64 @@ class TestRunner:
         path_mock.assert_called_once_with("here")
         mkdir_mock.assert_called_once_with(exist_ok=True)
 
+    def test_setup_applies_configuration_overrides(self, mocker):
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        mocker.patch.object(ConfigurationManager, "load")
+        override_mock = mocker.patch.object(ConfigurationManager, "override")
+        configuration = MagicMock(spec=Configuration, installer_folder="here")
+        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+        mocker.patch.object(Path, "mkdir")
+
+        Runner().setup({"build_jobs": 4})
+
+        override_mock.assert_called_once_with({"build_jobs": 4})
+
     def test_gather_projects(self, mocker):
         mocker.patch("monorepo_builder.runner.write_to_console")
+        mocker.patch.object(DaemonClient, "get_projects", return_value=None)
         projects = MagicMock(spec=Projects)
         mocker.patch.object(Projects, "projects_factory", return_value=projects)
         identify_projects_needing_build_mock = mocker.patch.object(
             BuildRunner, "identify_projects_needing_build"
         )
+        save_hash_cache_mock = mocker.patch.object(FileHashCacheManager, "save")
+        save_folder_cache_mock = mocker.patch.object(FolderListingCacheManager, "save")
 
         result = Runner().gather_projects()
 
         assert result is projects
         identify_projects_needing_build_mock.assert_called_once_with(projects)
+        save_hash_cache_mock.assert_called_once()
+        save_folder_cache_mock.assert_called_once()
 
-    def test_do_builds_all_succeed(self, mocker):
+    def test_gather_projects_from_daemon(self, mocker):
         mocker.patch("monorepo_builder.runner.write_to_console")
-        projects = MagicMock(spec=Projects)
-        requests = MagicMock(spec=ProjectBuildRequests, success=True)
-        build_library_projects_mock = mocker.patch.object(
-            BuildRunner, "build_library_projects", return_value=requests
-        )
-        build_standard_projects_mock = mocker.patch.object(
-            BuildRunner, "build_standard_projects"
+        project = Project(project_path="/repo/libraries/lib")
+        mocker.patch.object(DaemonClient, "get_projects", return_value=[project])
+        projects_factory_mock = mocker.patch.object(Projects, "projects_factory")
+        identify_projects_needing_build_mock = mocker.patch.object(
+            BuildRunner, "identify_projects_needing_build"
         )
 
-        result = Runner().do_builds(projects)
+        result = Runner().gather_projects()
 
-        assert result is requests
-        build_library_projects_mock.assert_called_once_with(projects)
-        build_standard_projects_mock.assert_called_once_with(projects)
-        requests.extend.assert_called_once_with(
-            build_standard_projects_mock.return_value
-        )
+        assert result == [project]
+        assert isinstance(result, Projects)
+        projects_factory_mock.assert_not_called()
+        identify_projects_needing_build_mock.assert_called_once_with(result)
 
-    def test_do_builds_library_builds_fail(self, mocker):
+    def test_do_builds(self, mocker):
         mocker.patch("monorepo_builder.runner.write_to_console")
         projects = MagicMock(spec=Projects)
-        requests = MagicMock(spec=ProjectBuildRequests, success=False)
-        build_library_projects_mock = mocker.patch.object(
-            BuildRunner, "build_library_projects", return_value=requests
-        )
-        build_standard_projects_mock = mocker.patch.object(
-            BuildRunner, "build_standard_projects"
-        )
-
-        result = Runner().do_builds(projects)
-
-        assert result is requests
-        build_library_projects_mock.assert_called_once_with(projects)
-        build_standard_projects_mock.assert_not_called()
-        requests.extend.assert_not_called()
-
-    def test_do_builds_library_builds_succeed_standard_builds_fail(self, mocker):
-        mocker.patch("monorepo_builder.runner.write_to_console")
         requests = MagicMock(spec=ProjectBuildRequests, success=True)
-        projects = MagicMock(spec=Projects)
-
-        std_requests = MagicMock()
-
-        def handle_standard_return(arg):
-            requests.success = False
-            return std_requests
-
-        build_library_projects_mock = mocker.patch.object(
-            BuildRunner, "build_library_projects", return_value=requests
-        )
-        build_standard_projects_mock = mocker.patch.object(
-            BuildRunner, "build_standard_projects", side_effect=handle_standard_return
+        build_projects_mock = mocker.patch.object(
+            BuildRunner, "build_projects", return_value=requests
         )
 
-        result = Runner().do_builds(projects)
+        result = Runner().do_builds(projects, "1.0")
 
         assert result is requests
-        build_library_projects_mock.assert_called_once_with(projects)
-        build_standard_projects_mock.assert_called_once_with(projects)
-        requests.extend.assert_called_once_with(std_requests)
+        build_projects_mock.assert_called_once_with(projects, "1.0")
 
     def test_finish_builds_on_success(self, mocker):
         projects = MagicMock(spec=Projects)
@@ -146,12 +371,67 @@ class TestRunner:
         save_version_list_mock = mocker.patch.object(
             ProjectVersionManager, "save_version_list"
         )
+        state_store = MagicMock(spec=StateStore)
+        mocker.patch.object(StateStoreManager, "get", return_value=state_store)
 
         Runner().finish_builds_on_success(projects, "vers")
 
         save_project_list_mock.assert_called_once_with(projects)
         build_version_list_mock.assert_called_once_with(projects, "vers")
         save_version_list_mock.assert_called_once_with(version_list)
+        state_store.transaction.assert_called_once()
+
+    def test_save_trace(self, mocker, tmp_path):
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(trace_filename=str(tmp_path / "trace.json")),
+        )
+        mocker.patch.object(TraceManager, "tracer", None)
+        TraceManager.start()
+        with TraceManager.span("setup"):
+            pass
+
+        Runner().save_trace()
+
+        saved = json.loads((tmp_path / "trace.json").read_text())
+        assert "setup" in [event["name"] for event in saved["traceEvents"]]
+        assert TraceManager.tracer is None
+
+    def test_save_trace_when_not_requested(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        mocker.patch.object(TraceManager, "tracer", None)
+        TraceManager.start()
+        save_mock = mocker.patch.object(Tracer, "save")
+
+        Runner().save_trace()
+
+        save_mock.assert_not_called()
+
+    def test_record_history(self, mocker, tmp_path):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(
+                history_filename=str(tmp_path / "history.db"), history_max_runs=5
+            ),
+        )
+        mocker.patch.object(BuildHistoryManager, "build_history", None)
+        built = ProjectBuildRequest(
+            project=Project(project_path="/repo/libraries/lib1")
+        )
+        built.run_successful = True
+        not_started = ProjectBuildRequest(project=Project(project_path="/repo/web/app"))
+
+        Runner().record_history(
+            ProjectBuildRequests([built, not_started]), "1.0", 100.0
+        )
+
+        build_history = BuildHistory(str(tmp_path / "history.db"))
+        assert [record.project_name for record in build_history.records()] == ["lib1"]
+        build_history.close()
+        assert BuildHistoryManager.build_history is None
 
     def test_finish_builds_on_failure(self, mocker):
         mocker.patch("monorepo_builder.runner.write_to_console")
@@ -159,35 +439,70 @@ class TestRunner:
 
         Runner().finish_builds_on_failure(requests)
 
+    def test_finish_builds_on_failure_lists_the_builds(self, mocker):
+        write_to_console_mock = mocker.patch("monorepo_builder.runner.write_to_console")
+        requests = ProjectBuildRequests()
+        for name, status, run_successful in [
+            ("lib", BuildRequestStatus.Complete, False),
+            ("slow", BuildRequestStatus.Cancelled, False),
+            ("app", BuildRequestStatus.Skipped, None),
+        ]:
+            request = ProjectBuildRequest(project=Project(project_path=f"/repo/{name}"))
+            request.build_status = status
+            request.run_successful = run_successful
+            requests.append(request)
+
+        Runner().finish_builds_on_failure(requests)
+
+        assert write_to_console_mock.call_args_list == [
+            call("Builds failed", color="red"),
+            call("lib failed"),
+            call("slow cancelled"),
+            call("app skipped"),
+        ]
+
 
 class TestBuildRunner:
     def test_set_project_needs_build_flag(self, mocker):
-        lib_proj_1 = MagicMock(spec=Project, needs_build=True)
+        lib_proj_1 = MagicMock(spec=Project, project_path="one", needs_build=True)
         lib_proj_1.name = "one"
-        lib_proj_2 = MagicMock(spec=Project, needs_build=False)
+        lib_proj_2 = MagicMock(spec=Project, project_path="libtwo", needs_build=False)
         lib_proj_2.name = "libtwo"
-        std_proj_1 = MagicMock(spec=Project)
+        std_proj_1 = MagicMock(spec=Project, project_path="two", needs_build=False)
         std_proj_1.name = "two"
-        std_proj_2 = MagicMock(spec=Project)
+        std_proj_2 = MagicMock(spec=Project, project_path="three")
         std_proj_2.name = "three"
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("libtwo", {"one"})
+        dependency_index.add_project("two", {"libtwo"})
+        dependency_index.add_project("three", set())
         projects = MagicMock(
             spec=Projects,
             **{
-                "__iter__.return_value": [lib_proj_1, std_proj_1, std_proj_2],
+                "__iter__.return_value": [
+                    lib_proj_1,
+                    lib_proj_2,
+                    std_proj_1,
+                    std_proj_2,
+                ],
                 "library_projects": [lib_proj_1, lib_proj_2],
                 "standard_projects": [std_proj_1, std_proj_2],
+                "dependency_index": dependency_index,
+                "index": ProjectIndex([lib_proj_1, lib_proj_2, std_proj_1, std_proj_2]),
             },
         )
         previous_1 = MagicMock(spec=Project)
         previous_1.name = "two"
         previous_2 = MagicMock(spec=Project)
         previous_2.name = "one"
-        previous_projects = Projects()
-        previous_projects.extend([previous_1, previous_2])
+        previous_projects = {"two": previous_1, "one": previous_2}
         mocker.patch.object(
             ProjectListManager,
-            "load_list_from_last_successful_run",
-            return_value=previous_projects,
+            "load_project_from_last_successful_run",
+            side_effect=previous_projects.get,
+        )
+        report_file_changes_mock = mocker.patch.object(
+            BuildRunner, "_report_file_changes"
         )
 
         BuildRunner().identify_projects_needing_build(projects)
@@ -199,9 +514,216 @@ class TestBuildRunner:
             previous_1
         )
         std_proj_2.set_needs_build_due_to_file_changes.assert_called_once_with(None)
-        std_proj_1.set_needs_build_due_to_updated_library_reference.assert_called_once_with(
-            ["one"]
+        lib_proj_1.set_needs_build.assert_not_called()
+        lib_proj_2.set_needs_build.assert_called_once_with("library changed: one")
+        std_proj_1.set_needs_build.assert_called_once_with("library changed: one")
+        std_proj_2.set_needs_build.assert_not_called()
+        report_file_changes_mock.assert_called_once_with(lib_proj_1, previous_2)
+
+    def test_report_file_changes(self, mocker):
+        write_to_console_mock = mocker.patch("monorepo_builder.runner.write_to_console")
+        project = Project(
+            project_path="/repo/one",
+            file_list=FileList(
+                "/repo/one", ["a", "src/b", "src/c"], [1, 2, 3], [0] * 3
+            ),
+        )
+        previous_project = Project(
+            project_path="/repo/one",
+            file_list=FileList(
+                "/repo/one", ["a", "src/b", "src/d"], [1, 1, 1], [0] * 3
+            ),
+        )
+
+        BuildRunner()._report_file_changes(project, previous_project)
+
+        write_to_console_mock.assert_called_once_with(
+            "one changed: 1 modified, 1 added, 1 removed in src"
+        )
+
+    def test_build_projects(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        projects = MagicMock(spec=Projects)
+        requests = MagicMock(spec=ProjectBuildRequests)
+        all_projects_mock = mocker.patch.object(
+            ProjectBuildRequests, "all_projects", return_value=requests
+        )
+        build_version_list_mock = mocker.patch.object(
+            ProjectVersionManager, "build_version_list"
+        )
+        execute_builds_mock = mocker.patch.object(BuildExecutor, "execute_builds")
+        build_graph = MagicMock(spec=BuildGraph)
+        build_graph_factory_mock = mocker.patch.object(
+            BuildGraph, "build_graph_factory", return_value=build_graph
+        )
+        duration_estimator = BuildDurationEstimator({})
+        mocker.patch.object(
+            BuildDurationEstimator,
+            "build_duration_estimator_factory",
+            return_value=duration_estimator,
+        )
+        simulate_makespan_mock = mocker.patch(
+            "monorepo_builder.runner.simulate_makespan", return_value=12.0
+        )
+        report_makespan_mock = mocker.patch.object(BuildRunner, "_report_makespan")
+
+        result = BuildRunner().build_projects(projects, "1.0")
+
+        assert result is execute_builds_mock.return_value
+        all_projects_mock.assert_called_once_with(projects)
+        build_version_list_mock.assert_called_once_with(projects, "1.0")
+        build_graph_factory_mock.assert_called_once_with(
+            requests, projects.dependency_index
         )
-        std_proj_2.set_needs_build_due_to_updated_library_reference.assert_called_once_with(
-            ["one"]
+        execute_builds_mock.assert_called_once_with(requests, build_graph)
+        simulate_makespan_mock.assert_called_once_with(build_graph, {}, mocker.ANY)
+        report_makespan_mock.assert_called_once_with(
+            execute_builds_mock.return_value, 12.0, duration_estimator
         )
+
+    def test_build_projects_estimates_durations(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        lib1 = Project(
+            project_path="/repo/libraries/lib1",
+            file_list=FileList("/repo/libraries/lib1", ["a", "b"], [1, 1], [0, 0]),
+            needs_build=True,
+        )
+        app = Project(
+            project_path="/repo/platform/app",
+            file_list=FileList("/repo/platform/app", ["a"], [1], [0]),
+            needs_build=True,
+        )
+        projects = Projects()
+        projects.extend([lib1, app])
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("lib1", set())
+        dependency_index.add_project("app", {"lib1"})
+        projects._dependency_index = dependency_index
+        mocker.patch.object(
+            ProjectVersionManager,
+            "build_version_list",
+            return_value=ProjectVersions({}),
+        )
+        lib1_statistics = ProjectBuildStatistics("lib1", builds=1, durations=[30.0])
+        mocker.patch.object(
+            BuildDurationEstimator,
+            "build_duration_estimator_factory",
+            return_value=BuildDurationEstimator({"lib1": lib1_statistics}),
+        )
+        execute_builds_mock = mocker.patch.object(
+            BuildExecutor,
+            "execute_builds",
+            side_effect=lambda requests, graph: requests,
+        )
+
+        BuildRunner().build_projects(projects, "1.0")
+
+        build_requests = execute_builds_mock.call_args[0][0]
+        assert [request.estimated_duration for request in build_requests] == [
+            30.0,
+            15.0,
+        ]
+
+    def make_shard_projects(self, needing_build):
+        projects = Projects()
+        dependency_index = DependencyIndex()
+        for path, file_count, dependencies in [
+            ("libraries/lib", 200, set()),
+            ("platform/app1", 400, {"lib"}),
+            ("platform/app2", 400, {"lib"}),
+            ("platform/app3", 500, set()),
+        ]:
+            project = Project(
+                project_path=f"/repo/{path}",
+                file_list=FileList(
+                    f"/repo/{path}",
+                    [f"file{index}" for index in range(file_count)],
+                    [1.0] * file_count,
+                    [1] * file_count,
+                ),
+            )
+            project.needs_build = project.name in needing_build
+            projects.append(project)
+            dependency_index.add_project(project.name, dependencies)
+        projects._dependency_index = dependency_index
+        return projects
+
+    def test_select_shard(self, mocker):
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        projects = self.make_shard_projects({"lib", "app1", "app2", "app3"})
+        build_requests = ProjectBuildRequests.all_projects(projects)
+
+        first = BuildRunner()._select_shard(build_requests, projects, Shard(1, 2))
+
+        assert [request.project.name for request in first] == ["app3"]
+        for project in projects[:3]:
+            assert not project.needs_build
+            assert project.left_to_other_shard
+        assert len(projects[0].file_list) == 200
+
+    def test_select_shard_ignores_which_projects_need_a_build(self, mocker):
+        mocker.patch("monorepo_builder.runner.write_to_console")
+        projects = self.make_shard_projects({"app1"})
+        build_requests = ProjectBuildRequests.all_projects(projects)
+
+        first = BuildRunner()._select_shard(build_requests, projects, Shard(1, 2))
+        second = BuildRunner()._select_shard(build_requests, projects, Shard(2, 2))
+
+        assert list(first) == []
+        assert [request.project.name for request in second] == ["app1"]
+
+    def test_report_makespan(self, mocker):
+        write_to_console_mock = mocker.patch("monorepo_builder.runner.write_to_console")
+        first = ProjectBuildRequest(
+            project=Project(project_path="/repo/libraries/lib1")
+        )
+        first.started_at, first.ended_at = 100.0, 130.0
+        second = ProjectBuildRequest(project=Project(project_path="/repo/web/app"))
+        second.started_at, second.ended_at = 131.0, 145.0
+        not_run = ProjectBuildRequest(project=Project(project_path="/repo/web/other"))
+        duration_estimator = BuildDurationEstimator({})
+        duration_estimator.estimated_from_files = 1
+
+        BuildRunner()._report_makespan(
+            ProjectBuildRequests([first, second, not_run]), 40.0, duration_estimator
+        )
+
+        write_to_console_mock.assert_called_once_with(
+            "Build time: 45.0s, predicted 40.0s"
+            " (1 projects without history estimated from their file count)"
+        )
+
+    def test_build_projects_sets_library_versions(self, mocker):
+        mocker.patch.object(ConfigurationManager, "get", return_value=Configuration())
+        lib1 = Project(project_path="/repo/libraries/lib1")
+        lib2 = Project(project_path="/repo/libraries/lib2")
+        app = Project(project_path="/repo/platform/app", needs_build=True)
+        projects = Projects()
+        projects.extend([lib1, lib2, app])
+        dependency_index = DependencyIndex()
+        dependency_index.add_project("lib1", set())
+        dependency_index.add_project("lib2", {"lib1"})
+        dependency_index.add_project("app", {"lib2"})
+        projects._dependency_index = dependency_index
+        mocker.patch.object(
+            ProjectVersionManager,
+            "build_version_list",
+            return_value=ProjectVersions(
+                {lib1.project_path: "1.0", lib2.project_path: "2.0"}
+            ),
+        )
+        mocker.patch.object(
+            BuildDurationEstimator,
+            "build_duration_estimator_factory",
+            return_value=BuildDurationEstimator({}),
+        )
+        execute_builds_mock = mocker.patch.object(BuildExecutor, "execute_builds")
+        mocker.patch.object(BuildRunner, "_report_makespan")
+
+        BuildRunner().build_projects(projects, "2.0")
+
+        build_requests = execute_builds_mock.call_args[0][0]
+        assert [request.library_versions for request in build_requests] == [
+            {"lib1": "1.0", "lib2": "2.0"}
+        ]
@@ -0,0 +1,146 @@
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.s3_transfer import (
+    MULTIPART_CHUNK_SIZE,
+    S3ClientManager,
+    S3InstallerStore,
+    S3Object,
+    is_same_file,
+    local_etag,
+)
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket="installers")
+        yield s3_client
+
+
+@pytest.fixture
+def installer_store(s3_client):
+    return S3InstallerStore("installers", s3_client, 4)
+
+
+def write_file(path, content: bytes) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestS3InstallerStore:
+    def test_objects_listed_once(self, mocker, s3_client, installer_store):
+        s3_client.put_object(Bucket="installers", Key="lib1-1.0.tgz", Body=b"lib1")
+        get_paginator_spy = mocker.spy(s3_client, "get_paginator")
+
+        installer_store.objects()
+        result = installer_store.objects()
+
+        assert list(result) == ["lib1-1.0.tgz"]
+        assert result["lib1-1.0.tgz"].size == 4
+        get_paginator_spy.assert_called_once_with("list_objects_v2")
+
+    def test_download(self, tmp_path, s3_client, installer_store):
+        for name in ["lib1-1.0.tgz", "lib2-1.0.tgz", "lib3-1.0.tgz"]:
+            s3_client.put_object(Bucket="installers", Key=name, Body=name.encode())
+
+        installer_store.download(["lib1-1.0.tgz", "lib2-1.0.tgz"], str(tmp_path))
+
+        assert sorted(os.listdir(tmp_path)) == ["lib1-1.0.tgz", "lib2-1.0.tgz"]
+        assert (tmp_path / "lib2-1.0.tgz").read_bytes() == b"lib2-1.0.tgz"
+        assert installer_store.files_transferred == 2
+
+    def test_download_skips_current_files(self, tmp_path, s3_client, installer_store):
+        s3_client.put_object(Bucket="installers", Key="lib1-1.0.tgz", Body=b"lib1")
+        s3_client.put_object(Bucket="installers", Key="lib2-1.0.tgz", Body=b"lib2")
+        write_file(tmp_path / "lib1-1.0.tgz", b"lib1")
+        write_file(tmp_path / "lib2-1.0.tgz", b"old!")
+
+        installer_store.download(["lib1-1.0.tgz", "lib2-1.0.tgz"], str(tmp_path))
+
+        assert (tmp_path / "lib2-1.0.tgz").read_bytes() == b"lib2"
+        assert installer_store.files_skipped == 1
+        assert installer_store.files_transferred == 1
+
+    def test_upload(self, tmp_path, s3_client, installer_store):
+        filenames = [
+            write_file(tmp_path / "dist" / name, name.encode())
+            for name in ["lib1-1.0.tgz", "lib1-1.0.whl"]
+        ]
+
+        installer_store.upload(filenames)
+
+        listed = s3_client.list_objects_v2(Bucket="installers")["Contents"]
+        assert sorted(entry["Key"] for entry in listed) == [
+            "lib1-1.0.tgz",
+            "lib1-1.0.whl",
+        ]
+        assert sorted(installer_store.objects()) == ["lib1-1.0.tgz", "lib1-1.0.whl"]
+
+    def test_upload_skips_unchanged_files(self, mocker, tmp_path, installer_store):
+        filename = write_file(tmp_path / "lib1-1.0.tgz", b"lib1")
+        installer_store.upload([filename])
+        upload_file_spy = mocker.spy(installer_store.s3_client, "upload_file")
+
+        installer_store.upload([filename])
+
+        upload_file_spy.assert_not_called()
+        assert installer_store.files_skipped == 1
+
+    def test_multipart_upload_is_recognized(self, mocker, tmp_path, s3_client):
+        filename = write_file(
+            tmp_path / "big-1.0.tgz", os.urandom(MULTIPART_CHUNK_SIZE + 1024)
+        )
+        S3InstallerStore("installers", s3_client, 4).upload([filename])
+        installer_store = S3InstallerStore("installers", s3_client, 4)
+        upload_file_spy = mocker.spy(s3_client, "upload_file")
+
+        installer_store.upload([filename])
+
+        assert installer_store.objects()["big-1.0.tgz"].etag.endswith("-2")
+        upload_file_spy.assert_not_called()
+
+
+class TestLocalEtag:
+    def test_single_part(self, tmp_path):
+        filename = write_file(tmp_path / "file", b"content")
+
+        assert local_etag(filename, False) == "9a0364b9e99bb480dd25e1f0284c8555"
+
+    def test_is_same_file_checks_size_first(self, mocker, tmp_path):
+        filename = write_file(tmp_path / "file", b"content")
+        local_etag_mock = mocker.patch("monorepo_builder.s3_transfer.local_etag")
+
+        result = is_same_file(filename, S3Object("file", 3, "etag"))
+
+        assert result is False
+        local_etag_mock.assert_not_called()
+
+    def test_is_same_file_when_missing(self, tmp_path):
+        assert not is_same_file(str(tmp_path / "file"), S3Object("file", 3, "etag"))
+
+
+class TestS3ClientManager:
+    def test_client_is_shared(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager,
+            "get",
+            return_value=Configuration(s3_transfer_workers=5, build_jobs=2),
+        )
+        mocker.patch.object(S3ClientManager, "s3_client", None)
+        client_mock = mocker.patch("monorepo_builder.s3_transfer.boto3.client")
+
+        result = S3ClientManager.get()
+
+        assert S3ClientManager.get() is result
+        client_mock.assert_called_once()
+        assert client_mock.call_args[1]["config"].max_pool_connections == 40
@@ -0,0 +1,104 @@
+import pytest
+
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.file_list import FileList
+from monorepo_builder.history import BuildHistoryManager, ProjectBuildStatistics
+from monorepo_builder.projects import Project
+from monorepo_builder.scheduling import (
+    DEFAULT_SECONDS_PER_FILE,
+    BuildDurationEstimator,
+    simulate_makespan,
+)
+
+
+def make_project(name: str, file_count: int) -> Project:
+    path = f"/repo/platform/{name}"
+    return Project(
+        project_path=path,
+        file_list=FileList(
+            path,
+            [f"file{index}" for index in range(file_count)],
+            [1] * file_count,
+            [0] * file_count,
+        ),
+    )
+
+
+class TestBuildDurationEstimator:
+    def test_estimate_from_history(self):
+        duration_estimator = BuildDurationEstimator(
+            {"app": ProjectBuildStatistics("app", builds=3, durations=[1.0, 9.0, 4.0])}
+        )
+
+        result = duration_estimator.estimate([make_project("app", 10)])
+
+        assert result == {"app": 4.0}
+        assert duration_estimator.estimated_from_history == 1
+
+    def test_estimate_from_file_count(self):
+        duration_estimator = BuildDurationEstimator(
+            {
+                "one": ProjectBuildStatistics("one", builds=1, durations=[10.0]),
+                "two": ProjectBuildStatistics("two", builds=1, durations=[40.0]),
+                "three": ProjectBuildStatistics("three", builds=1, durations=[90.0]),
+            }
+        )
+
+        result = duration_estimator.estimate(
+            [
+                make_project("one", 10),
+                make_project("two", 10),
+                make_project("three", 10),
+                make_project("new", 20),
+            ]
+        )
+
+        assert result["new"] == 80.0
+        assert duration_estimator.estimated_from_files == 1
+
+    def test_estimate_without_history(self):
+        duration_estimator = BuildDurationEstimator({})
+
+        result = duration_estimator.estimate(
+            [make_project("big", 300), make_project("empty", 0)]
+        )
+
+        assert result == {
+            "big": pytest.approx(300 * DEFAULT_SECONDS_PER_FILE),
+            "empty": pytest.approx(DEFAULT_SECONDS_PER_FILE),
+        }
+
+    def test_factory_without_history(self, mocker):
+        mocker.patch.object(
+            ConfigurationManager, "get", return_value=Configuration(history_filename="")
+        )
+        mocker.patch.object(BuildHistoryManager, "build_history", None)
+
+        duration_estimator = BuildDurationEstimator.build_duration_estimator_factory()
+
+        assert duration_estimator.project_statistics == {}
+
+
+class TestSimulateMakespan:
+    def test_sequential(self):
+        build_graph = BuildGraph({"lib": set(), "std": {"lib"}, "other": set()})
+
+        result = simulate_makespan(
+            build_graph, {"lib": 2.0, "std": 3.0, "other": 4.0}, workers=1
+        )
+
+        assert result == 9.0
+
+    def test_parallel_follows_the_critical_path(self):
+        build_graph = BuildGraph(
+            {"lib": set(), "std": {"lib"}, "leaf1": set(), "leaf2": set()}
+        )
+        durations = {"lib": 2.0, "std": 6.0, "leaf1": 3.0, "leaf2": 3.0}
+
+        result = simulate_makespan(build_graph, durations, workers=2)
+
+        assert result == 8.0
+
+    def test_empty_graph(self):
+        assert simulate_makespan(BuildGraph(), {}, workers=4) == 0.0
@@ -0,0 +1,64 @@
+import pytest
+
+from monorepo_builder.build_graph import BuildGraph
+from monorepo_builder.sharding import InvalidShardException, Shard, ShardPlanner
+
+
+class TestShard:
+    def test_parse(self):
+        assert Shard.parse("2/4") == Shard(2, 4)
+        assert str(Shard.parse(" 1 / 3 ")) == "1/3"
+
+    @pytest.mark.parametrize("value", ["", "2", "0/4", "5/4", "a/b", "1/0"])
+    def test_parse_invalid(self, value):
+        with pytest.raises(InvalidShardException):
+            Shard.parse(value)
+
+
+class TestShardPlanner:
+    def test_every_project_is_planned_once(self):
+        build_graph = BuildGraph({name: set() for name in ["a", "b", "c", "d", "e"]})
+        durations = {"a": 5.0, "b": 4.0, "c": 3.0, "d": 2.0, "e": 2.0}
+
+        result = ShardPlanner(build_graph, durations).plan(2)
+
+        assert result == [{"a", "d", "e"}, {"b", "c"}]
+
+    def test_libraries_go_with_the_projects_using_them(self):
+        build_graph = BuildGraph(
+            {
+                "lib1": set(),
+                "lib2": {"lib1"},
+                "app1": {"lib2"},
+                "app2": {"lib1"},
+                "app3": set(),
+            }
+        )
+        durations = {"lib1": 1.0, "lib2": 1.0, "app1": 4.0, "app2": 4.0, "app3": 4.0}
+
+        result = ShardPlanner(build_graph, durations).plan(3)
+
+        assert result == [
+            {"lib1", "lib2", "app1"},
+            {"lib1", "app2"},
+            {"app3"},
+        ]
+
+    def test_projects_sharing_a_library_are_kept_together_when_cheaper(self):
+        build_graph = BuildGraph(
+            {"lib": set(), "app1": {"lib"}, "app2": {"lib"}, "other": set()}
+        )
+        durations = {"lib": 10.0, "app1": 1.0, "app2": 1.0, "other": 10.0}
+
+        result = ShardPlanner(build_graph, durations).plan(2)
+
+        assert result == [{"other"}, {"lib", "app1", "app2"}]
+
+    def test_more_shards_than_projects(self):
+        build_graph = BuildGraph({"app": set()})
+
+        assert ShardPlanner(build_graph, {"app": 1.0}).plan(3) == [
+            {"app"},
+            set(),
+            set(),
+        ]
@@ -0,0 +1,165 @@
+import pickle
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from monorepo_builder.configuration import ConfigurationManager, Configuration
+from monorepo_builder.file_list import File, FileList
+from monorepo_builder.project_list import Projects
+from monorepo_builder.projects import Project
+from monorepo_builder.state_store import StateStore, StateStoreManager
+
+HASH = "ab" * 20
+
+
+@dataclass(frozen=True)
+class PickledFile:
+    file: str
+    last_changed_time: float
+    content_hash: Optional[str] = None
+
+
+PickledFile.__module__ = "monorepo_builder.projects"
+PickledFile.__qualname__ = "File"
+from monorepo_builder.version import ProjectVersions
+
+
+@pytest.fixture
+def state_store(tmp_path):
+    state_store = StateStore(str(tmp_path / "state.db"))
+    yield state_store
+    state_store.close()
+
+
+@pytest.fixture
+def configuration(mocker, tmp_path):
+    configuration = Configuration(
+        state_store_filename=str(tmp_path / "state.db"),
+        project_list_filename=str(tmp_path / ".projectlist"),
+        version_list_filename=str(tmp_path / ".versionlist"),
+    )
+    mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
+    mocker.patch.object(StateStoreManager, "state_store", None)
+    yield configuration
+    StateStoreManager.close()
+
+
+def make_project(name: str, *files: File) -> Project:
+    project_path = f"/repo/libraries/{name}"
+    return Project(
+        project_path=project_path,
+        file_list=FileList(
+            project_path,
+            [file.file for file in files],
+            [file.last_changed_time for file in files],
+            [len(file.file) for file in files],
+        ),
+    )
+
+
+class TestStateStore:
+    def test_uses_write_ahead_log(self, state_store):
+        result = state_store.connection.execute("PRAGMA journal_mode").fetchone()
+
+        assert result[0] == "wal"
+
+    def test_load_project_not_found(self, state_store):
+        assert state_store.load_project("missing") is None
+
+    def test_save_and_load_project(self, tmp_path, state_store):
+        project = make_project("lib1", File("a", 1.5), File("b", 2.0))
+        state_store.save_projects([project])
+        state_store.close()
+
+        result = StateStore(str(tmp_path / "state.db")).load_project("lib1")
+
+        assert result.project_path == "/repo/libraries/lib1"
+        assert result.file_list == project.file_list
+
+    def test_save_project_skips_unchanged_file_list(self, state_store):
+        state_store.save_project(make_project("lib1", File("a", 1)))
+        changes = state_store.connection.total_changes
+
+        state_store.save_project(make_project("lib1", File("a", 1)))
+        assert state_store.connection.total_changes == changes
+
+        state_store.save_project(make_project("lib1", File("a", 2)))
+        assert state_store.connection.total_changes == changes + 1
+        assert list(state_store.load_project("lib1").file_list) == [
+            File("/repo/libraries/lib1/a", 2)
+        ]
+
+    def test_save_projects_removes_missing_projects(self, state_store):
+        state_store.save_projects([make_project("one"), make_project("two")])
+
+        state_store.save_projects([make_project("two")])
+
+        assert state_store.project_names() == ["two"]
+
+    def test_save_projects_keeps_kept_projects(self, state_store):
+        state_store.save_projects(
+            [make_project("one", File("a", 1)), make_project("two")]
+        )
+
+        state_store.save_projects([make_project("two")], {"one", "three"})
+
+        assert state_store.project_names() == ["one", "two"]
+        assert len(state_store.load_project("one").file_list) == 1
+
+    def test_transaction_rolls_back_on_error(self, state_store):
+        with pytest.raises(RuntimeError):
+            with state_store.transaction():
+                state_store.save_project(make_project("lib1", File("a", 1)))
+                raise RuntimeError()
+
+        assert state_store.load_project("lib1") is None
+
+    def test_save_and_load_versions(self, state_store):
+        state_store.save_versions({"one": "1.0", "two": "1.0"})
+
+        state_store.save_versions({"one": "1.1", "three": "1.1"})
+
+        assert state_store.load_versions() == {"one": "1.1", "three": "1.1"}
+
+
+class TestStateStoreManager:
+    def test_get_opens_configured_store_once(self, configuration, tmp_path):
+        result = StateStoreManager.get()
+
+        assert StateStoreManager.get() is result
+        assert (tmp_path / "state.db").exists()
+
+    def test_get_migrates_pickled_state(self, configuration, mocker):
+        mocker.patch("monorepo_builder.state_store.write_to_console")
+        mocker.patch("monorepo_builder.projects.File", PickledFile)
+        projects = Projects()
+        projects.append(
+            Project(
+                project_path="/repo/libraries/lib1",
+                file_list=[PickledFile("/repo/libraries/lib1/a", 1, HASH)],
+            )
+        )
+        with open(configuration.project_list_filename, "wb") as file:
+            pickle.dump(projects, file)
+        with open(configuration.version_list_filename, "wb") as file:
+            pickle.dump(ProjectVersions({"/repo/libraries/lib1": "1.0"}), file)
+
+        state_store = StateStoreManager.get()
+
+        assert list(state_store.load_project("lib1").file_list) == [
+            File("/repo/libraries/lib1/a", 1, HASH)
+        ]
+        assert state_store.load_versions() == {"/repo/libraries/lib1": "1.0"}
+
+    def test_get_migrates_pickled_state_only_once(self, configuration, mocker):
+        StateStoreManager.get()
+        StateStoreManager.close()
+        projects = Projects()
+        projects.append(make_project("lib1"))
+        with open(configuration.project_list_filename, "wb") as file:
+            pickle.dump(projects, file)
+
+        state_store = StateStoreManager.get()
+
+        assert state_store.project_names() == []
@@ -0,0 +1,125 @@
+import json
+import threading
+
+from monorepo_builder.tracing import Tracer, TraceManager, RUNNER_TRACK
+
+
+def events_named(tracer, name):
+    return [event for event in tracer.trace_events() if event["name"] == name]
+
+
+class TestTracer:
+    def test_span(self):
+        tracer = Tracer()
+
+        with tracer.span("outer"):
+            with tracer.span("inner", result="ok"):
+                pass
+
+        (outer,) = events_named(tracer, "outer")
+        (inner,) = events_named(tracer, "inner")
+        assert outer["ph"] == "X"
+        assert inner["args"] == {"result": "ok"}
+        assert outer["tid"] == inner["tid"]
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+    def test_span_recorded_when_an_exception_is_raised(self):
+        tracer = Tracer()
+
+        try:
+            with tracer.span("failing"):
+                raise ValueError()
+        except ValueError:
+            pass
+
+        assert len(events_named(tracer, "failing")) == 1
+
+    def test_add_span_measured_before_the_tracer_started(self):
+        tracer = Tracer(started_at_ns=1_000_000)
+
+        tracer.add_span("setup", 1_000_000, 3_000_000)
+
+        (setup,) = events_named(tracer, "setup")
+        assert setup["ts"] == 0
+        assert setup["dur"] == 2000
+
+    def test_tracks_are_named(self):
+        tracer = Tracer()
+
+        with tracer.span("setup"):
+            pass
+        with tracer.span("build", track="lib1"):
+            pass
+
+        track_names = {
+            event["tid"]: event["args"]["name"]
+            for event in events_named(tracer, "thread_name")
+        }
+        assert track_names == {0: RUNNER_TRACK, 1: "lib1"}
+        assert events_named(tracer, "build")[0]["tid"] == 1
+
+    def test_count_records_running_totals(self):
+        tracer = Tracer()
+
+        tracer.count("installers", files_placed=2, bytes_copied=100)
+        tracer.count("installers", files_placed=1, bytes_copied=50)
+
+        assert [event["args"] for event in events_named(tracer, "installers")] == [
+            {"files_placed": 2, "bytes_copied": 100},
+            {"files_placed": 3, "bytes_copied": 150},
+        ]
+        assert events_named(tracer, "installers")[0]["ph"] == "C"
+
+    def test_count_from_several_threads(self):
+        tracer = Tracer()
+
+        threads = [
+            threading.Thread(target=lambda: tracer.count("scan", files_scanned=1))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert (
+            max(
+                event["args"]["files_scanned"] for event in events_named(tracer, "scan")
+            )
+            == 10
+        )
+
+    def test_save(self, tmp_path):
+        tracer = Tracer()
+        with tracer.span("setup"):
+            pass
+
+        tracer.save(str(tmp_path / "trace.json"))
+
+        saved = json.loads((tmp_path / "trace.json").read_text())
+        assert saved["displayTimeUnit"] == "ms"
+        assert [event["name"] for event in saved["traceEvents"]] == [
+            "thread_name",
+            "thread_sort_index",
+            "setup",
+        ]
+
+
+class TestTraceManager:
+    def test_span_without_tracer(self, mocker):
+        mocker.patch.object(TraceManager, "tracer", None)
+
+        with TraceManager.span("setup"):
+            TraceManager.count("scan", files_scanned=1)
+
+    def test_span_with_tracer(self, mocker):
+        mocker.patch.object(TraceManager, "tracer", None)
+        TraceManager.start()
+
+        with TraceManager.span("build", track="lib1"):
+            TraceManager.count("scan", files_scanned=1)
+        tracer = TraceManager.stop()
+
+        assert [event["name"] for event in tracer.events] == ["scan", "build"]
+        assert TraceManager.tracer is None
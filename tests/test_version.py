@@ -1,8 +1,8 @@
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock
 
-from monorepo_builder.configuration import Configuration, ConfigurationManager
 from monorepo_builder.project_list import Projects
 from monorepo_builder.projects import Project
+from monorepo_builder.state_store import StateStoreManager, StateStore
 from monorepo_builder.version import ProjectVersionManager, ProjectVersions
 
 
@@ -53,46 +53,21 @@ class TestProjectVersion:
         assert project_version_list["path1"] == "1.0.0"
         assert project_version_list["path2"] == "1.0.0"
 
-    def test_load_previous_version_list_not_found(self, mocker):
-        configuration = MagicMock(spec=Configuration, version_list_filename="file")
-        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        path_mock = mocker.patch("monorepo_builder.version.Path")
-        path_mock.return_value.exists.return_value = False
-        project_versions_mock = mocker.patch("monorepo_builder.version.ProjectVersions")
+    def test_load_previous_version_list(self, mocker):
+        state_store = MagicMock(spec=StateStore)
+        state_store.load_versions.return_value = {"path": "1.0"}
+        mocker.patch.object(StateStoreManager, "get", return_value=state_store)
 
         result = ProjectVersionManager().load_previous_version_list()
 
-        assert result is project_versions_mock.return_value
-        path_mock.assert_called_once_with("file")
-
-    def test_load_previous_version_list_found(self, mocker):
-        configuration = MagicMock(spec=Configuration, version_list_filename="file")
-        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        path_mock = mocker.patch("monorepo_builder.version.Path")
-        path_mock.return_value.exists.return_value = True
-        open_mock = mock_open()
-        versions_mock = MagicMock(spec=ProjectVersions)
-        loads_mock = mocker.patch(
-            "monorepo_builder.version.pickle.load", return_value=versions_mock
-        )
-
-        with patch("builtins.open", open_mock):
-            result = ProjectVersionManager().load_previous_version_list()
-
-        open_mock.assert_called_once_with("file", "rb")
-        assert result is versions_mock
-        path_mock.assert_called_once_with("file")
-        loads_mock.assert_called_once_with(open_mock.return_value)
+        assert isinstance(result, ProjectVersions)
+        assert result == {"path": "1.0"}
 
     def test_save_previous_version_list(self, mocker):
-        configuration = MagicMock(spec=Configuration, version_list_filename="file")
-        mocker.patch.object(ConfigurationManager, "get", return_value=configuration)
-        dump_mock = mocker.patch("monorepo_builder.version.pickle.dump")
-        open_mock = mock_open()
+        state_store = MagicMock(spec=StateStore)
+        mocker.patch.object(StateStoreManager, "get", return_value=state_store)
         project_versions = MagicMock(spec=ProjectVersions)
 
-        with patch("builtins.open", open_mock):
-            ProjectVersionManager().save_version_list(project_versions)
+        ProjectVersionManager().save_version_list(project_versions)
 
-        open_mock.assert_called_once_with("file", "wb")
-        dump_mock.assert_called_once_with(project_versions, open_mock.return_value)
+        state_store.save_versions.assert_called_once_with(project_versions)